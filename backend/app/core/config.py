@@ -17,6 +17,18 @@ class Settings:
     # TTS (Text-to-Speech) Settings
     TTS_OUTPUT_DIR: str = "./tts"
     
+    # STT (Speech-to-Text) Settings: one shared Vosk model, a pool of recognizers on it
+    VOSK_MODEL_PATH: str = os.getenv("VOSK_MODEL_PATH", os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "model", "vosk-model-small-en-us-0.15"))
+    STT_SAMPLE_RATE: int = 16000
+    STT_POOL_SIZE: int = 4  # Concurrent recognition sessions
+    STT_ACQUIRE_TIMEOUT: float = 2.0  # Seconds a new session waits for a free recognizer
+    STT_MAX_UTTERANCE_SECONDS: float = 30.0
+    STT_IDLE_TIMEOUT: float = 10.0  # Seconds without a frame before a stream is closed
+    STT_WORKERS: int = 2  # Decoder processes for uploaded clips
+    STT_MAX_QUEUED: int = 8  # Uploads waiting beyond the running ones before 503
+    STT_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    
     # Security
     SECRET_KEY: str = "your-secret-key-for-hackathon"
     
@@ -2,7 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.models.database import create_tables
-from app.routes import chat, threads, tts, auth
+from app.routes import chat, threads, tts, auth, admin, stt
+from app.services.stt import get_transcription_pool
 
 # Create FastAPI app
 app = FastAPI(
@@ -28,11 +29,17 @@ async def startup_event():
     print(f"📊 Database: {settings.DATABASE_URL}")
     print(f"🎯 Environment: {'Development' if settings.DEBUG else 'Production'}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_transcription_pool().shutdown()
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(threads.router)
 app.include_router(tts.router)
 app.include_router(auth.router)
+app.include_router(admin.router)
+app.include_router(stt.router)
 
 # Health check endpoint
 @app.get("/ping")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.database import Base
@@ -19,6 +19,8 @@ class Thread(Base):
     
     # Relationship with messages
     messages = relationship("Message", back_populates="thread", cascade="all, delete-orphan")
+    summary = relationship("ConversationSummary", back_populates="thread", uselist=False,
+                           cascade="all, delete-orphan")
 
 class Message(Base):
     """
@@ -41,3 +43,20 @@ class Message(Base):
     
     # Relationship with thread
     thread = relationship("Thread", back_populates="messages")
+
+class ConversationSummary(Base):
+    """
+    Rolling summary of a thread's older messages, so the AI service receives
+    a bounded context (this summary plus the newest turns) however long the thread is.
+    """
+    __tablename__ = "conversation_summaries"
+    
+    conversation_id = Column(String, ForeignKey("threads.conversation_id"), primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    summary = Column(Text, nullable=False, default="")
+    topics = Column(JSON, nullable=True)  # Recent topics detected in the folded messages
+    message_count = Column(Integer, default=0)  # Messages folded into the summary so far
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationship with thread
+    thread = relationship("Thread", back_populates="summary")
@@ -0,0 +1,74 @@
+"""
+Admin endpoints for reviewing and exporting conversation logs
+"""
+from fastapi import APIRouter, Query
+from typing import Optional
+from datetime import datetime
+
+from app.models.database import SessionLocal
+from app.models.models import Thread, Message
+from app.services.log_export import export_response
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+EXPORT_FIELDS = [
+    "log_id", "conversation_id", "user_id", "sender", "user_query",
+    "preprocessed_query", "response_text", "language", "sources",
+    "flags", "tts_audio_path", "timestamp"
+]
+
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+def iter_thread_messages(
+    db,
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Yield (message, user_id) pairs in timestamp order without loading them all"""
+    query = db.query(Message, Thread.user_id).join(Thread, Message.conversation_id == Thread.conversation_id)
+    if user_id:
+        query = query.filter(Thread.user_id == user_id)
+    if start:
+        query = query.filter(Message.timestamp >= start)
+    if end:
+        query = query.filter(Message.timestamp < end)
+    query = query.order_by(Message.timestamp, Message.log_id)
+    return query.execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+
+@router.get("/logs/export")
+async def export_logs(
+    format: str = Query("ndjson", description="Export format: ndjson or csv"),
+    gzip: bool = Query(False, description="Gzip-compress the export"),
+    user_id: Optional[str] = Query(None, description="Filter by student/user ID"),
+    start: Optional[datetime] = Query(None, description="Only messages at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only messages before this time")
+):
+    """
+    Stream thread messages as NDJSON or CSV for offline review.
+    Memory use stays constant regardless of export size.
+    """
+    def rows():
+        # The stream outlives the request handler, so it owns its own session
+        db = SessionLocal()
+        try:
+            for msg, thread_user_id in iter_thread_messages(db, user_id=user_id, start=start, end=end):
+                yield {
+                    "log_id": msg.log_id,
+                    "conversation_id": msg.conversation_id,
+                    "user_id": thread_user_id,
+                    "sender": msg.sender,
+                    "user_query": msg.user_query,
+                    "preprocessed_query": msg.preprocessed_query,
+                    "response_text": msg.response_text,
+                    "language": msg.language,
+                    "sources": msg.sources,
+                    "flags": msg.flags,
+                    "tts_audio_path": msg.tts_audio_path,
+                    "timestamp": msg.timestamp.isoformat() if msg.timestamp else None
+                }
+        finally:
+            db.close()
+
+    return export_response(rows(), EXPORT_FIELDS, fmt=format, compress=gzip, filename_prefix="manny_thread_logs")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -9,6 +9,7 @@ from app.models.database import get_db
 from app.models.models import Thread, Message
 from app.core.config import settings
 from app.services.dummy_ai import DummyAIService
+from app.services import conversation_memory
 
 router = APIRouter(prefix="/api", tags=["chat"])
 dummy_ai = DummyAIService()
@@ -46,10 +47,11 @@ class MessageResponse(BaseModel):
     timestamp: datetime
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_endpoint(request: ChatRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
     Main chat endpoint that processes user messages and returns AI responses.
     Creates conversation threads and logs all interactions.
+    The thread's rolling summary is updated in the background after the response.
     """
     
     # Generate conversation_id if not provided
@@ -82,17 +84,15 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
     )
     db.add(user_message)
     
-    # Get conversation history for context
-    conversation_history = []
-    if conversation_id:
-        existing_messages = db.query(Message).filter(Message.conversation_id == conversation_id).order_by(Message.timestamp).all()
-        conversation_history = [{"user_query": msg.user_query, "response_text": msg.response_text} for msg in existing_messages[-5:]]  # Last 5 messages
+    # Get conversation context: rolling summary of older turns + the newest turns
+    conversation_summary, conversation_history = conversation_memory.get_prompt_history(db, conversation_id)
     
     # Generate AI response using dummy AI service
     ai_response = dummy_ai.generate_response(
         query=request.message,
         language=request.language or "en",
-        conversation_history=conversation_history
+        conversation_history=conversation_history,
+        conversation_summary=conversation_summary
     )
     
     # Generate TTS path (simulated)
@@ -114,6 +114,10 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
     db.add(ai_message)
     db.commit()
     
+    # Fold turns that left the recent window into the summary, off the request path
+    background_tasks.add_task(conversation_memory.update_summary, conversation_id, request.user_id,
+                              dummy_ai._detect_category)
+    
     # Return response
     return ChatResponse(
         response=ai_response["response"],
@@ -0,0 +1,98 @@
+"""
+Speech-to-text endpoints
+"""
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.audio_prep import AudioFormatError
+from app.services.stt import STTBusy, STTSession, STTUnavailable, get_recognizer_pool, get_transcription_pool
+
+router = APIRouter()
+
+
+@router.websocket("/api/stt/stream")
+async def stt_stream(websocket: WebSocket):
+    """
+    Streaming recognition of one utterance.
+    Client -> server: binary frames of 16 kHz, 16-bit little-endian mono PCM;
+    a text frame "end" flushes and finishes early.
+    Server -> client: {"type": "partial", "text"} while the user speaks, then one
+    {"type": "final", "text", "audio_seconds", "decode_seconds", "real_time_factor"}
+    as soon as Vosk detects the end of speech; the socket is then closed. Streams
+    longer than STT_MAX_UTTERANCE_SECONDS are finished, and a client that sends
+    nothing for STT_IDLE_TIMEOUT seconds is disconnected (1008).
+    """
+    await websocket.accept()
+    try:
+        session = await run_in_threadpool(STTSession, get_recognizer_pool())
+    except (STTBusy, STTUnavailable) as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        # 1013 "try again later" when busy, 1011 when STT cannot run at all
+        await websocket.close(code=1013 if isinstance(e, STTBusy) else 1011)
+        return
+
+    try:
+        await websocket.send_json({"type": "ready", "sample_rate": settings.STT_SAMPLE_RATE})
+        loop = asyncio.get_running_loop()
+        idle_deadline = loop.time() + settings.STT_IDLE_TIMEOUT
+        while not session.done:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=max(idle_deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                # An idle client must not keep one of the few recognizers
+                await websocket.send_json({"type": "error", "message": "No audio received, closing"})
+                await websocket.close(code=1008)
+                return
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                # Only audio counts as activity, not empty or unknown frames
+                idle_deadline = loop.time() + settings.STT_IDLE_TIMEOUT
+                # Kaldi decoding is CPU-bound: keep it off the event loop
+                event = await run_in_threadpool(session.feed, message["bytes"])
+            elif (message.get("text") or "").strip().lower() == "end":
+                event = await run_in_threadpool(session.finish)
+            else:
+                continue
+            if event is not None:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
+
+
+@router.post("/api/stt/transcribe")
+async def stt_transcribe(request: Request, vad: bool = True):
+    """
+    Transcribe an uploaded clip sent as the request body (a PCM WAV file, any rate,
+    mono or stereo). The audio is resampled to 16 kHz mono, leading and trailing
+    silence is trimmed (vad=false keeps it), and Vosk decodes it in a worker process.
+    Returns the text with audio, speech and trimmed seconds, queue/prep/decode times
+    and the real-time factor.
+    """
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    if len(data) > settings.STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+
+    try:
+        future = get_transcription_pool().submit(data, vad=vad)
+        return await asyncio.wrap_future(future)
+    except STTBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except STTUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AudioFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+
+@router.get("/api/stt/status")
+async def stt_status():
+    """Recognizer and transcription pool usage"""
+    return {"stream": get_recognizer_pool().stats(), "transcribe": get_transcription_pool().stats()}
@@ -0,0 +1,89 @@
+"""
+Audio preparation for uploaded clips: WAV parsing, downmix/resampling to the
+recognizer's rate, and energy-based voice-activity detection used to trim leading
+and trailing silence before decoding. Pure numpy, so it runs in the STT workers.
+"""
+import io
+import wave
+from typing import Tuple
+
+import numpy as np
+
+
+class AudioFormatError(ValueError):
+    """Upload is not a readable 8/16/32-bit PCM WAV file"""
+
+
+def read_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """(mono float32 samples in [-1, 1], sample rate) from WAV bytes"""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise AudioFormatError(f"Not a PCM WAV file: {e}") from e
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise AudioFormatError(f"Unsupported sample width: {width * 8} bits")
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Windowed-sinc low-pass (when downsampling) followed by linear interpolation"""
+    if rate == target_rate or len(samples) == 0:
+        return samples.astype(np.float32)
+    if target_rate < rate:
+        # Cut off just below the new Nyquist frequency to avoid aliasing
+        cutoff = 0.45 * target_rate / rate
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    duration = len(samples) / rate
+    positions = np.arange(int(duration * target_rate)) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples: np.ndarray, rate: int, frame_ms: int = 30, threshold_db: float = 12.0,
+                 padding_ms: int = 200, edge_ms: int = 150, floor_range_db: Tuple[float, float] = (-70.0, -50.0),
+                 min_silence_share: float = 0.1) -> Tuple[np.ndarray, float, float]:
+    """
+    (trimmed samples, start seconds, end seconds). The noise floor is the energy of the
+    quieter clip edge (first/last edge_ms), clamped to floor_range_db (dBFS): a clip that
+    starts or ends mid-word cannot raise the floor above -50 dB, so quiet speech is never
+    taken for silence. A frame is speech when it is threshold_db above that floor, and
+    padding_ms is kept on both sides so word onsets and trailing consonants survive.
+    Clips where fewer than min_silence_share of the frames are silence are returned unchanged.
+    """
+    frame = max(1, rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count < 2:
+        return samples, 0.0, len(samples) / rate
+
+    frames = samples[: count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    edge = max(1, min(count // 2, edge_ms // frame_ms))
+    floor_db = min(np.median(energy_db[:edge]), np.median(energy_db[-edge:]))
+    threshold = float(np.clip(floor_db, *floor_range_db)) + threshold_db
+    voiced = np.flatnonzero(energy_db > threshold)
+    if len(voiced) == 0 or count - len(voiced) < min_silence_share * count:
+        return samples, 0.0, len(samples) / rate
+
+    pad = padding_ms * rate // 1000
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return samples[start:end], start / rate, end / rate
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """16-bit little-endian PCM, as Vosk expects"""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
@@ -0,0 +1,121 @@
+"""
+Rolling per-thread conversation memory.
+
+The AI service gets the thread's summary plus the newest RECENT_TURNS turns
+instead of raw history, so its input stays bounded however long a thread runs.
+After each turn a background task folds every older message into the summary.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import literal_column
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal
+from app.models.models import ConversationSummary, Message
+
+# Newest user+assistant turns passed raw; each turn is two message rows
+RECENT_TURNS = 2
+RECENT_MESSAGES = 2 * RECENT_TURNS
+
+# Timestamps have one-second resolution; SQLite's rowid breaks ties in insertion order
+_INSERT_ORDER = literal_column("messages.rowid")
+
+# Hard bounds on what the summary carries
+SUMMARY_MAX_CHARS = 800
+SUMMARY_LINE_CHARS = 160
+MAX_TOPICS = 5
+
+
+def _in_order(query):
+    """Oldest first, in insertion order (a turn's user row before its assistant row)"""
+    return query.order_by(Message.timestamp, _INSERT_ORDER)
+
+
+def _history_item(message: Message) -> Dict[str, Any]:
+    return {"user_query": message.user_query, "response_text": message.response_text}
+
+
+def _summary_line(message: Message) -> Optional[str]:
+    """One short line per folded message; user rows carry the question, assistant rows the answer"""
+    if message.sender == "assistant":
+        text, label = message.response_text, "Assistant said"
+    else:
+        text, label = message.user_query, "User asked"
+    text = " ".join((text or "").split())
+    if not text:
+        return None
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 3] + "..."
+    return f"{label}: {text}"
+
+
+def _bounded(lines: List[str]) -> str:
+    """Keep the newest lines that fit in SUMMARY_MAX_CHARS"""
+    kept, used = [], 0
+    for line in reversed(lines):
+        if used + len(line) + 1 > SUMMARY_MAX_CHARS:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join(reversed(kept))
+
+
+def get_prompt_history(db: Session, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(summary dict or None, newest RECENT_MESSAGES messages oldest first) for the AI service"""
+    recent = (db.query(Message)
+              .filter(Message.conversation_id == conversation_id)
+              .order_by(Message.timestamp.desc(), _INSERT_ORDER.desc())
+              .limit(RECENT_MESSAGES)
+              .all())
+    row = db.query(ConversationSummary).filter(ConversationSummary.conversation_id == conversation_id).first()
+    summary = None
+    if row and row.message_count:
+        summary = {"summary": row.summary, "topics": row.topics or [], "message_count": row.message_count}
+    return summary, [_history_item(msg) for msg in reversed(recent)]
+
+
+def fold_messages(db: Session, conversation_id: str, user_id: str,
+                  detect_topic: Optional[Callable[[str], str]] = None) -> bool:
+    """Fold messages older than the recent window into the thread summary. Returns True if it changed"""
+    row = db.query(ConversationSummary).filter(ConversationSummary.conversation_id == conversation_id).first()
+    covered = row.message_count if row else 0
+    messages = (_in_order(db.query(Message).filter(Message.conversation_id == conversation_id))
+                .offset(covered)
+                .all())
+    fold = messages[:max(len(messages) - RECENT_MESSAGES, 0)]
+    if not fold:
+        return False
+
+    if row is None:
+        row = ConversationSummary(conversation_id=conversation_id, user_id=user_id, summary="", topics=[],
+                                  message_count=0)
+        db.add(row)
+    lines = [line for line in (row.summary or "").split("\n") if line]
+    topics = list(row.topics or [])
+    for message in fold:
+        line = _summary_line(message)
+        if line:
+            lines.append(line)
+        if detect_topic and message.sender == "user" and message.user_query:
+            topic = detect_topic(message.user_query.lower())
+            if topic != "general":
+                topics = [t for t in topics if t != topic] + [topic]
+
+    row.summary = _bounded(lines)
+    row.topics = topics[-MAX_TOPICS:]
+    row.message_count = covered + len(fold)
+    db.commit()
+    return True
+
+
+def update_summary(conversation_id: str, user_id: str, detect_topic: Optional[Callable[[str], str]] = None):
+    """Background task: runs after the response is sent, with its own session"""
+    db = SessionLocal()
+    try:
+        fold_messages(db, conversation_id, user_id, detect_topic)
+    except Exception as e:
+        # The next turn retries; a stale summary only costs some context
+        db.rollback()
+        print(f"⚠️ Conversation summary update failed for {conversation_id}: {e}")
+    finally:
+        db.close()
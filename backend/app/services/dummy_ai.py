@@ -129,12 +129,18 @@ class DummyAIService:
             ]
         }
     
-    def generate_response(self, query: str, language: str = "en", conversation_history: List[Dict] | None = None) -> Dict[str, Any]:
-        """Generate dummy AI response based on query keywords"""
+    def generate_response(self, query: str, language: str = "en", conversation_history: List[Dict] | None = None,
+                          conversation_summary: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """
+        Generate dummy AI response based on query keywords.
+        conversation_summary: rolling summary of the turns before conversation_history
+        (see services/conversation_memory.py)
+        """
         query_lower = query.lower()
         
         # Context-aware responses based on conversation history
-        context = self._analyze_conversation_context(conversation_history) if conversation_history else {}
+        context = self._analyze_conversation_context(conversation_history, conversation_summary) \
+            if conversation_history or conversation_summary else {}
         
         # Determine response category based on keywords
         category = self._detect_category(query_lower)
@@ -175,22 +181,24 @@ class DummyAIService:
             "tts_audio_url": self._get_tts_url(response_text, language) if language == "en" else None
         }
     
-    def _analyze_conversation_context(self, history: List[Dict]) -> Dict[str, Any]:
-        """Analyze conversation history for context"""
-        if not history:
+    def _analyze_conversation_context(self, history: List[Dict], summary: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """Analyze conversation history (and the summary of older turns) for context"""
+        history = history or []
+        if not history and not summary:
             return {}
         
+        summarized = summary.get("message_count", 0) if summary else 0
         context = {
-            "returning_user": len(history) > 1,
-            "message_count": len(history),
-            "topics_discussed": [],
+            "returning_user": len(history) + summarized > 1,
+            "message_count": len(history) + summarized,
+            "topics_discussed": list(summary.get("topics") or []) if summary else [],
             "last_topic": None,
             "user_sentiment": "neutral"
         }
         
         # Analyze recent messages for topics
         for msg in history[-3:]:  # Look at last 3 messages
-            query = msg.get("user_query", "").lower()
+            query = (msg.get("user_query") or "").lower()
             topic = self._detect_category(query)
             if topic != "general":
                 context["topics_discussed"].append(topic)
@@ -199,7 +207,7 @@ class DummyAIService:
             context["last_topic"] = context["topics_discussed"][-1]
         
         # Simple sentiment analysis
-        recent_query = history[-1].get("user_query", "").lower()
+        recent_query = (history[-1].get("user_query") or "").lower() if history else ""
         if any(word in recent_query for word in ["urgent", "immediate", "asap", "emergency"]):
             context["user_sentiment"] = "urgent"
         elif any(word in recent_query for word in ["confused", "don't understand", "unclear"]):
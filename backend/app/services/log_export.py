@@ -0,0 +1,100 @@
+"""
+Streaming export helpers for conversation logs.
+
+Rows are encoded and flushed in small buffers so an export never holds
+more than one batch of messages in memory, whatever the total size.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Flush encoded output once the buffer grows past this many characters
+FLUSH_THRESHOLD = 64 * 1024
+
+
+def _csv_value(value: Any) -> Any:
+    """Flatten JSON columns and datetimes into plain CSV cells"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], fields: List[str], fmt: str) -> Iterator[bytes]:
+    """Encode dict rows as NDJSON lines or CSV records, yielding buffered UTF-8 chunks"""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+    for row in rows:
+        if writer is not None:
+            writer.writerow([_csv_value(row.get(field)) for field in fields])
+        else:
+            buffer.write(json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False, default=str))
+            buffer.write("\n")
+
+        if buffer.tell() >= FLUSH_THRESHOLD:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally (wbits=31 writes the gzip header/trailer)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    rows: Iterable[Dict[str, Any]],
+    fields: List[str],
+    fmt: str = "ndjson",
+    compress: bool = False,
+    filename_prefix: str = "manny_logs",
+) -> StreamingResponse:
+    """Wrap a row iterator in a StreamingResponse download"""
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format '{fmt}'. Available formats: {list(EXPORT_MEDIA_TYPES)}"
+        )
+
+    body = encode_rows(rows, fields, fmt)
+    filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    media_type = EXPORT_MEDIA_TYPES[fmt]
+    if compress:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Cache-Control": "no-store"
+        }
+    )
@@ -0,0 +1,309 @@
+"""
+Server-side speech-to-text with Vosk.
+
+One vosk.Model is loaded per process and shared by a pool of KaldiRecognizer
+instances. Each streaming session checks a recognizer out for its lifetime and
+keeps its own counters and transcript, so concurrent users never share state.
+Vosk's endpointer marks the end of an utterance after trailing silence; the
+session finishes there instead of waiting for a fixed recording length.
+
+Uploaded clips are decoded in a process pool instead (TranscriptionPool): each
+worker loads the model once, and the number of clips running or waiting is
+bounded so a burst of uploads is refused rather than queued without limit.
+"""
+import importlib.util
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+BYTES_PER_SAMPLE = 2  # 16-bit little-endian mono PCM
+
+
+class STTUnavailable(RuntimeError):
+    """Vosk is not installed or the model folder is missing"""
+
+
+class STTBusy(RuntimeError):
+    """Every recognizer in the pool is in use"""
+
+
+def check_available(model_path: str):
+    """Raise STTUnavailable unless vosk is importable and the model folder exists"""
+    if importlib.util.find_spec("vosk") is None:
+        raise STTUnavailable("vosk is not installed")
+    if not os.path.isdir(model_path):
+        raise STTUnavailable(f"Vosk model folder not found at {model_path}")
+
+
+class RecognizerPool:
+    """Recognizers created lazily (up to `size`) on one shared model, reset before reuse"""
+
+    def __init__(self, model_path: str = settings.VOSK_MODEL_PATH, size: int = settings.STT_POOL_SIZE,
+                 sample_rate: int = settings.STT_SAMPLE_RATE):
+        self.model_path = model_path
+        self.size = size
+        self.sample_rate = sample_rate
+        self._model = None
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        check_available(self.model_path)
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        return vosk.Model(self.model_path)
+
+    def _new_recognizer(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._load_model()
+        # Safe now: _load_model raised STTUnavailable if vosk is missing
+        import vosk
+
+        recognizer = vosk.KaldiRecognizer(self._model, self.sample_rate)
+        recognizer.SetWords(False)
+        return recognizer
+
+    def acquire(self, timeout: float = settings.STT_ACQUIRE_TIMEOUT):
+        """An idle recognizer, a new one while under `size`, else wait up to `timeout`"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._new_recognizer()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise STTBusy(f"All {self.size} recognizers are busy")
+
+    def release(self, recognizer):
+        recognizer.Reset()
+        self._idle.put(recognizer)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize(),
+                "model_loaded": self._model is not None}
+
+
+class STTSession:
+    """
+    One streaming utterance. feed() takes PCM chunks and returns a partial or final
+    event; the session is done after the first non-empty final result (endpoint),
+    after max_seconds of audio, or on finish().
+    """
+
+    def __init__(self, pool: RecognizerPool, max_seconds: float = settings.STT_MAX_UTTERANCE_SECONDS):
+        self.pool = pool
+        self.max_seconds = max_seconds
+        self.recognizer = pool.acquire()
+        self.audio_bytes = 0
+        self.decode_seconds = 0.0
+        self.started = time.perf_counter()
+        self.done = False
+        self._last_partial = ""
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.audio_bytes / (BYTES_PER_SAMPLE * self.pool.sample_rate)
+
+    def _final(self, result_json: str) -> Dict[str, Any]:
+        self.done = True
+        text = json.loads(result_json).get("text", "")
+        return {
+            "type": "final",
+            "text": text,
+            "audio_seconds": round(self.audio_seconds, 3),
+            "decode_seconds": round(self.decode_seconds, 3),
+            "real_time_factor": round(self.decode_seconds / self.audio_seconds, 3) if self.audio_bytes else None,
+        }
+
+    def feed(self, pcm: bytes) -> Optional[Dict[str, Any]]:
+        """Event for this chunk: final (endpoint reached), partial (text changed), or None"""
+        if self.done or not pcm:
+            return None
+        self.audio_bytes += len(pcm)
+        started = time.perf_counter()
+        endpoint = self.recognizer.AcceptWaveform(pcm)
+        if endpoint:
+            result = self.recognizer.Result()
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        self.decode_seconds += time.perf_counter() - started
+
+        if endpoint and json.loads(result).get("text"):
+            return self._final(result)
+        # Also bounds a client that streams nothing but silence
+        if self.audio_seconds >= self.max_seconds:
+            return self.finish()
+        if endpoint:
+            # Silence before the user started speaking: keep listening
+            return None
+        if partial != self._last_partial:
+            self._last_partial = partial
+            return {"type": "partial", "text": partial}
+        return None
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush whatever is buffered (client ended the stream)"""
+        started = time.perf_counter()
+        result = self.recognizer.FinalResult()
+        self.decode_seconds += time.perf_counter() - started
+        return self._final(result)
+
+    def close(self):
+        if self.recognizer is not None:
+            self.pool.release(self.recognizer)
+            self.recognizer = None
+
+
+_pool: Optional[RecognizerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_recognizer_pool() -> RecognizerPool:
+    """Process-wide pool; the model loads with the first recognizer"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RecognizerPool()
+        return _pool
+
+
+# --- Uploaded clips: process pool ---
+
+CHUNK_BYTES = 8000  # 0.25 s of 16 kHz audio per AcceptWaveform call
+
+_worker_recognizer = None
+
+
+def _init_worker(model_path: str, sample_rate: int):
+    """Runs once per worker process: load the model and one reusable recognizer"""
+    global _worker_recognizer
+    import vosk
+
+    vosk.SetLogLevel(-1)
+    _worker_recognizer = vosk.KaldiRecognizer(vosk.Model(model_path), sample_rate)
+    _worker_recognizer.SetWords(False)
+
+
+def _transcribe_clip(data: bytes, sample_rate: int, vad: bool, submitted: float) -> Dict[str, Any]:
+    """Worker job: WAV bytes -> transcript and timings"""
+    from app.services import audio_prep
+
+    started = time.time()
+    samples, rate = audio_prep.read_wav(data)
+    audio_seconds = len(samples) / rate if rate else 0.0
+    samples = audio_prep.resample(samples, rate, sample_rate)
+    if vad:
+        samples, speech_start, speech_end = audio_prep.trim_silence(samples, sample_rate)
+    else:
+        speech_start, speech_end = 0.0, len(samples) / sample_rate
+    pcm = audio_prep.to_pcm16(samples)
+    prepared = time.time()
+
+    recognizer = _worker_recognizer
+    texts = []
+    try:
+        for offset in range(0, len(pcm), CHUNK_BYTES):
+            if recognizer.AcceptWaveform(pcm[offset:offset + CHUNK_BYTES]):
+                texts.append(json.loads(recognizer.Result()).get("text", ""))
+        texts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+    finally:
+        recognizer.Reset()
+    finished = time.time()
+
+    prep_seconds = prepared - started
+    decode_seconds = finished - prepared
+    return {
+        "text": " ".join(t for t in texts if t),
+        "audio_seconds": round(audio_seconds, 3),
+        "speech_seconds": round(speech_end - speech_start, 3),
+        "trimmed_seconds": round(audio_seconds - (speech_end - speech_start), 3),
+        "queue_seconds": round(max(0.0, started - submitted), 3),
+        "prep_seconds": round(prep_seconds, 3),
+        "decode_seconds": round(decode_seconds, 3),
+        # Processing time per second of uploaded audio (below 1 = faster than real time)
+        "real_time_factor": round((prep_seconds + decode_seconds) / audio_seconds, 3) if audio_seconds else None,
+    }
+
+
+class TranscriptionPool:
+    """
+    ProcessPoolExecutor of `workers` decoders. At most workers + max_queued clips are
+    accepted at once; submit() raises STTBusy beyond that.
+    """
+
+    def __init__(self, model_path: str = settings.VOSK_MODEL_PATH, workers: int = settings.STT_WORKERS,
+                 max_queued: int = settings.STT_MAX_QUEUED, sample_rate: int = settings.STT_SAMPLE_RATE):
+        self.model_path = model_path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.sample_rate = sample_rate
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            check_available(self.model_path)
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.model_path, self.sample_rate))
+        return self._executor
+
+    def submit(self, data: bytes, vad: bool = True) -> Future:
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.workers + self.max_queued:
+                raise STTBusy(f"{self._pending} clips already running or queued")
+            self._pending += 1
+        try:
+            future = executor.submit(_transcribe_clip, data, self.sample_rate, vad, time.time())
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "max_queued": self.max_queued, "pending": self._pending,
+                "started": self._executor is not None}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_transcription_pool: Optional[TranscriptionPool] = None
+
+
+def get_transcription_pool() -> TranscriptionPool:
+    """Process-wide pool; worker processes start with the first upload"""
+    global _transcription_pool
+    with _pool_lock:
+        if _transcription_pool is None:
+            _transcription_pool = TranscriptionPool()
+        return _transcription_pool
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from models import Message
 from schemas import MessageResponse
-from typing import List
+from typing import List, Iterator, Optional
+from datetime import datetime
 
 def create_message(db: Session, student_id: str, role: str, content: str) -> Message:
     """Create a new message in the database"""
@@ -22,3 +23,22 @@ def get_messages(db: Session, skip: int = 0, limit: int = 100) -> List[Message]:
 def get_messages_by_student(db: Session, student_id: str) -> List[Message]:
     """Get all messages for a specific student"""
     return db.query(Message).filter(Message.student_id == student_id).all()
+
+
+def iter_messages(
+    db: Session,
+    student_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 500
+) -> Iterator[Message]:
+    """Stream messages in id order, fetching batch_size rows at a time"""
+    query = db.query(Message)
+    if student_id:
+        query = query.filter(Message.student_id == student_id)
+    if start:
+        query = query.filter(Message.timestamp >= start)
+    if end:
+        query = query.filter(Message.timestamp < end)
+    # stream_results asks the driver for a server-side cursor where supported
+    return query.order_by(Message.id).execution_options(stream_results=True).yield_per(batch_size)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import httpx
@@ -7,10 +7,12 @@ from datetime import datetime
 from dotenv import load_dotenv
 from typing import Optional, List
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal
 from models import Base, Message
 from schemas import ChatMessage, ChatResponse, ResourceResponse, MessageResponse, StudentChatHistory
-from crud import create_message, get_messages, get_messages_by_student
+from crud import create_message, get_messages, get_messages_by_student, iter_messages
+from app.services.log_export import export_response
+from resources import ResourceCache, ResourceNotFound, StubResourceProvider
 
 # Load environment variables
 load_dotenv()
@@ -37,6 +39,9 @@ app.add_middleware(
 
 AI_API_URL = os.getenv("AI_API_URL", "http://localhost:8001")
 
+# Cached campus resources; swap the stub for an SLCM-backed provider
+resource_cache = ResourceCache(StubResourceProvider())
+
 @app.get("/", tags=["Health"])
 async def root():
     """Health check endpoint"""
@@ -155,111 +160,29 @@ async def get_student_chat_history(
     )
 
 @app.get("/resources/{resource_type}", response_model=ResourceResponse, tags=["Resources"])
-async def get_resources(resource_type: str):
+async def get_resources(resource_type: str, request: Request):
     """
     Get campus resources (timetable, syllabus, notices).
     
     Frontend can call this to get structured campus data.
-    Currently returns dummy data - replace with real SLCM integration.
+    Responses are cached per resource type and carry a strong ETag;
+    send it back in If-None-Match to get a 304 when nothing changed.
+    Currently backed by the stub provider - replace with real SLCM integration.
     """
-    dummy_data = {
-        "timetable": {
-            "type": "timetable",
-            "data": {
-                "Monday": [
-                    {"time": "9:00 AM", "subject": "Mathematics", "room": "A101", "faculty": "Dr. Smith"},
-                    {"time": "11:00 AM", "subject": "Physics", "room": "B205", "faculty": "Prof. Johnson"},
-                    {"time": "2:00 PM", "subject": "Chemistry", "room": "C301", "faculty": "Dr. Brown"}
-                ],
-                "Tuesday": [
-                    {"time": "10:00 AM", "subject": "English", "room": "A102", "faculty": "Ms. Davis"},
-                    {"time": "1:00 PM", "subject": "Computer Science", "room": "D401", "faculty": "Dr. Wilson"}
-                ],
-                "Wednesday": [
-                    {"time": "9:00 AM", "subject": "Mathematics", "room": "A101", "faculty": "Dr. Smith"},
-                    {"time": "3:00 PM", "subject": "Lab Session", "room": "L501", "faculty": "Lab Assistant"}
-                ]
-            }
-        },
-        "syllabus": {
-            "type": "syllabus",
-            "data": {
-                "subjects": [
-                    {
-                        "name": "Mathematics",
-                        "code": "MATH101",
-                        "topics": ["Calculus", "Linear Algebra", "Statistics"],
-                        "credits": 4,
-                        "books": ["Advanced Mathematics by XYZ"]
-                    },
-                    {
-                        "name": "Physics", 
-                        "code": "PHY101",
-                        "topics": ["Mechanics", "Thermodynamics", "Optics"],
-                        "credits": 4,
-                        "books": ["Fundamentals of Physics by ABC"]
-                    },
-                    {
-                        "name": "Computer Science",
-                        "code": "CS101", 
-                        "topics": ["Data Structures", "Algorithms", "Database Systems"],
-                        "credits": 3,
-                        "books": ["Introduction to Algorithms by DEF"]
-                    }
-                ]
-            }
-        },
-        "notices": {
-            "type": "notices",
-            "data": [
-                {
-                    "id": 1,
-                    "title": "Mid-term Exams",
-                    "date": "2025-09-15",
-                    "content": "Mid-term examinations will start from September 15th. Please check your exam schedule.",
-                    "priority": "high",
-                    "category": "academic"
-                },
-                {
-                    "id": 2,
-                    "title": "Library Hours Extended",
-                    "date": "2025-09-10",
-                    "content": "Library will remain open until 10 PM during exam period.",
-                    "priority": "medium",
-                    "category": "facility"
-                },
-                {
-                    "id": 3,
-                    "title": "Cultural Fest",
-                    "date": "2025-09-20",
-                    "content": "Annual cultural festival will be held on September 20th. Registration open!",
-                    "priority": "low",
-                    "category": "event"
-                }
-            ]
-        },
-        "attendance": {
-            "type": "attendance",
-            "data": {
-                "overall_percentage": 85.5,
-                "subjects": [
-                    {"name": "Mathematics", "attended": 42, "total": 48, "percentage": 87.5},
-                    {"name": "Physics", "attended": 38, "total": 45, "percentage": 84.4},
-                    {"name": "Computer Science", "attended": 40, "total": 46, "percentage": 87.0}
-                ],
-                "last_updated": "2025-09-04"
-            }
-        }
-    }
-    
-    if resource_type not in dummy_data:
-        available_types = list(dummy_data.keys())
+    try:
+        entry = await resource_cache.get(resource_type)
+    except ResourceNotFound:
+        available_types = list(resource_cache.resource_types.keys())
         raise HTTPException(
             status_code=404, 
             detail=f"Resource type '{resource_type}' not found. Available types: {available_types}"
         )
     
-    return ResourceResponse(**dummy_data[resource_type])
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 @app.get("/resources", tags=["Resources"])
 async def list_available_resources():
@@ -269,10 +192,8 @@ async def list_available_resources():
     """
     return {
         "available_resources": [
-            {"type": "timetable", "description": "Class schedule and timing"},
-            {"type": "syllabus", "description": "Course syllabus and curriculum"},
-            {"type": "notices", "description": "Official announcements and notices"},
-            {"type": "attendance", "description": "Student attendance records"}
+            {"type": resource_type, "description": description}
+            for resource_type, description in resource_cache.resource_types.items()
         ]
     }
 
@@ -305,6 +226,38 @@ async def get_chat_logs(
         "filtered_by": student_id if student_id else "all_students"
     }
 
+LOG_EXPORT_FIELDS = ["id", "student_id", "role", "content", "timestamp"]
+
+@app.get("/admin/logs/export", tags=["Admin"])
+async def export_chat_logs(
+    format: str = Query("ndjson", description="Export format: ndjson or csv"),
+    gzip: bool = Query(False, description="Gzip-compress the export"),
+    student_id: Optional[str] = Query(None, description="Filter by specific student"),
+    start: Optional[datetime] = Query(None, description="Only messages at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only messages before this time")
+):
+    """
+    Stream conversation logs as NDJSON or CSV.
+    Rows are read in batches and written straight to the response,
+    so memory use stays flat no matter how large the export is.
+    """
+    def rows():
+        # The stream outlives the request handler, so it owns its own session
+        db = SessionLocal()
+        try:
+            for msg in iter_messages(db, student_id=student_id, start=start, end=end):
+                yield {
+                    "id": msg.id,
+                    "student_id": msg.student_id,
+                    "role": msg.role,
+                    "content": msg.content,
+                    "timestamp": msg.timestamp.isoformat() if msg.timestamp else None
+                }
+        finally:
+            db.close()
+
+    return export_response(rows(), LOG_EXPORT_FIELDS, fmt=format, compress=gzip)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,263 @@
+"""
+Campus resource providers and the response cache in front of them.
+
+Providers fetch raw payloads (SLCM, or the stub below for development).
+ResourceCache keeps one pre-serialized response per resource type with a
+strong ETag, serves it until its TTL expires, and afterwards keeps serving
+the stale copy while a single background task refreshes it.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from schemas import ResourceResponse
+
+# Seconds a resource stays fresh before a background refresh is triggered
+DEFAULT_RESOURCE_TTLS = {
+    "timetable": 3600,
+    "syllabus": 86400,
+    "notices": 300,
+    "attendance": 900,
+}
+DEFAULT_TTL = float(os.getenv("RESOURCE_CACHE_TTL", "600"))
+# How long past its TTL a stale copy may still be served while refreshing
+STALE_WHILE_REVALIDATE = float(os.getenv("RESOURCE_CACHE_STALE", "3600"))
+
+
+class ResourceNotFound(KeyError):
+    """Raised by providers for resource types they do not serve"""
+
+
+class ResourceProvider:
+    """Base class for upstream sources of campus resources"""
+
+    # resource type -> human readable description
+    resource_types: Dict[str, str] = {}
+
+    async def fetch(self, resource_type: str) -> Dict[str, Any]:
+        """Return the raw payload ({"type": ..., "data": ...}) for a resource type"""
+        raise NotImplementedError
+
+
+class StubResourceProvider(ResourceProvider):
+    """Local provider returning fixed campus data, for development and tests"""
+
+    resource_types = {
+        "timetable": "Class schedule and timing",
+        "syllabus": "Course syllabus and curriculum",
+        "notices": "Official announcements and notices",
+        "attendance": "Student attendance records",
+    }
+
+    def __init__(self, latency: float = 0.0, data: Optional[Dict[str, Dict[str, Any]]] = None):
+        # latency simulates a slow upstream so cache behaviour can be observed
+        self.latency = latency
+        self.data = data if data is not None else STUB_RESOURCE_DATA
+        self.fetch_count = 0
+
+    async def fetch(self, resource_type: str) -> Dict[str, Any]:
+        if resource_type not in self.data:
+            raise ResourceNotFound(resource_type)
+        self.fetch_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.data[resource_type]
+
+
+@dataclass
+class CachedResource:
+    """A serialized resource body and its validators"""
+    body: bytes
+    etag: str
+    fetched_at: float
+    expires_at: float
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Evaluate an If-None-Match header against this entry's ETag"""
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in candidates:
+            return True
+        # If-None-Match uses weak comparison, so ignore any W/ prefix
+        return any(tag.removeprefix("W/") == self.etag for tag in candidates)
+
+
+def serialize_resource(payload: Dict[str, Any]) -> CachedResource:
+    """Validate a payload and pre-serialize it with a strong ETag"""
+    body = json.dumps(
+        ResourceResponse(**payload).model_dump(mode="json"),
+        separators=(",", ":"),
+        ensure_ascii=False
+    ).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    now = time.monotonic()
+    return CachedResource(body=body, etag=etag, fetched_at=now, expires_at=now)
+
+
+class ResourceCache:
+    """Per-type TTL cache with stale-while-revalidate background refresh"""
+
+    def __init__(
+        self,
+        provider: ResourceProvider,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        stale_while_revalidate: float = STALE_WHILE_REVALIDATE
+    ):
+        self.provider = provider
+        self.ttls = {**DEFAULT_RESOURCE_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries: Dict[str, CachedResource] = {}
+        # One in-flight upstream fetch per resource type
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def resource_types(self) -> Dict[str, str]:
+        return self.provider.resource_types
+
+    def ttl_for(self, resource_type: str) -> float:
+        return self.ttls.get(resource_type, self.default_ttl)
+
+    async def _load(self, resource_type: str) -> CachedResource:
+        payload = await self.provider.fetch(resource_type)
+        entry = serialize_resource(payload)
+        entry.expires_at = entry.fetched_at + self.ttl_for(resource_type)
+        self._entries[resource_type] = entry
+        return entry
+
+    def _refresh(self, resource_type: str) -> asyncio.Task:
+        """Start (or join) the single upstream fetch for a resource type"""
+        task = self._inflight.get(resource_type)
+        if task is None:
+            task = asyncio.create_task(self._load(resource_type))
+            self._inflight[resource_type] = task
+            task.add_done_callback(lambda _: self._inflight.pop(resource_type, None))
+        return task
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Resource refresh failed: {task.exception()}")
+
+    async def get(self, resource_type: str) -> CachedResource:
+        """
+        Return the cached resource, fetching it on a miss.
+        Stale entries are served immediately while a refresh runs in the background.
+        Raises ResourceNotFound for unknown resource types.
+        """
+        entry = self._entries.get(resource_type)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.expires_at:
+                return entry
+            if now < entry.expires_at + self.stale_while_revalidate:
+                if resource_type not in self._inflight:
+                    self._refresh(resource_type).add_done_callback(self._log_refresh_error)
+                return entry
+
+        # Miss, or too stale to serve: wait for the shared fetch
+        return await asyncio.shield(self._refresh(resource_type))
+
+    def invalidate(self, resource_type: Optional[str] = None) -> None:
+        """Drop one cached resource, or all of them"""
+        if resource_type is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(resource_type, None)
+
+
+STUB_RESOURCE_DATA: Dict[str, Dict[str, Any]] = {
+    "timetable": {
+        "type": "timetable",
+        "data": {
+            "Monday": [
+                {"time": "9:00 AM", "subject": "Mathematics", "room": "A101", "faculty": "Dr. Smith"},
+                {"time": "11:00 AM", "subject": "Physics", "room": "B205", "faculty": "Prof. Johnson"},
+                {"time": "2:00 PM", "subject": "Chemistry", "room": "C301", "faculty": "Dr. Brown"}
+            ],
+            "Tuesday": [
+                {"time": "10:00 AM", "subject": "English", "room": "A102", "faculty": "Ms. Davis"},
+                {"time": "1:00 PM", "subject": "Computer Science", "room": "D401", "faculty": "Dr. Wilson"}
+            ],
+            "Wednesday": [
+                {"time": "9:00 AM", "subject": "Mathematics", "room": "A101", "faculty": "Dr. Smith"},
+                {"time": "3:00 PM", "subject": "Lab Session", "room": "L501", "faculty": "Lab Assistant"}
+            ]
+        }
+    },
+    "syllabus": {
+        "type": "syllabus",
+        "data": {
+            "subjects": [
+                {
+                    "name": "Mathematics",
+                    "code": "MATH101",
+                    "topics": ["Calculus", "Linear Algebra", "Statistics"],
+                    "credits": 4,
+                    "books": ["Advanced Mathematics by XYZ"]
+                },
+                {
+                    "name": "Physics",
+                    "code": "PHY101",
+                    "topics": ["Mechanics", "Thermodynamics", "Optics"],
+                    "credits": 4,
+                    "books": ["Fundamentals of Physics by ABC"]
+                },
+                {
+                    "name": "Computer Science",
+                    "code": "CS101",
+                    "topics": ["Data Structures", "Algorithms", "Database Systems"],
+                    "credits": 3,
+                    "books": ["Introduction to Algorithms by DEF"]
+                }
+            ]
+        }
+    },
+    "notices": {
+        "type": "notices",
+        "data": [
+            {
+                "id": 1,
+                "title": "Mid-term Exams",
+                "date": "2025-09-15",
+                "content": "Mid-term examinations will start from September 15th. Please check your exam schedule.",
+                "priority": "high",
+                "category": "academic"
+            },
+            {
+                "id": 2,
+                "title": "Library Hours Extended",
+                "date": "2025-09-10",
+                "content": "Library will remain open until 10 PM during exam period.",
+                "priority": "medium",
+                "category": "facility"
+            },
+            {
+                "id": 3,
+                "title": "Cultural Fest",
+                "date": "2025-09-20",
+                "content": "Annual cultural festival will be held on September 20th. Registration open!",
+                "priority": "low",
+                "category": "event"
+            }
+        ]
+    },
+    "attendance": {
+        "type": "attendance",
+        "data": {
+            "overall_percentage": 85.5,
+            "subjects": [
+                {"name": "Mathematics", "attended": 42, "total": 48, "percentage": 87.5},
+                {"name": "Physics", "attended": 38, "total": 45, "percentage": 84.4},
+                {"name": "Computer Science", "attended": 40, "total": 46, "percentage": 87.0}
+            ],
+            "last_updated": "2025-09-04"
+        }
+    }
+}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
 class ChatMessage(BaseModel):
@@ -14,7 +14,7 @@ class ChatResponse(BaseModel):
 
 class ResourceResponse(BaseModel):
     type: str
-    data: Dict[str, Any]
+    data: Union[Dict[str, Any], List[Any]]  # notices are a list
 
 class MessageResponse(BaseModel):
     id: int
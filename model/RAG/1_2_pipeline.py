@@ -8,9 +8,12 @@ sys.path.append(os.path.dirname(__file__))
 
 from agent1_preprocess import InputPreprocessorAgent
 from agent2_safety import SafetyFilterAgent
-from RAG1 import rag_query, rg_generate
+from RAG1 import context, rag_query, rg_generate_stream
 
 def main():
+    # Build retriever, LLM client and DB before asking for input
+    context.warmup()
+
     # Initialize agents
     input_agent = InputPreprocessorAgent()
     safety_agent = SafetyFilterAgent()
@@ -58,22 +61,27 @@ def main():
         print("No relevant context found in PDFs.")
         return
 
-    # Response Generation
-    response_text, sources = rg_generate(
-        user_id=processed_input["user_id"],
-        thread_id=processed_input["thread_id"],
-        preprocessed_json=safety_result,
-        rag_output=rag_output,
-        history_turns=5
-    )
-
     # Print concise output for live testing
     print("\n--- RAG Input (for inspection) ---")
     print(f"Query: {processed_input['query_en']}")
     print(f"Context (first 300 chars): {rag_output['context'][0][:300]}")
     print(f"Metadata: {rag_output['metadata']}")
+
+    # Response Generation, printed as it streams in
     print("\n--- FINAL ANSWER ---")
-    print(response_text)
+    for event in rg_generate_stream(
+        user_id=processed_input["user_id"],
+        thread_id=processed_input["thread_id"],
+        preprocessed_json=safety_result,
+        rag_output=rag_output,
+        history_turns=5
+    ):
+        if event["event"] == "token":
+            print(event["text"], end="", flush=True)
+        elif event["event"] == "done":
+            response_text, sources, response_meta = event["response"], event["sources"], event["metadata"]
+    print(f"\n\nPrompt tokens: {response_meta['prompt_tokens']}")
+    print(f"⏱️ First token: {response_meta['first_token_ms']} ms, last token: {response_meta['last_token_ms']} ms")
 
     # Optional: Save log for debugging
     log_path = Path("live_test_log.json")
@@ -83,7 +91,8 @@ def main():
             "safety_result": safety_result,
             "rag_output": rag_output,
             "final_answer": response_text,
-            "sources": sources
+            "sources": sources,
+            "response_metadata": response_meta
         }, f, ensure_ascii=False, indent=4)
         print(f"\n✅ Log saved to {log_path}")
 
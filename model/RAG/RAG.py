@@ -1,92 +1,72 @@
 import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import OllamaEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from pipeline_context import PipelineContext, RETRIEVE_K
+from ingest import MANIFEST_NAME
 
 # ==========================
-# Load API Keys
+# Core Components
 # ==========================
-load_dotenv("api.env")
-
-langsmith_key = os.getenv("LANGSMITH_API_KEY")
-if not langsmith_key:
-    raise ValueError("LANGSMITH_API_KEY not found in environment or api.env!")
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGSMITH_API_KEY"] = langsmith_key
-
-google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
-    raise ValueError("GOOGLE_API_KEY not found in environment or api.env!")
-os.environ["GOOGLE_API_KEY"] = google_api_key
-
-# ==========================
-# Initialize Core Components
-# ==========================
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
-embeddings = OllamaEmbeddings(model="nomic-embed-text")
-persist_directory = r"C:\Users\ishan\Automation\SIH25\RAG\chroma_db"
-
-
-vector_store = Chroma(
-    collection_name="college_pdfsn",
-    embedding_function=embeddings,
-    persist_directory="persist_directory"
-)
-
-retriever = vector_store.as_retriever(search_kwargs={"k": 5})
-
-# ==========================
-# PDF Loading & Chunking
-# ==========================
-pdf_folder = r"C:\Users\ishan\Automation\SIH25\RAG\pdfs"
-all_docs = []
-
-for file in os.listdir(pdf_folder):
-    if file.endswith(".pdf"):
-        pdf_path = os.path.join(pdf_folder, file)
-        print(f"📄 Loading: {file}")
-        loader = PyPDFLoader(pdf_path)
-        docs = loader.load()
-        all_docs.extend(docs)
-
-print(f"\n✅ Total documents loaded: {len(all_docs)}")
-if all_docs:
-    print("Example:", all_docs[0].page_content[:500])
-
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=800,
-    chunk_overlap=100
-)
-
-splits = text_splitter.split_documents(all_docs)
-print(f"✅ Total chunks created: {len(splits)}")
-if splits:
-    print("Example chunk:\n", splits[0].page_content[:500])
+# Built lazily by the shared PipelineContext: importing this module does no I/O,
+# and only ingestion (run this file) opens the store and the embedding client.
+# Paths come from CHROMA_PERSIST_DIR / PDF_FOLDER (default: chroma_db/ and pdfs/ here).
+context = PipelineContext()
 
 # ==========================
 # RAG Query Function
 # ==========================
 
-def rag_query(query: str, retriever=retriever):
+def rag_query(query: str, retriever=None, k=RETRIEVE_K):
     """
     Takes a user query and returns:
     - retrieved document chunks
     - metadata
+    Results are cached per (normalized query, k, filters, index version); ingestion
+    bumps the index version, so a cached answer never outlives the data it came from.
     """
-    retrieved_docs = retriever.get_relevant_documents(query)
-    output = {
-        "query": query,
-        "context": [doc.page_content for doc in retrieved_docs],
-        "metadata": [doc.metadata for doc in retrieved_docs]
-    }
-    return output
-
-print("🔎 Retriever test:")
-docs = retriever.get_relevant_documents("software engineering")
-print("Docs returned:", len(docs))
-if docs:
-    print(docs[0].page_content[:500])
+    return context.rag_query(query, retriever=retriever, k=k)
 
+# ==========================
+# PDF Loading & Chunking
+# ==========================
+# Only new or changed pages are chunked and embedded; the manifest next to the
+# store records per-file and per-page hashes from previous runs. Pages stream
+# through parse -> dedup -> embed -> upsert (see ingest_pipeline.py, which is also
+# a standalone CLI). Parsing runs in a process pool (INGEST_WORKERS), so this must
+# stay behind the __main__ guard: worker processes re-import this module on Windows.
+
+def ingest_pdfs(context=context):
+    from ingest_pipeline import incremental_ingest
+    from numpy_index import NumpyVectorIndex, current_export_dir, default_index_dir as default_numpy_index_dir
+
+    ingest_stats = incremental_ingest(
+        context.pdf_folder,
+        context.vector_store,
+        manifest_path=os.path.join(context.persist_directory, MANIFEST_NAME),
+        chunk_size=800,
+        chunk_overlap=100,
+        lexical_index=context.lexical_index
+    )
+    print(f"\n✅ Pages re-chunked: {ingest_stats['pages_changed']}, "
+          f"chunks added: {ingest_stats['chunks_added']}, removed: {ingest_stats['chunks_deleted']}, "
+          f"parse speed: {ingest_stats['pages_per_sec']} pages/s, peak RSS: {ingest_stats['peak_rss_mb']} MB")
+    # Keep the NumPy export (RETRIEVER_BACKEND=numpy in RAG1.py) in step with the collection
+    numpy_dir = default_numpy_index_dir(context.persist_directory)
+    if ingest_stats["chunks_added"] or ingest_stats["chunks_deleted"] or ingest_stats["chunks_updated"] \
+            or current_export_dir(numpy_dir) is None:
+        numpy_index = NumpyVectorIndex.from_chroma(context.vector_store._collection, numpy_dir)
+        print(f"🧊 Exported {len(numpy_index)} vectors to {numpy_dir}")
+        context.retrieval_cache.index_version.bump()
+    if context.embeddings.metrics is not None:
+        # Ollama client throughput (not reported by the in-process hashing stand-in)
+        print(context.embeddings.metrics.report())
+    print(context.embeddings.report())
+    return ingest_stats
+
+
+if __name__ == "__main__":
+    ingest_pdfs()
+
+    print("🔎 Retriever test:")
+    docs = context.retriever.get_relevant_documents("software engineering")
+    print("Docs returned:", len(docs))
+    if docs:
+        print(docs[0].page_content[:500])
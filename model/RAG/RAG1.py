@@ -1,130 +1,79 @@
 # %%
 # %% 
 # Basic imports
-import os
-from dotenv import load_dotenv
-import sqlite3
-from pathlib import Path
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import OllamaEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import HumanMessage
-
-# ==========================
-# Load API Keys
-# ==========================
-load_dotenv("api.env")
-
-langsmith_key = os.getenv("LANGSMITH_API_KEY")
-if not langsmith_key:
-    raise ValueError("LANGSMITH_API_KEY not found in environment or api.env!")
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGSMITH_API_KEY"] = langsmith_key
-
-google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
-    raise ValueError("GOOGLE_API_KEY not found in environment or api.env!")
-os.environ["GOOGLE_API_KEY"] = google_api_key
+from context_packer import pack_context, truncate_to_tokens, PackedPrompt
+from llm_gateway import DEGRADED_ANSWER
+from streaming import StreamTimer, token_event
+from pipeline_context import LLM_MODEL, PipelineContext, RETRIEVE_K
+from response_cache import cache_skip_reason, chunk_ids
 
 
 # %%
 # %% 
-# Initialize LLM & embeddings
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
-embeddings = OllamaEmbeddings(model="nomic-embed-text")
-
-# Connect to existing Chroma DB (populated separately)
-persist_directory = r"C:\Users\ishan\Automation\SIH25\RAG\chroma_db"
-vector_store = Chroma(
-    collection_name="college_pdfsn",
-    embedding_function=embeddings,
-    persist_directory=persist_directory
-)
+# LLM, embeddings, Chroma, BM25 and the conversation DB are built on first use, so
+# importing this module is cheap and has no side effects. Call context.warmup() at
+# startup to pay for them before the first request.
+# Dense backend: RETRIEVER_BACKEND=chroma (default) or numpy (see numpy_index.py).
+context = PipelineContext()
 
-# Retriever for RAG
-retriever = vector_store.as_retriever(search_kwargs={"k": 5})
-
-
-# %%
-# %% 
-# SQLite DB file
-DB_FILE = Path("conversation_memory.db")
+_LAZY_GLOBALS = ("llm", "llm_gateway", "embeddings", "vector_store", "lexical_index", "retriever", "retrieval_cache",
+                 "response_cache", "persist_directory")
 
-# Initialize SQLite connection
-conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-cursor = conn.cursor()
+# Part of every response cache key: bump it whenever the rg_generate prompt changes
+PROMPT_TEMPLATE_VERSION = "rg-1"
 
-# Drop old table if exists and create a new one with thread_id
-cursor.execute("DROP TABLE IF EXISTS conversation_history")
 
-cursor.execute("""
-CREATE TABLE conversation_history (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id TEXT NOT NULL,
-    thread_id TEXT NOT NULL,
-    role TEXT NOT NULL,  -- 'user' or 'assistant'
-    text TEXT NOT NULL,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-)
-""")
-conn.commit()
+def __getattr__(name):
+    # Keeps `from RAG1 import llm, retriever` working without building anything at import
+    if name in _LAZY_GLOBALS:
+        return getattr(context, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # %%
 def get_conversation_history(user_id, thread_id, last_n=5):
-    cursor.execute("""
-        SELECT role, text FROM conversation_history
-        WHERE user_id = ? AND thread_id = ?
-        ORDER BY timestamp DESC
-        LIMIT ?
-    """, (user_id, thread_id, last_n))
-    rows = cursor.fetchall()
-    # Reverse to chronological order
-    return [{"role": r[0], "text": r[1]} for r in reversed(rows)]
+    # Chronological order, newest last_n messages
+    return context.conversation_store.history(user_id, thread_id, last_n)
 
 def save_turn(user_id, thread_id, role, text):
-    cursor.execute("""
-        INSERT INTO conversation_history (user_id, thread_id, role, text)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, thread_id, role, text))
-    conn.commit()
+    context.conversation_store.save_messages(user_id, thread_id, [(role, text)])
+
+def record_turn(user_id, thread_id, question, answer, degraded=False):
+    """Save the exchange (one transaction), then fold older turns into the thread's rolling summary in the background"""
+    if degraded:
+        # The templated "cannot answer right now" text is not a real answer: keep it out
+        # of the history and the rolling summary, record only the question
+        save_turn(user_id, thread_id, "user", question)
+        return
+    context.conversation_store.save_turn(user_id, thread_id, question, answer)
+    context.conversation_memory.schedule_update(user_id, thread_id)
 
 
 # %%
 # %% 
-def rag_query(query: str, retriever=retriever):
+def rag_query(query: str, retriever=None, k=RETRIEVE_K):
     """
     Takes a user query and returns:
     - retrieved document chunks
     - metadata
+    Uses context.retriever unless another retriever is passed; results are cached
+    until ingestion changes the collection.
     """
-    retrieved_docs = retriever.get_relevant_documents(query)
-    output = {
-        "query": query,
-        "context": [doc.page_content for doc in retrieved_docs],
-        "metadata": [doc.metadata for doc in retrieved_docs]
-    }
-    return output
+    return context.rag_query(query, retriever=retriever, k=k)
 
 
 # %%
 # %%
-def rg_generate(user_id, thread_id, preprocessed_json, rag_output, history_turns=5):
+def build_prompt(user_id, thread_id, preprocessed_json, rag_output, history_turns=5):
     """
-    Generate response based on RAG context, conversation history, and safety checks.
-    preprocessed_json: output from preprocessor + safety agent
+    Prompt for rg_generate and its streaming variants.
+    Returns (final_prompt, question, packed, sources).
     """
-    # 1️⃣ Retrieve conversation history
-    history = get_conversation_history(user_id, thread_id, last_n=history_turns)
-    history_text = ""
-    for turn in history:
-        history_text += f"{turn['role'].capitalize()}: {turn['text']}\n"
+    # 1️⃣ Retrieve conversation history: rolling summary + newest exchanges (at most history_turns)
+    summary, history = context.conversation_memory.prompt_history(user_id, thread_id, max_turns=history_turns)
 
     # 2️⃣ Extract context & user info
-    context_text = "\n".join(rag_output.get("context", []))
     question = preprocessed_json["query_en"]
     language = preprocessed_json.get("lang", "en")
 
@@ -135,6 +84,7 @@ def rg_generate(user_id, thread_id, preprocessed_json, rag_output, history_turns
     pii_flag = safety.get("pii", False)
 
     # 4️⃣ Construct dynamic prompt
+    packed = PackedPrompt()
     if not safe:
         if pii_flag:
             # PII case
@@ -153,7 +103,11 @@ Do NOT use the context for answering.
 Respond clearly stating that the request cannot be processed because of this reason.
 """
     else:
-        # Safe case → normal prompt
+        # Safe case → normal prompt, with the best chunks and newest turns that fit the budget
+        packed = pack_context(question, rag_output.get("context", []), rag_output.get("metadata"), history,
+                              summary=summary)
+        history_text = packed.history_text
+        context_text = packed.context_text
         final_prompt = f"""
 You are an academic assistant. Answer clearly and concisely.
 Use the context as your main source of knowledge and relate information from it whenever possible.
@@ -168,18 +122,171 @@ Question: {question}
 Answer in {language}:
 """
 
-    # 5️⃣ Invoke LLM                  
-    response = llm.invoke([HumanMessage(content=final_prompt)])
-    response_text = response.content
+    packed.finalize(final_prompt, question)
+
+    # Only the chunks that made it into the prompt
+    metadatas = rag_output.get("metadata", [])
+    sources = [metadatas[i].get("source", "N/A") for i in packed.chunks_used if i < len(metadatas)]
+    return final_prompt, question, packed, sources
+
+
+def degraded_answer(preprocessed_json, rag_output, packed):
+    """Templated answer used when the LLM misses its deadline (LLM_DEADLINE_S) or fails"""
+    def fallback(reason):
+        if not preprocessed_json.get("safety", {}).get("safe", True):
+            return "Sorry, this request cannot be processed."
+        chunks = rag_output.get("context", [])
+        metadatas = rag_output.get("metadata", [])
+        if not packed.chunks_used or packed.chunks_used[0] >= len(chunks):
+            return DEGRADED_ANSWER
+        best = packed.chunks_used[0]
+        source = metadatas[best].get("source", "the documents") if best < len(metadatas) else "the documents"
+        return (f"I could not generate a full answer right now. The most relevant passage I found "
+                f"({source}):\n\n{truncate_to_tokens(chunks[best], 120)}")
+    return fallback
+
+
+def cached_response(preprocessed_json, rag_output, question, packed):
+    """
+    Response cache lookup for a built prompt. Returns (key, hit, outcome): key is None when
+    the turn must not be cached, hit is None on a miss; outcome is "exact", "semantic",
+    "miss", "unsafe" or "personalized".
+    """
+    reason = cache_skip_reason(preprocessed_json, question, bool(packed.history_text))
+    if reason:
+        context.response_cache.skip()
+        return None, None, reason
+    ids = chunk_ids(rag_output.get("context", []), rag_output.get("metadata") or [], packed.chunks_used)
+    key = (question, ids, preprocessed_json.get("lang", "en"), PROMPT_TEMPLATE_VERSION,
+           getattr(context.llm, "model", None) or LLM_MODEL)
+    hit, tier = context.response_cache.get(*key)
+    return key, hit, tier or "miss"
+
+
+def cache_response(key, text, degraded):
+    # Degraded (templated) answers are never reused
+    if key is not None and not degraded:
+        context.response_cache.put(*key, text)
+
+
+def rg_generate(user_id, thread_id, preprocessed_json, rag_output, history_turns=5, return_metadata=False):
+    """
+    Generate response based on RAG context, conversation history, and safety checks.
+    preprocessed_json: output from preprocessor + safety agent
+    Context and history are packed into CONTEXT_TOKEN_BUDGET / HISTORY_TOKEN_BUDGET
+    (see context_packer.py); turns older than the newest SUMMARY_RECENT_TURNS exchanges
+    reach the prompt only through the thread's rolling summary (conversation_summary.py).
+    Repeated questions over the same chunks are answered from the response cache.
+    With return_metadata=True a third value is returned with the prompt tokens per
+    section, how many chunks were used or dropped, and the cache outcome.
+    """
+    final_prompt, question, packed, sources = build_prompt(
+        user_id, thread_id, preprocessed_json, rag_output, history_turns)
+
+    # 5️⃣ Cached answer, else invoke LLM (bounded by the gateway's deadline; degraded answer if it expires)
+    key, hit, cache = cached_response(preprocessed_json, rag_output, question, packed)
+    if hit is not None:
+        response_text, llm_metadata = hit.text, {"degraded": False}
+    else:
+        result = context.llm_gateway.invoke([HumanMessage(content=final_prompt)],
+                                            fallback=degraded_answer(preprocessed_json, rag_output, packed))
+        response_text, llm_metadata = result.text, result.metadata()
+        cache_response(key, response_text, result.degraded)
 
     # 6️⃣ Save conversation (even blocked queries)
-    save_turn(user_id, thread_id, "user", question)
-    save_turn(user_id, thread_id, "assistant", response_text)
+    record_turn(user_id, thread_id, question, response_text, llm_metadata["degraded"])
 
-    sources = [meta.get("source", "N/A") for meta in rag_output.get("metadata", [])]
+    if return_metadata:
+        return response_text, sources, {**packed.metadata(), **llm_metadata, "cache": cache}
     return response_text, sources
 
 
+async def arg_generate(user_id, thread_id, preprocessed_json, rag_output, history_turns=5, return_metadata=False):
+    """rg_generate for asyncio callers: awaits the LLM instead of blocking a worker thread"""
+    final_prompt, question, packed, sources = build_prompt(
+        user_id, thread_id, preprocessed_json, rag_output, history_turns)
 
+    key, hit, cache = cached_response(preprocessed_json, rag_output, question, packed)
+    if hit is not None:
+        response_text, llm_metadata = hit.text, {"degraded": False}
+    else:
+        result = await context.llm_gateway.ainvoke([HumanMessage(content=final_prompt)],
+                                                   fallback=degraded_answer(preprocessed_json, rag_output, packed))
+        response_text, llm_metadata = result.text, result.metadata()
+        cache_response(key, response_text, result.degraded)
+    record_turn(user_id, thread_id, question, response_text, llm_metadata["degraded"])
+
+    if return_metadata:
+        return response_text, sources, {**packed.metadata(), **llm_metadata, "cache": cache}
+    return response_text, sources
 
 
+# %%
+# %%
+# Streaming variants: same prompt, but tokens are yielded as the LLM produces them
+# (event dicts, see streaming.py). The turn is saved only once the stream completes;
+# a consumer that stops early (client gone) leaves no half-written answer in history.
+def _stream_done(user_id, thread_id, question, parts, sources, packed, timer, degraded, key, cache):
+    response_text = "".join(parts)
+    if cache == "miss":
+        cache_response(key, response_text, degraded)
+    record_turn(user_id, thread_id, question, response_text, degraded)
+    return {"event": "done", "response": response_text, "sources": sources,
+            "metadata": {**packed.metadata(), **timer.metadata(), "degraded": degraded, "cache": cache}}
+
+
+def _cached_tokens(hit):
+    # A cached answer streams as a single token
+    yield "token", hit.text
+
+
+async def _acached_tokens(hit):
+    yield "token", hit.text
+
+
+def rg_generate_stream(user_id, thread_id, preprocessed_json, rag_output, history_turns=5):
+    """Generator form of rg_generate: yields token, first_token, last_token and a final done event"""
+    final_prompt, question, packed, sources = build_prompt(
+        user_id, thread_id, preprocessed_json, rag_output, history_turns)
+
+    parts, timer, degraded = [], StreamTimer(), False
+    key, hit, cache = cached_response(preprocessed_json, rag_output, question, packed)
+    fallback = degraded_answer(preprocessed_json, rag_output, packed)
+    tokens = (_cached_tokens(hit) if hit is not None else
+              context.llm_gateway.stream([HumanMessage(content=final_prompt)], fallback=fallback))
+    for kind, text in tokens:
+        if not text:
+            continue
+        # "degraded": no first token before the deadline; the templated answer arrives as one token
+        degraded = degraded or kind == "degraded"
+        first = timer.tick()
+        if first:
+            yield first
+        parts.append(text)
+        yield token_event(text)
+    yield timer.finish()
+    yield _stream_done(user_id, thread_id, question, parts, sources, packed, timer, degraded, key, cache)
+
+
+async def arg_generate_stream(user_id, thread_id, preprocessed_json, rag_output, history_turns=5):
+    """Async-generator form of rg_generate_stream, for asyncio servers"""
+    final_prompt, question, packed, sources = build_prompt(
+        user_id, thread_id, preprocessed_json, rag_output, history_turns)
+
+    parts, timer, degraded = [], StreamTimer(), False
+    key, hit, cache = cached_response(preprocessed_json, rag_output, question, packed)
+    fallback = degraded_answer(preprocessed_json, rag_output, packed)
+    tokens = (_acached_tokens(hit) if hit is not None else
+              context.llm_gateway.astream([HumanMessage(content=final_prompt)], fallback=fallback))
+    async for kind, text in tokens:
+        if not text:
+            continue
+        # "degraded": no first token before the deadline; the templated answer arrives as one token
+        degraded = degraded or kind == "degraded"
+        first = timer.tick()
+        if first:
+            yield first
+        parts.append(text)
+        yield token_event(text)
+    yield timer.finish()
+    yield _stream_done(user_id, thread_id, question, parts, sources, packed, timer, degraded, key, cache)
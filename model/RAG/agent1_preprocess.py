@@ -1,7 +1,7 @@
 # Preprocessor Agent: language detection, translation, voice-to-text
 import json
-from langdetect import detect
-from deep_translator import GoogleTranslator  # more stable than googletrans
+from language_detect import detect_language, detect_languages  # script, Hinglish lexicon, then langdetect
+from translation_service import translation_service  # translation memory + batching, see translation_service.py
 from speech_text import VoskRecognizer  # your Vosk wrapper
 
 class InputPreprocessorAgent:   
@@ -13,6 +13,10 @@ class InputPreprocessorAgent:
 
         self.vosk = VoskRecognizer(model_path)
 
+    def _translate(self, query: str, lang: str) -> str:
+        # Falls back to the original query on timeout (TRANSLATE_TIMEOUT_S) or failure
+        return translation_service().translate(query, lang, 'en')
+
     def run(self, input_json: dict, use_voice: bool = False) -> dict:
         """
         use_voice: if True, record audio and convert to text
@@ -34,26 +38,13 @@ class InputPreprocessorAgent:
                 raise ValueError("Missing 'query' for typed input")
             query = input_json["query"]
 
-        # 3. Detect language
-        try:
-            lang = detect(query)
-        except:
-            lang = "en"
-
-        # 4. Hinglish fix
-        hinglish_words = ["hai", "kab", "nahi", "kya", "tum", "mera", "aap"]
-        if lang in ["da","tl", "en"] and any(word in query.lower() for word in hinglish_words):
-            lang = "hi"
-
-        # 5. Translate to English if not English
-        query_en = query
-        if lang != "en":
-            try:
-                query_en = GoogleTranslator(source=lang, target='en').translate(query)
-            except Exception as e:
-                print("Translation failed:", e)
-
-        # 6. Return normalized JSON
+        # 3. Detect language (Hinglish included; memoized, see language_detect.py)
+        lang = detect_language(query)
+
+        # 4. Translate to English if not English
+        query_en = self._translate(query, lang)
+
+        # 5. Return normalized JSON
         return {
             "thread_id": input_json["thread_id"],
             "user_id": input_json["user_id"],
@@ -61,3 +52,21 @@ class InputPreprocessorAgent:
             "query_en": query_en,
             "lang": lang
         }
+
+    def run_batch(self, input_jsons: list) -> list:
+        """run() for many typed queries; languages are detected and translated in one pass"""
+        for input_json in input_jsons:
+            for field in ("thread_id", "user_id", "query"):
+                if field not in input_json:
+                    raise ValueError(f"Missing required field: {field}")
+        queries = [input_json["query"] for input_json in input_jsons]
+        langs = detect_languages(queries)
+        # Submitted together, so untranslated queries share backend batches
+        queries_en = translation_service().translate_many(queries, langs, 'en')
+        return [{
+            "thread_id": input_json["thread_id"],
+            "user_id": input_json["user_id"],
+            "query": input_json["query"],
+            "query_en": query_en,
+            "lang": lang
+        } for input_json, lang, query_en in zip(input_jsons, langs, queries_en)]
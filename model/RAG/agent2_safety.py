@@ -1,5 +1,6 @@
 import re
 from detoxify import Detoxify
+from toxicity_batcher import ToxicityBatcher  # concurrent checks share one predict() call
 
 class SafetyFilterAgent:
     def __init__(self, toxicity_threshold=0.5):
@@ -11,6 +12,7 @@ class SafetyFilterAgent:
 
         # Load Detoxify on CPU
         self.detoxify = Detoxify('original', device=self.device)
+        self.batcher = ToxicityBatcher(self.detoxify)
 
     def contains_pii(self, text: str) -> bool:
         # Regex patterns
@@ -37,16 +39,34 @@ class SafetyFilterAgent:
 
         return False
 
+    def toxicity(self, query: str) -> float:
+        try:
+            return self.batcher.score(query)["toxicity"]
+        except Exception as e:
+            print(f"⚠️ Detoxify failed: {e}")
+            return 0.0
+
     def run(self, preprocessed_json: dict) -> dict:
         query = preprocessed_json["query_en"]
 
-        # 1. Toxicity check
+        # 1. Toxicity check (batched with any concurrent checks)
+        toxic_prob = self.toxicity(query)
+
+        return self._decide(preprocessed_json, toxic_prob)
+
+    def run_batch(self, preprocessed_jsons: list) -> list:
+        """run() for many queries; all are scored in shared Detoxify batches"""
+        queries = [preprocessed_json["query_en"] for preprocessed_json in preprocessed_jsons]
         try:
-            tox_scores = self.detoxify.predict(query)
-            toxic_prob = float(tox_scores.get("toxicity", 0))
+            toxic_probs = [scores["toxicity"] for scores in self.batcher.score_many(queries)]
         except Exception as e:
             print(f"⚠️ Detoxify failed: {e}")
-            toxic_prob = 0.0
+            toxic_probs = [0.0] * len(queries)
+        return [self._decide(preprocessed_json, toxic_prob)
+                for preprocessed_json, toxic_prob in zip(preprocessed_jsons, toxic_probs)]
+
+    def _decide(self, preprocessed_json: dict, toxic_prob: float) -> dict:
+        query = preprocessed_json["query_en"]
 
         # 2. PII check
         has_pii = self.contains_pii(query)
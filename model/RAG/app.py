@@ -2,11 +2,18 @@
 import streamlit as st
 from agent1_preprocess import InputPreprocessorAgent
 from agent2_safety import SafetyFilterAgent
-from RAG1 import rag_query, rg_generate
+from RAG1 import context, rag_query, rg_generate_stream
 
 st.set_page_config(page_title="RAG + RG Live Test", layout="wide")
 st.title("RAG + Response Generation System")
 
+# Warm the RAG components once per server process, not on the first query
+@st.cache_resource
+def warm_pipeline():
+    return context.warmup()
+
+warm_pipeline()
+
 # Initialize agents
 input_agent = InputPreprocessorAgent()
 safety_agent = SafetyFilterAgent()
@@ -53,20 +60,30 @@ if st.button("Submit") or (use_voice and user_query is not None):
         st.info("No relevant context found in PDFs.")
         st.stop()
 
-    # 4️⃣ Response Generation
-    response_text, sources = rg_generate(
-        user_id=processed_input["user_id"],
-        thread_id=processed_input["thread_id"],
-        preprocessed_json=safety_result,
-        rag_output=rag_output,
-        history_turns=5
-    )
-
-    # 5️⃣ Display results
+    # 4️⃣ Display retrieval
     with st.expander("RAG Input (for inspection)"):
         st.write(f"Query: {processed_input['query_en']}")
         st.write(f"Context (first 300 chars): {rag_output['context'][0][:300]}")
         st.write(f"Metadata: {rag_output['metadata']}")
 
+    # 5️⃣ Response Generation, rendered token by token
     st.success("Final Answer:")
-    st.write(response_text)
+    done = {}
+
+    def answer_tokens():
+        for event in rg_generate_stream(
+            user_id=processed_input["user_id"],
+            thread_id=processed_input["thread_id"],
+            preprocessed_json=safety_result,
+            rag_output=rag_output,
+            history_turns=5
+        ):
+            if event["event"] == "token":
+                yield event["text"]
+            elif event["event"] == "done":
+                done.update(event)
+
+    st.write_stream(answer_tokens())
+    if done:
+        st.caption(f"First token {done['metadata']['first_token_ms']} ms · "
+                   f"sources: {', '.join(done['sources']) or 'none'}")
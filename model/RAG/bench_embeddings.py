@@ -0,0 +1,69 @@
+# bench_embeddings.py
+# Sweeps batch size x concurrency for BatchedOllamaEmbeddings and reports chunks/s.
+# By default it runs against the local fake server; pass --url to benchmark a real Ollama.
+#
+#   python bench_embeddings.py --chunks 2000 --batch-sizes 8 16 32 64 --concurrency 1 2 4 8
+import argparse
+
+from embedding_client import BatchedOllamaEmbeddings
+from fake_embed_server import start_fake_embed_server
+
+
+def synthetic_chunks(n, length=800):
+    base = "The academic calendar lists registration, examination and holiday dates for the semester. "
+    return [(f"chunk {i}: " + base * (length // len(base) + 1))[:length] for i in range(n)]
+
+
+def run_benchmark(url, model, texts, batch_sizes, concurrencies, repeats=1):
+    results = []
+    for batch_size in batch_sizes:
+        for concurrency in concurrencies:
+            client = BatchedOllamaEmbeddings(model=model, base_url=url, batch_size=batch_size,
+                                             max_concurrency=concurrency)
+            for _ in range(repeats):
+                client.embed_documents(texts)
+            client.close()
+            m = client.metrics
+            results.append({"batch_size": batch_size, "concurrency": concurrency,
+                            "chunks_per_sec": m.chunks_per_sec, "retries": m.retries})
+            print(f"batch={batch_size:<4} concurrency={concurrency:<3} {m.chunks_per_sec:8.1f} chunks/s  "
+                  f"retries={m.retries}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding batch/concurrency benchmark")
+    parser.add_argument("--url", default=None, help="Embedding server URL (default: start the fake server)")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=1)
+    # Fake server behaviour
+    parser.add_argument("--server-parallel", type=int, default=4)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-item-latency", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_fake_embed_server(parallel=args.server_parallel, base_latency=args.base_latency,
+                                              per_item_latency=args.per_item_latency, error_rate=args.error_rate)
+        print(f"🧪 Using fake embedding server at {url}")
+
+    try:
+        results = run_benchmark(url, args.model, synthetic_chunks(args.chunks), args.batch_sizes,
+                                args.concurrency, args.repeats)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    best = max(results, key=lambda r: r["chunks_per_sec"])
+    print(f"\n🏆 Best: batch_size={best['batch_size']} concurrency={best['concurrency']} "
+          f"({best['chunks_per_sec']:.1f} chunks/s) -> set EMBED_BATCH_SIZE / EMBED_CONCURRENCY")
+
+
+if __name__ == "__main__":
+    main()
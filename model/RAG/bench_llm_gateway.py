@@ -0,0 +1,85 @@
+# bench_llm_gateway.py
+# End-to-end latency of LLMGateway policies (plain, deadline, hedged) against the
+# local fake LLM server, whose latency distribution and straggler tail are configurable.
+#
+#   python bench_llm_gateway.py --requests 200 --concurrency 8 --tail-prob 0.05 --tail-latency 4
+#   python bench_llm_gateway.py --hedge off p95 0.8 --deadline 3
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+
+from fake_llm_server import FakeLLMChatModel, start_fake_llm_server
+from llm_gateway import HEDGE_MIN_SAMPLES, LLMGateway
+
+
+async def run_load(gateway, requests, concurrency, deadline):
+    """Closed loop: `concurrency` clients each send requests back to back"""
+    latencies, degraded, hedge_wins = [], 0, 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal degraded, hedge_wins
+        for i in counter:
+            started = time.perf_counter()
+            result = await gateway.ainvoke([HumanMessage(content=f"Question: benchmark question {i}")],
+                                           deadline=deadline)
+            latencies.append(time.perf_counter() - started)
+            degraded += result.degraded
+            hedge_wins += result.winner == "hedge"
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies), degraded, hedge_wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM gateway latency benchmark against the fake LLM server")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--max-concurrency", type=int, default=16,
+                        help="Gateway semaphore size (hedges only go out while slots are free)")
+    parser.add_argument("--deadline", type=float, default=10.0)
+    parser.add_argument("--hedge", nargs="+", default=["off", "p95"], help="Hedge policies to compare")
+    # Fake server behaviour
+    parser.add_argument("--latency", default="lognormal")
+    parser.add_argument("--median-latency", type=float, default=0.3)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--tail-prob", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=0, help="0 = whole answer at once")
+    parser.add_argument("--server-parallel", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_llm_server(latency=args.latency, median_latency=args.median_latency, sigma=args.sigma,
+                                        tail_prob=args.tail_prob, tail_latency=args.tail_latency,
+                                        tokens_per_sec=args.tokens_per_sec, parallel=args.server_parallel,
+                                        error_rate=args.error_rate)
+    print(f"🧪 Fake LLM server at {url}: {args.latency} median {args.median_latency}s, "
+          f"{args.tail_prob:.0%} stragglers +{args.tail_latency}s")
+    print(f"{'hedge':<8}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'max (s)':>9}{'degraded':>10}"
+          f"{'hedged':>8}{'won':>6}{'server reqs':>13}")
+    try:
+        for hedge in args.hedge:
+            gateway = LLMGateway(FakeLLMChatModel(base_url=url), max_concurrency=args.max_concurrency,
+                                 deadline=args.deadline, hedge=hedge)
+            if hedge == "p95":
+                # Fill the latency window so the p95 delay is known before measuring
+                asyncio.run(run_load(gateway, HEDGE_MIN_SAMPLES * 2, args.concurrency, args.deadline))
+            before = server.config.requests
+            hedged_before = gateway.metrics.hedged
+            latencies, degraded, hedge_wins = asyncio.run(
+                run_load(gateway, args.requests, args.concurrency, args.deadline))
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"{hedge:<8}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{latencies.max():>9.2f}{degraded:>10}"
+                  f"{gateway.metrics.hedged - hedged_before:>8}{hedge_wins:>6}"
+                  f"{server.config.requests - before:>13}")
+            print(f"    {gateway.report()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
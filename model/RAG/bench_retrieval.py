@@ -0,0 +1,231 @@
+# bench_retrieval.py
+# Retrieval quality and latency for different chunking / k / retriever settings.
+# For every (chunk_size, chunk_overlap) it builds a fresh Chroma store + BM25 index
+# from the PDFs, then runs the labelled questions in bench_questions.json through
+# each retriever exactly as rag_query serves them (over-fetch 2k, dedup, keep k).
+# The default embedder is the deterministic HashingEmbeddings, so runs are
+# offline and repeatable; --embedder ollama measures the real model instead.
+#
+#   python bench_retrieval.py
+#   python bench_retrieval.py --chunk-sizes 400,800,1200 --overlaps 0,100 --ks 2,4,8 --json results.json
+#   python bench_retrieval.py --pdf-folder /data/handbooks --questions handbook_questions.json
+#
+# Metrics per question: hit if any of the top k chunks contains an answer span
+# (recall@k is the share of hits), reciprocal rank of the first such chunk (MRR).
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from bench_vector_index import dir_size_mb
+from dedup import dedup_documents
+from ingest import ADD_BATCH_SIZE, chunk_metadata, list_pdfs
+from ingest_manifest import make_chunk_id
+from lexical_index import BM25Index, default_index_path
+from parallel_parse import parse_pdfs
+
+RAG_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PDF_FOLDER = os.path.join(RAG_DIR, "pdfs")
+DEFAULT_QUESTIONS = os.path.join(RAG_DIR, "bench_questions.json")
+COLLECTION_NAME = "bench"
+RETRIEVERS = ("dense", "hybrid", "numpy")
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def normalize_span(text):
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def load_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    questions = data["questions"] if isinstance(data, dict) else data
+    for q in questions:
+        q["_answers"] = [normalize_span(a) for a in q["answers"]]
+    return questions
+
+
+def is_relevant(question, text, metadata):
+    if question.get("source"):
+        sources = {metadata.get("source"), *metadata.get("duplicate_sources", "").split("; ")}
+        if question["source"] not in sources:
+            return False
+    text = normalize_span(text)
+    return any(answer in text for answer in question["_answers"])
+
+
+def make_embeddings(name):
+    if name == "hashing":
+        from local_embeddings import HashingEmbeddings
+        return HashingEmbeddings()
+    from embedding_client import BatchedOllamaEmbeddings
+    return BatchedOllamaEmbeddings(model=os.getenv("EMBED_MODEL", "nomic-embed-text"))
+
+
+# --------------------------
+# Index build
+# --------------------------
+def build_index(pdf_folder, directory, embeddings, chunk_size, chunk_overlap, workers):
+    """Parse, chunk, embed and index the PDFs into directory; returns (vector_store, lexical_index, stats)"""
+    from langchain_chroma import Chroma
+
+    files = [(name, os.path.join(pdf_folder, name)) for name in list_pdfs(pdf_folder)]
+    stats = {}
+    started = time.perf_counter()
+    pages, parse_stats = parse_pdfs(files, workers=workers, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    stats["parse_s"] = time.perf_counter() - started
+
+    ids, texts, metadatas = [], [], []
+    for page in pages:
+        for index, text in enumerate(page.chunks or []):
+            chunk_id = make_chunk_id(page.source, page.page, index, text)
+            ids.append(chunk_id)
+            texts.append(text)
+            metadatas.append(chunk_metadata(chunk_id, page.source, page.page, ""))
+
+    vector_store = Chroma(collection_name=COLLECTION_NAME, embedding_function=embeddings,
+                          persist_directory=directory)
+    embed_started = time.perf_counter()
+    for i in range(0, len(ids), ADD_BATCH_SIZE):
+        vector_store.add_texts(texts[i:i + ADD_BATCH_SIZE], metadatas=metadatas[i:i + ADD_BATCH_SIZE],
+                               ids=ids[i:i + ADD_BATCH_SIZE])
+    stats["embed_s"] = time.perf_counter() - embed_started
+
+    lexical_index = BM25Index(default_index_path(directory))
+    lexical_index.add(ids, texts)
+    lexical_index.save()
+    stats["build_s"] = time.perf_counter() - started
+    stats.update(pages=parse_stats.pages, chunks=len(ids))
+    return vector_store, lexical_index, stats
+
+
+def make_retriever(name, vector_store, lexical_index, embeddings, directory, k):
+    from hybrid_retriever import HybridRetriever
+
+    # Over-fetch like PipelineContext.retriever, so dedup can still leave k distinct chunks
+    if name == "dense":
+        return HybridRetriever(vector_store=vector_store, k=k * 2)
+    if name == "hybrid":
+        return HybridRetriever(vector_store=vector_store, lexical_index=lexical_index, k=k * 2)
+    from numpy_index import NumpyVectorIndex, current_export_dir, default_index_dir
+    numpy_dir = default_index_dir(directory)
+    if current_export_dir(numpy_dir) is None:
+        NumpyVectorIndex.from_chroma(vector_store._collection, numpy_dir)
+    return HybridRetriever(dense_index=NumpyVectorIndex(numpy_dir), embeddings=embeddings,
+                           lexical_index=lexical_index, k=k * 2)
+
+
+# --------------------------
+# Evaluation
+# --------------------------
+def evaluate(retriever, questions, k, repeats=1):
+    """{"recall", "mrr", "p50_ms", "p95_ms", "misses"} over the question set"""
+    hits, reciprocal_ranks, latencies, misses = 0, [], [], []
+    for question in questions:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            docs = dedup_documents(retriever.invoke(question["question"]))[:k]
+            latencies.append(time.perf_counter() - started)
+        rank = next((i + 1 for i, doc in enumerate(docs)
+                     if is_relevant(question, doc.page_content, doc.metadata)), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(question["question"])
+    return {
+        "recall": hits / len(questions),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "misses": misses,
+    }
+
+
+def answerable(questions, vector_store):
+    """Questions whose answer survives chunking intact in at least one chunk"""
+    found = vector_store._collection.get(include=["documents", "metadatas"])
+    return sum(any(is_relevant(q, text, meta or {}) for text, meta in zip(found["documents"], found["metadatas"]))
+               for q in questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency benchmark")
+    parser.add_argument("--pdf-folder", default=DEFAULT_PDF_FOLDER)
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--chunk-sizes", type=parse_int_list, default=[400, 800, 1200])
+    parser.add_argument("--overlaps", type=parse_int_list, default=[0, 100])
+    parser.add_argument("--ks", type=parse_int_list, default=[2, 4, 8])
+    parser.add_argument("--retrievers", default="dense,hybrid",
+                        help=f"Comma-separated, from {', '.join(RETRIEVERS)}")
+    parser.add_argument("--embedder", choices=["hashing", "ollama"], default="hashing")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per question (after one warm-up)")
+    parser.add_argument("--workers", type=int, default=1, help="Parse processes")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    # Chroma logs a warning per query when the store holds fewer than fetch_k chunks
+    logging.getLogger("chromadb").setLevel(logging.ERROR)
+    retrievers = [r.strip() for r in args.retrievers.split(",") if r.strip()]
+    unknown = set(retrievers) - set(RETRIEVERS)
+    if unknown:
+        parser.error(f"unknown retriever(s): {', '.join(sorted(unknown))}")
+    questions = load_questions(args.questions)
+    embeddings = make_embeddings(args.embedder)
+    print(f"📚 {len(list_pdfs(args.pdf_folder))} PDFs from {args.pdf_folder}, {len(questions)} questions, "
+          f"embedder: {args.embedder}")
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    try:
+        for chunk_size in args.chunk_sizes:
+            for chunk_overlap in args.overlaps:
+                if chunk_overlap >= chunk_size:
+                    continue
+                directory = os.path.join(work_dir, f"cs{chunk_size}_ov{chunk_overlap}")
+                vector_store, lexical_index, build = build_index(
+                    args.pdf_folder, directory, embeddings, chunk_size, chunk_overlap, args.workers)
+                build["size_mb"] = dir_size_mb(directory)
+                build["answerable"] = answerable(questions, vector_store)
+                print(f"\n🏗️  chunk_size={chunk_size} overlap={chunk_overlap}: {build['chunks']} chunks from "
+                      f"{build['pages']} pages, built in {build['build_s']:.2f}s "
+                      f"(parse {build['parse_s']:.2f}s, embed+add {build['embed_s']:.2f}s), "
+                      f"{build['size_mb']:.2f} MB, {build['answerable']}/{len(questions)} answerable")
+                print(f"{'retriever':<10}{'k':>4}{'recall@k':>10}{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}")
+                for name in retrievers:
+                    for k in args.ks:
+                        retriever = make_retriever(name, vector_store, lexical_index, embeddings, directory, k)
+                        evaluate(retriever, questions, k)  # warm-up: HNSW segment, query embeddings
+                        scores = evaluate(retriever, questions, k, args.repeats)
+                        print(f"{name:<10}{k:>4}{scores['recall']:>10.3f}{scores['mrr']:>7.3f}"
+                              f"{scores['p50_ms']:>9.2f}{scores['p95_ms']:>9.2f}")
+                        if args.show_misses:
+                            for miss in scores["misses"]:
+                                print(f"    ❌ {miss}")
+                        results.append({"chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                                        "retriever": name, "k": k, "embedder": args.embedder,
+                                        **{key: value for key, value in build.items()}, **scores})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if results:
+        best = max(results, key=lambda r: (r["recall"], r["mrr"], -r["p50_ms"]))
+        print(f"\n🏆 Best: chunk_size={best['chunk_size']} overlap={best['chunk_overlap']} "
+              f"{best['retriever']} k={best['k']} (recall@k {best['recall']:.3f}, MRR {best['mrr']:.3f})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
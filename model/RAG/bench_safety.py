@@ -0,0 +1,118 @@
+# bench_safety.py
+# Throughput and latency of toxicity checks at several concurrency levels, calling
+# predict() once per text ("direct", the old SafetyFilterAgent path) versus through
+# ToxicityBatcher ("batched"). Uses a stand-in model whose cost is a fixed per-call
+# overhead plus a per-text cost, serialized like one CPU-bound model; pass --real to
+# load Detoxify instead.
+#
+#   python bench_safety.py --checks 2000 --concurrency 1 4 16 64 --window 0.005 --max-batch 32
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from toxicity_batcher import ToxicityBatcher
+
+LABELS = ("toxicity", "severe_toxicity", "obscene", "threat", "insult", "identity_attack")
+
+
+class FakeDetoxify:
+    """predict(text or list) with Detoxify's return shape; one call runs at a time"""
+
+    def __init__(self, call_latency=0.02, per_item_latency=0.002):
+        self.call_latency = call_latency
+        self.per_item_latency = per_item_latency
+        self.lock = threading.Lock()
+
+    def predict(self, text):
+        texts = [text] if isinstance(text, str) else text
+        with self.lock:
+            time.sleep(self.call_latency + self.per_item_latency * len(texts))
+        scores = {label: [(hash((label, t)) % 1000) / 10000 for t in texts] for label in LABELS}
+        return {label: values[0] for label, values in scores.items()} if isinstance(text, str) else scores
+
+
+def synthetic_queries(n):
+    base = ["What is the last date for fee payment?", "How do I apply for a hostel room?",
+            "When does the library close on weekends?", "Who is the head of the CSE department?"]
+    return [f"{base[i % len(base)]} (#{i})" for i in range(n)]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def run_level(check, queries, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(texts):
+        for text in texts:
+            started = time.perf_counter()
+            check(text)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    shares = [queries[i::concurrency] for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, shares))
+    wall = time.perf_counter() - started
+    return {"checks_per_sec": len(queries) / wall, "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000}
+
+
+def run_benchmark(model, queries, concurrencies, window, max_batch):
+    results = []
+    for concurrency in concurrencies:
+        for mode in ("direct", "batched"):
+            if mode == "direct":
+                stats = run_level(model.predict, queries, concurrency)
+                stats["mean_batch_size"] = 1.0
+            else:
+                batcher = ToxicityBatcher(model, batch_window=window, max_batch=max_batch)
+                stats = run_level(batcher.score, queries, concurrency)
+                stats["mean_batch_size"] = batcher.report()["mean_batch_size"]
+            stats.update(mode=mode, concurrency=concurrency)
+            results.append(stats)
+            print(f"{mode:<8} concurrency={concurrency:<4} {stats['checks_per_sec']:8.1f} checks/s  "
+                  f"p50={stats['p50_ms']:7.1f}ms  p99={stats['p99_ms']:7.1f}ms  "
+                  f"batch={stats['mean_batch_size']:.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detoxify micro-batching benchmark")
+    parser.add_argument("--real", action="store_true", help="Load Detoxify('original') on CPU")
+    parser.add_argument("--checks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--window", type=float, default=0.005, help="Batch collection window (seconds)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    # Stand-in model cost
+    parser.add_argument("--call-latency", type=float, default=0.02)
+    parser.add_argument("--per-item-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    if args.real:
+        from detoxify import Detoxify
+
+        print("⚡ Loading Detoxify on CPU")
+        model = Detoxify("original", device="cpu")
+    else:
+        model = FakeDetoxify(args.call_latency, args.per_item_latency)
+        print(f"🧪 Using stand-in model ({args.call_latency * 1000:.0f}ms/call + "
+              f"{args.per_item_latency * 1000:.0f}ms/text)")
+
+    results = run_benchmark(model, synthetic_queries(args.checks), args.concurrency, args.window, args.max_batch)
+
+    print()
+    for concurrency in args.concurrency:
+        direct, batched = [r for r in results if r["concurrency"] == concurrency]
+        print(f"📊 concurrency={concurrency:<4} throughput x{batched['checks_per_sec'] / direct['checks_per_sec']:.1f}  "
+              f"p99 {direct['p99_ms']:.0f}ms -> {batched['p99_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
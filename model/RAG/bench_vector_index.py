@@ -0,0 +1,140 @@
+# bench_vector_index.py
+# Latency, recall and memory of the NumPy index (float32 and int8 + rescoring)
+# against the Chroma store it was exported from. Query vectors are perturbed copies
+# of stored embeddings, so no embedding model is needed; ground truth is an exact
+# float32 scan.
+#
+#   python bench_vector_index.py --persist-directory chroma_db --collection college_pdfsn
+#   python bench_vector_index.py --synthetic 20000     # no store at hand
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from numpy_index import NumpyVectorIndex
+
+DEFAULT_PERSIST_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chroma_db")
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def dir_size_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names) / (1024 * 1024)
+
+
+def make_synthetic_store(directory, collection_name, count, dim, seed=0):
+    import chromadb
+
+    rng = np.random.default_rng(seed)
+    # Clustered vectors look more like real embeddings than uniform noise
+    centers = rng.normal(size=(max(count // 50, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+    collection = chromadb.PersistentClient(path=directory).get_or_create_collection(collection_name)
+    for i in range(0, count, 1000):
+        ids = [f"synthetic:{j}" for j in range(i, min(i + 1000, count))]
+        collection.add(ids=ids, embeddings=vectors[i:i + len(ids)].tolist(),
+                       documents=[f"chunk {j}" for j in range(i, i + len(ids))],
+                       metadatas=[{"source": "synthetic"}] * len(ids))
+
+
+def timed(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - started) / repeats, result
+
+
+def recall_at_k(results, truth):
+    hits = sum(len({doc_id for doc_id, _ in got} & {doc_id for doc_id, _ in want})
+               for got, want in zip(results, truth))
+    return hits / sum(len(want) for want in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy vector index vs Chroma benchmark")
+    parser.add_argument("--persist-directory", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--collection", default="college_pdfsn")
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark a synthetic store of N vectors instead")
+    parser.add_argument("--dim", type=int, default=768, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.05, help="Query perturbation, relative to vector norm")
+    args = parser.parse_args()
+
+    import chromadb
+
+    work_dir = tempfile.mkdtemp(prefix="bench_vector_index_")
+    persist_directory = args.persist_directory
+    try:
+        if args.synthetic:
+            persist_directory = os.path.join(work_dir, "chroma")
+            make_synthetic_store(persist_directory, args.collection, args.synthetic, args.dim)
+
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        collection = chromadb.PersistentClient(path=persist_directory).get_collection(args.collection)
+        collection.query(query_embeddings=[collection.get(limit=1, include=["embeddings"])["embeddings"][0]],
+                         n_results=1)  # loads the HNSW segment
+        chroma_open = time.perf_counter() - started
+        rss_chroma = current_rss_mb()
+
+        export_dir = os.path.join(work_dir, "numpy_index")
+        NumpyVectorIndex.from_chroma(collection, export_dir, quantize=True)
+        started = time.perf_counter()
+        int8_index = NumpyVectorIndex(export_dir)
+        numpy_open = time.perf_counter() - started
+        f32_index = NumpyVectorIndex(export_dir, use_quantized=False)
+
+        rng = np.random.default_rng(1)
+        rows = rng.choice(len(f32_index), size=min(args.queries, len(f32_index)), replace=False)
+        base = np.asarray(f32_index.vectors[rows])
+        scale = args.noise * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(base.shape[1])
+        queries = (base + scale * rng.normal(size=base.shape)).astype(np.float32)
+        truth = f32_index.search(queries, args.k)
+
+        def chroma_results(found):
+            return [list(zip(ids, dists)) for ids, dists in zip(found["ids"], found["distances"])]
+
+        print(f"📦 {len(f32_index)} vectors, dim {f32_index.meta['dim']}, metric {f32_index.metric}, "
+              f"{len(queries)} queries, k={args.k}")
+        print(f"🚀 Open: chroma {chroma_open * 1000:.0f} ms, numpy {numpy_open * 1000:.0f} ms")
+        print(f"{'backend':<22}{'1 query (ms)':>14}{'batch/query (ms)':>18}{'recall@k':>10}")
+        cases = [
+            ("chroma hnsw",
+             lambda q: chroma_results(collection.query(query_embeddings=q.tolist(), n_results=args.k,
+                                                       include=["distances"]))),
+            ("numpy float32", lambda q: f32_index.search(q, args.k)),
+            ("numpy int8 + rescore", lambda q: int8_index.search(q, args.k)),
+            ("numpy int8 only", lambda q: int8_index.search(q, args.k, rescore=False)),
+        ]
+        for name, search in cases:
+            single, _ = timed(lambda: [search(q[None, :]) for q in queries[:50]], 1)
+            batch, results = timed(lambda: search(queries), 3)
+            print(f"{name:<22}{single / min(50, len(queries)) * 1000:>14.2f}"
+                  f"{batch / len(queries) * 1000:>18.3f}{recall_at_k(results, truth):>10.3f}")
+
+        print(f"💾 On disk: chroma {dir_size_mb(persist_directory):.1f} MB, numpy {dir_size_mb(export_dir):.1f} MB; "
+              f"scanned per query: float32 {f32_index.memory_bytes() / 2**20:.1f} MB, "
+              f"int8 {int8_index.memory_bytes() / 2**20:.1f} MB")
+        if rss_before is not None:
+            print(f"🧠 RSS: {rss_before:.0f} MB before, {rss_chroma:.0f} MB with Chroma open, "
+                  f"{current_rss_mb():.0f} MB with both")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
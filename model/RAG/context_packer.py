@@ -0,0 +1,147 @@
+# context_packer.py
+# Assembles the context and history sections of the rg_generate prompt within a
+# token budget, so prompt length (and with it time to first token) stays predictable.
+#  - chunks are scored by retrieval score and overlap with the question
+#  - chunks below a dense-similarity threshold are dropped (adaptive k)
+#  - kept chunks are trimmed to the sentences around question terms
+#  - history keeps the newest turns that fit, after the rolling summary of older ones
+import os
+import re
+from dataclasses import dataclass, field
+
+from lexical_index import tokenize
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "300"))
+MIN_SIMILARITY = float(os.getenv("CONTEXT_MIN_SIMILARITY", "0.35"))
+MIN_CHUNK_TOKENS = 40          # do not squeeze in a fragment smaller than this
+RETRIEVAL_WEIGHT = 0.6         # vs. question-term overlap
+CHARS_PER_TOKEN = 4            # rough average for English text; no tokenizer for Gemini runs locally
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+
+
+def term_overlap(text, terms):
+    """Share of the question's terms that appear in text"""
+    if not terms:
+        return 0.0
+    return len(terms & set(tokenize(text))) / len(terms)
+
+
+def truncate_to_tokens(text, budget):
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:budget * CHARS_PER_TOKEN]
+    return cut[:cut.rfind(" ")] + " …" if " " in cut else cut
+
+
+def trim_to_relevant(text, terms, budget):
+    """
+    Keep sentences that mention a question term plus one neighbour on each side,
+    in their original order, up to budget tokens. Falls back to the leading sentences.
+    """
+    sentences = split_sentences(text)
+    hits = [i for i, s in enumerate(sentences) if term_overlap(s, terms) > 0]
+    keep = sorted({j for i in hits for j in (i - 1, i, i + 1) if 0 <= j < len(sentences)}) or range(len(sentences))
+    picked, used = [], 0
+    for i in keep:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > budget:
+            if not picked:
+                picked.append(truncate_to_tokens(sentences[i], budget))
+            break
+        picked.append(sentences[i])
+        used += cost
+    return " ".join(picked)
+
+
+@dataclass
+class PackedPrompt:
+    context_text: str = ""
+    history_text: str = ""
+    chunks_used: list = field(default_factory=list)     # indices into the retrieved chunks, prompt order
+    chunks_dropped: int = 0                             # below the similarity threshold or out of budget
+    tokens: dict = field(default_factory=dict)
+
+    def finalize(self, prompt, question):
+        """Record per-section token counts for the final prompt; instructions is the remainder"""
+        total = estimate_tokens(prompt)
+        sections = {"history": estimate_tokens(self.history_text),
+                    "context": estimate_tokens(self.context_text),
+                    "question": estimate_tokens(question)}
+        self.tokens = {"instructions": max(total - sum(sections.values()), 0), **sections, "total": total}
+        return self
+
+    def metadata(self):
+        return {"prompt_tokens": self.tokens, "chunks_used": len(self.chunks_used),
+                "chunks_dropped": self.chunks_dropped}
+
+
+def score_chunks(question, chunks, metadatas):
+    """[(index, score, similarity)] best first"""
+    terms = set(tokenize(question))
+    retrieval = [meta.get("retrieval_score") for meta in metadatas]
+    top = max((r for r in retrieval if r), default=None)
+    scored = []
+    for i, text in enumerate(chunks):
+        # Without a retrieval score, fall back to rank position
+        rank_score = retrieval[i] / top if top and retrieval[i] else 1.0 / (1 + i)
+        score = RETRIEVAL_WEIGHT * rank_score + (1 - RETRIEVAL_WEIGHT) * term_overlap(text, terms)
+        scored.append((i, score, metadatas[i].get("similarity")))
+    return sorted(scored, key=lambda item: (-item[1], item[0]))
+
+
+def pack_history(history, budget=HISTORY_TOKEN_BUDGET):
+    """history: [{"role", "text"}] oldest first. Keeps the newest turns that fit"""
+    lines, used = [], 0
+    for turn in reversed(history):
+        line = f"{turn['role'].capitalize()}: {turn['text']}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            if not lines:
+                lines.append(truncate_to_tokens(line, budget))
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(reversed(lines))
+
+
+def pack_context(question, chunks, metadatas=None, history=None, context_budget=CONTEXT_TOKEN_BUDGET,
+                 history_budget=HISTORY_TOKEN_BUDGET, min_similarity=MIN_SIMILARITY, summary=None):
+    """
+    Pick, order and trim retrieved chunks and history turns to fit their budgets.
+    summary: rolling summary of the turns before `history` (bounded by conversation_summary.py)
+    """
+    metadatas = metadatas or [{} for _ in chunks]
+    terms = set(tokenize(question))
+    history_text = pack_history(history or [], history_budget)
+    if summary:
+        history_text = f"Summary of earlier conversation: {summary}" + (f"\n{history_text}" if history_text else "")
+    packed = PackedPrompt(history_text=history_text)
+
+    parts, remaining = [], context_budget
+    for index, _, similarity in score_chunks(question, chunks, metadatas):
+        # Lexical-only hits carry no similarity: an exact term match is reason enough to keep them
+        if similarity is not None and similarity < min_similarity:
+            packed.chunks_dropped += 1
+            continue
+        if remaining < MIN_CHUNK_TOKENS:
+            packed.chunks_dropped += 1
+            continue
+        text = trim_to_relevant(chunks[index], terms, remaining)
+        if not text:
+            packed.chunks_dropped += 1
+            continue
+        parts.append(text)
+        packed.chunks_used.append(index)
+        remaining -= estimate_tokens(text) + 1
+    packed.context_text = "\n".join(parts)
+    return packed
@@ -0,0 +1,119 @@
+# conversation_store.py
+# SQLite store for conversation turns, safe under concurrent requests:
+#  - a bounded pool of connections, each checked out for one operation, so no two
+#    threads ever use a connection at the same time (a shared cursor serializes
+#    requests and can interleave statements) and short-lived threads (Streamlit
+#    reruns) never leave connections behind
+#  - WAL journal, so readers never block the writer and vice versa
+#  - (user_id, thread_id, timestamp) index for the per-thread history lookups
+#  - a turn (user question + assistant answer) is one batched insert in one transaction
+# The database persists across restarts; the schema is only ever created if missing.
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+BUSY_TIMEOUT_S = 30
+POOL_SIZE = int(os.getenv("CONVERSATION_DB_POOL_SIZE", "8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    thread_id TEXT NOT NULL,
+    role TEXT NOT NULL,  -- 'user' or 'assistant'
+    text TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+-- The rowid (id) is implicitly the last key, so ORDER BY timestamp, id is served by the index too
+CREATE INDEX IF NOT EXISTS idx_conversation_history_thread
+    ON conversation_history (user_id, thread_id, timestamp);
+"""
+
+
+class ConversationStore:
+    """
+    history() / save_turn() / save_messages() on pooled connections.
+    connection() is for other tables kept in the same database (conversation_summary.py).
+    """
+
+    def __init__(self, path, pool_size=POOL_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.execute_script(SCHEMA)
+
+    def _connect(self):
+        # Pooled connections move between threads, but only one uses them at a time
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = len(self._connections) < self.pool_size
+            if create:
+                conn = self._connect()
+                self._connections.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=BUSY_TIMEOUT_S)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"All {self.pool_size} conversation DB connections are busy")
+
+    @contextmanager
+    def connection(self):
+        """`with store.connection() as conn:` a pooled connection, returned afterwards"""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def execute_script(self, script):
+        with self.connection() as conn:
+            conn.executescript(script)
+            conn.commit()
+
+    def history(self, user_id, thread_id, last_n=5):
+        """Newest last_n messages of a thread, oldest first"""
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT role, text FROM conversation_history
+                WHERE user_id = ? AND thread_id = ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (user_id, thread_id, last_n)).fetchall()
+        return [{"role": r[0], "text": r[1]} for r in reversed(rows)]
+
+    def save_messages(self, user_id, thread_id, messages):
+        """Insert [(role, text), ...] in one transaction"""
+        with self.connection() as conn, conn:
+            conn.executemany("""
+                INSERT INTO conversation_history (user_id, thread_id, role, text)
+                VALUES (?, ?, ?, ?)
+            """, [(user_id, thread_id, role, text) for role, text in messages])
+
+    def save_turn(self, user_id, thread_id, question, answer):
+        self.save_messages(user_id, thread_id, [("user", question), ("assistant", answer)])
+
+    def close(self):
+        """Close every connection this store opened (shutdown, tests)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._idle = queue.LifoQueue()
+        for conn in connections:
+            conn.close()
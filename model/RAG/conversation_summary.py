@@ -0,0 +1,158 @@
+# conversation_summary.py
+# Rolling per-thread summaries, so the history part of the prompt stays bounded no
+# matter how long a conversation runs. After each turn a background worker folds
+# every message older than the newest SUMMARY_RECENT_TURNS exchanges into a compact
+# summary (stored in conversation_summaries, next to conversation_history). Prompts
+# then carry that summary plus the newest exchanges instead of N raw turns.
+# The summary is written by the LLM when a summarizer is given (through the gateway,
+# so it never blocks past the deadline), otherwise, or on failure, extractively.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from context_packer import estimate_tokens, split_sentences, truncate_to_tokens
+
+SUMMARY_RECENT_TURNS = int(os.getenv("SUMMARY_RECENT_TURNS", "2"))     # user+assistant exchanges kept raw
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200"))
+SUMMARY_LINE_CHARS = 200        # per folded message in the extractive summary
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a student and a university assistant.
+Update the summary with the new messages. Keep facts the student may refer back to
+(names, courses, dates, fees, decisions, open questions); drop greetings and repetition.
+Write at most {max_words} words, as plain sentences, no preamble.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:
+"""
+
+
+def format_messages(messages):
+    return "\n".join(f"{m['role'].capitalize()}: {m['text']}" for m in messages)
+
+
+def extractive_summary(previous, messages, budget=SUMMARY_TOKEN_BUDGET):
+    """Previous summary lines plus one short line per message; keeps the newest lines that fit"""
+    lines = [line for line in (previous or "").split("\n") if line.strip()]
+    for m in messages:
+        sentences = split_sentences(m["text"])
+        first = sentences[0] if sentences else ""
+        label = "User asked" if m["role"] == "user" else "Assistant said"
+        lines.append(f"{label}: {first[:SUMMARY_LINE_CHARS]}")
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+
+def make_llm_summarizer(get_gateway, budget=SUMMARY_TOKEN_BUDGET):
+    """summarize(previous, messages) through the LLM gateway; falls back to extractive_summary"""
+    from langchain.schema import HumanMessage
+
+    def summarize(previous, messages):
+        prompt = SUMMARY_PROMPT.format(max_words=int(budget * 0.7), summary=previous or "(none)",
+                                       messages=format_messages(messages))
+        result = get_gateway().invoke([HumanMessage(content=prompt)],
+                                      fallback=lambda reason: extractive_summary(previous, messages, budget))
+        return result.text.strip()
+    return summarize
+
+
+class ConversationMemory:
+    """
+    prompt_history() -> (summary, newest messages) for the prompt;
+    schedule_update() after each saved turn folds older messages into the summary.
+    """
+
+    def __init__(self, store, summarize=None, recent_turns=SUMMARY_RECENT_TURNS, budget=SUMMARY_TOKEN_BUDGET):
+        self.store = store
+        self.summarize = summarize
+        self.recent_messages = 2 * recent_turns
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+        self._pending = {}
+        self._lock = threading.Lock()
+        store.execute_script("""
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            user_id TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            covered_id INTEGER NOT NULL,   -- last conversation_history.id folded into the summary
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, thread_id)
+        )
+        """)
+
+    def summary(self, user_id, thread_id):
+        """(summary text, covered_id); ("", 0) before the first fold"""
+        with self.store.connection() as conn:
+            row = conn.execute(
+                "SELECT summary, covered_id FROM conversation_summaries WHERE user_id = ? AND thread_id = ?",
+                (user_id, thread_id)).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def prompt_history(self, user_id, thread_id, max_turns=SUMMARY_RECENT_TURNS):
+        """Summary plus the newest min(max_turns, recent_turns) exchanges, oldest first"""
+        limit = min(2 * max_turns, self.recent_messages)
+        return self.summary(user_id, thread_id)[0], self.store.history(user_id, thread_id, limit)
+
+    # --------------------------
+    # Background folding
+    # --------------------------
+    def update(self, user_id, thread_id):
+        """Fold messages older than the recent window into the summary. Returns True if it changed"""
+        previous, covered_id = self.summary(user_id, thread_id)
+        with self.store.connection() as conn:
+            rows = conn.execute("""
+                SELECT id, role, text FROM conversation_history
+                WHERE user_id = ? AND thread_id = ? AND id > ?
+                ORDER BY id
+            """, (user_id, thread_id, covered_id)).fetchall()
+        fold = rows[:max(len(rows) - self.recent_messages, 0)]
+        if not fold:
+            return False
+        messages = [{"role": r[1], "text": r[2]} for r in fold]
+        if self.summarize is not None:
+            text = self.summarize(previous, messages)
+        else:
+            text = extractive_summary(previous, messages, self.budget)
+        # Hard bound, whatever the summarizer returned
+        text = truncate_to_tokens(text, self.budget)
+        with self.store.connection() as conn, conn:
+            conn.execute("""
+                INSERT INTO conversation_summaries (user_id, thread_id, summary, covered_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, thread_id) DO UPDATE SET
+                    summary = excluded.summary, covered_id = excluded.covered_id, updated_at = CURRENT_TIMESTAMP
+            """, (user_id, thread_id, text, fold[-1][0]))
+        return True
+
+    def _run(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+        try:
+            self.update(*key)
+        except Exception as e:
+            # The next turn retries; a stale summary only costs some context
+            print(f"⚠️ Conversation summary update failed for {key}: {e}")
+
+    def schedule_update(self, user_id, thread_id):
+        """Queue a fold for this thread; a fold already queued (not yet started) covers the new turn too"""
+        key = (user_id, thread_id)
+        with self._lock:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self._run, key)
+            return self._pending[key]
+
+    def flush(self):
+        """Wait for every queued fold (tests, shutdown)"""
+        self._executor.submit(lambda: None).result()
@@ -0,0 +1,232 @@
+# dedup.py
+# Near-duplicate detection for ingestion and retrieval.
+#  - Pages: MinHash over word shingles + LSH banding, verified by estimated Jaccard.
+#  - Chunks / retrieved hits: 64-bit SimHash, compared by Hamming distance.
+# Both are deterministic, so the same corpus always collapses the same way.
+import hashlib
+import re
+
+import numpy as np
+
+NUM_PERM = 64
+LSH_BANDS = 16                 # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates
+PAGE_JACCARD_THRESHOLD = 0.85
+SHINGLE_SIZE = 5
+SIMHASH_MAX_DISTANCE = 3       # out of 64 bits
+
+_MERSENNE_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 2**32 - 5, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 2**32 - 5, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", text.lower())).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _hash64(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# --------------------------
+# MinHash (pages)
+# --------------------------
+def minhash_signature(text, num_perm=NUM_PERM):
+    """List of num_perm ints, or None for pages without text"""
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    hashes = np.fromiter((_hash32(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+    # (a*h + b) stays below 2**64 because a, b and h are all below 2**32
+    permuted = (np.outer(hashes, _PERM_A[:num_perm]) + _PERM_B[:num_perm]) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.int64).tolist()
+
+
+def jaccard_estimate(sig_a, sig_b):
+    return float(np.mean(np.asarray(sig_a) == np.asarray(sig_b)))
+
+
+def minhash_clusters(signatures, threshold=PAGE_JACCARD_THRESHOLD, bands=LSH_BANDS):
+    """
+    signatures: {key: signature or None}. Returns a list of clusters (sorted lists of keys)
+    with more than one member, where every member is within `threshold` of another member.
+    """
+    keys = sorted(k for k, sig in signatures.items() if sig)
+    parent = {k: k for k in keys}
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    buckets = {}
+    for key in keys:
+        sig = signatures[key]
+        rows = len(sig) // bands
+        for band in range(bands):
+            buckets.setdefault((band, tuple(sig[band * rows:(band + 1) * rows])), []).append(key)
+
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                ra, rb = find(a), find(b)
+                if ra != rb and jaccard_estimate(signatures[a], signatures[b]) >= threshold:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+    clusters = {}
+    for key in keys:
+        clusters.setdefault(find(key), []).append(key)
+    return [sorted(c) for c in clusters.values() if len(c) > 1]
+
+
+# --------------------------
+# SimHash (chunks, retrieved hits)
+# --------------------------
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def simhash(text):
+    """64-bit SimHash over word bigrams"""
+    tokens = shingles(text, size=2) or {""}
+    hashes = np.fromiter((_hash64(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    weights = (2 * bits - 1).sum(axis=0)
+    return sum(1 << int(bit) for bit in np.nonzero(weights > 0)[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def simhash_clusters(hashes, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    hashes: {key: simhash}. Returns clusters (sorted lists of keys, size > 1).
+    Candidates come from 4 x 16-bit blocks: two hashes within 3 bits share at least one block.
+    """
+    keys = sorted(hashes)
+    parent = {k: k for k in keys}
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    blocks = {}
+    for key in keys:
+        for block in range(4):
+            blocks.setdefault((block, (hashes[key] >> (16 * block)) & 0xFFFF), []).append(key)
+
+    for members in blocks.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if hamming(hashes[a], hashes[b]) <= max_distance:
+                    ra, rb = find(a), find(b)
+                    if ra != rb:
+                        parent[max(ra, rb)] = min(ra, rb)
+
+    clusters = {}
+    for key in keys:
+        clusters.setdefault(find(key), []).append(key)
+    return [sorted(c) for c in clusters.values() if len(c) > 1]
+
+
+def dedup_documents(docs, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    Drop retrieved documents that are near-identical to a higher-ranked one.
+    The kept document's metadata gets the dropped ones' sources in "duplicate_sources".
+    """
+    kept, kept_hashes = [], []
+    for doc in docs:
+        h = simhash(doc.page_content)
+        match = next((i for i, other in enumerate(kept_hashes) if hamming(h, other) <= max_distance), None)
+        if match is None:
+            kept.append(doc)
+            kept_hashes.append(h)
+            continue
+        source = doc.metadata.get("source")
+        if source:
+            original = kept[match]
+            extra = [s for s in original.metadata.get("duplicate_sources", "").split("; ") if s]
+            if source != original.metadata.get("source") and source not in extra:
+                original.metadata = {**original.metadata, "duplicate_sources": "; ".join(extra + [source])}
+    return kept
+
+
+# --------------------------
+# Incremental indexes (streaming ingestion)
+# --------------------------
+class MinHashIndex:
+    """LSH buckets of page signatures that can be queried and updated one page at a time"""
+
+    def __init__(self, threshold=PAGE_JACCARD_THRESHOLD, bands=LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.signatures = {}
+        self.buckets = {}
+
+    def _bands(self, sig):
+        rows = len(sig) // self.bands
+        return [(band, tuple(sig[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def add(self, key, sig):
+        if not sig:
+            return
+        self.signatures[key] = sig
+        for bucket in self._bands(sig):
+            self.buckets.setdefault(bucket, set()).add(key)
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig:
+            for bucket in self._bands(sig):
+                self.buckets[bucket].discard(key)
+
+    def query(self, sig):
+        """Lowest key whose signature is within the threshold, or None"""
+        if not sig:
+            return None
+        candidates = set().union(*(self.buckets.get(bucket, ()) for bucket in self._bands(sig)))
+        matches = [k for k in candidates if jaccard_estimate(sig, self.signatures[k]) >= self.threshold]
+        return min(matches) if matches else None
+
+
+class SimHashIndex:
+    """16-bit block index over SimHashes, same candidate scheme as simhash_clusters"""
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.hashes = {}
+        self.blocks = {}
+
+    @staticmethod
+    def _blocks(h):
+        return [(block, (h >> (16 * block)) & 0xFFFF) for block in range(4)]
+
+    def add(self, key, h):
+        self.hashes[key] = h
+        for block in self._blocks(h):
+            self.blocks.setdefault(block, set()).add(key)
+
+    def remove(self, key):
+        h = self.hashes.pop(key, None)
+        if h is not None:
+            for block in self._blocks(h):
+                self.blocks[block].discard(key)
+
+    def query(self, h):
+        candidates = set().union(*(self.blocks.get(block, ()) for block in self._blocks(h)))
+        matches = [k for k in candidates if hamming(h, self.hashes[k]) <= self.max_distance]
+        return min(matches) if matches else None
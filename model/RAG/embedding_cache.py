@@ -0,0 +1,195 @@
+# embedding_cache.py
+# Persistent embedding cache keyed by (embedding model, sha256 of the text).
+# Vectors live in one append-only, memory-mapped float16/float32 file per model;
+# a small SQLite database maps keys to row numbers. Re-ingesting unchanged chunks,
+# or repeating a query, then costs a lookup instead of an embedding call.
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+SQLITE_MAX_PARAMS = 500
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk vector store: <dir>/index.sqlite + <dir>/<model>.<dtype>.bin"""
+
+    def __init__(self, directory, dtype="float16"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._maps = {}  # model -> (rows mapped, np.memmap)
+        self.conn = sqlite3.connect(self.directory / "index.sqlite", check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS models (
+                model TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                dtype TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS vectors (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (model, key)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def _data_path(self, model):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        return self.directory / f"{slug}.{self.dtype.name}.bin"
+
+    def _model_info(self, model):
+        row = self.conn.execute("SELECT dim, dtype, rows FROM models WHERE model = ?", (model,)).fetchone()
+        if row and row[1] != self.dtype.name:
+            raise ValueError(f"Cache for {model} was written as {row[1]}, opened as {self.dtype.name}")
+        return row
+
+    def _matrix(self, model, dim, rows):
+        """Memory-mapped view of the first `rows` vectors, remapped when the file has grown"""
+        mapped = self._maps.get(model)
+        if mapped is None or mapped[0] < rows:
+            matrix = np.memmap(self._data_path(model), dtype=self.dtype, mode="r", shape=(rows, dim))
+            mapped = (rows, matrix)
+            self._maps[model] = mapped
+        return mapped[1]
+
+    def get_many(self, model, keys):
+        """Return a list aligned with keys: float32 vector, or None on a miss"""
+        with self._lock:
+            info = self._model_info(model)
+            if info is None:
+                return [None] * len(keys)
+            dim, _, total_rows = info
+            found = {}
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), SQLITE_MAX_PARAMS):
+                part = unique[i:i + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                found.update(self.conn.execute(
+                    f"SELECT key, row FROM vectors WHERE model = ? AND key IN ({placeholders})",
+                    (model, *part)
+                ).fetchall())
+            if not found:
+                return [None] * len(keys)
+            matrix = self._matrix(model, dim, total_rows)
+            return [np.asarray(matrix[found[k]], dtype=np.float32) if k in found else None for k in keys]
+
+    def put_many(self, model, keys, vectors):
+        """Append vectors for keys not already cached"""
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=self.dtype)
+        with self._lock:
+            # BEGIN IMMEDIATE serializes row allocation across processes sharing the cache
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                info = self._model_info(model)
+                dim = vectors.shape[1]
+                if info is None:
+                    self.conn.execute("INSERT INTO models (model, dim, dtype, rows) VALUES (?, ?, ?, 0)",
+                                      (model, dim, self.dtype.name))
+                    start = 0
+                else:
+                    if info[0] != dim:
+                        raise ValueError(f"Cached {model} vectors have dim {info[0]}, got {dim}")
+                    start = info[2]
+
+                new_keys, new_rows = [], []
+                seen = set()
+                existing = set()
+                for i in range(0, len(keys), SQLITE_MAX_PARAMS):
+                    part = keys[i:i + SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(part))
+                    existing.update(k for (k,) in self.conn.execute(
+                        f"SELECT key FROM vectors WHERE model = ? AND key IN ({placeholders})", (model, *part)))
+                for key, vector in zip(keys, vectors):
+                    if key in existing or key in seen:
+                        continue
+                    seen.add(key)
+                    new_keys.append(key)
+                    new_rows.append(vector)
+                if not new_keys:
+                    self.conn.execute("COMMIT")
+                    return
+
+                path = self._data_path(model)
+                # Write at the allocated offset: a tail left by a crashed writer is simply overwritten
+                with open(path, "r+b" if path.exists() else "w+b") as f:
+                    f.seek(start * dim * self.dtype.itemsize)
+                    f.write(np.stack(new_rows).tobytes())
+                self.conn.executemany("INSERT INTO vectors (model, key, row) VALUES (?, ?, ?)",
+                                      [(model, key, start + i) for i, key in enumerate(new_keys)])
+                self.conn.execute("UPDATE models SET rows = ? WHERE model = ?", (start + len(new_keys), model))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def count(self, model):
+        info = self._model_info(model)
+        return info[2] if info else 0
+
+    def close(self):
+        self._maps.clear()
+        self.conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any Embeddings and only calls it for texts missing from the cache"""
+
+    def __init__(self, inner, cache, model_name=None):
+        self.inner = inner
+        self.cache = cache
+        self.model_name = model_name or getattr(inner, "model", None) or type(inner).__name__
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def metrics(self):
+        # Keeps callers that report inner.metrics (e.g. BatchedOllamaEmbeddings) working
+        return getattr(self.inner, "metrics", None)
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"💾 Embedding cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [text_key(t) for t in texts]
+        vectors = self.cache.get_many(self.model_name, keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            # Embed each distinct missing text once
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            computed = self.inner.embed_documents(list(unique.values()))
+            self.cache.put_many(self.model_name, list(unique.keys()), computed)
+            by_key = dict(zip(unique.keys(), computed))
+            for i in missing:
+                # Round-trip through the cache dtype so hits and misses return identical vectors
+                vectors[i] = np.asarray(by_key[keys[i]], dtype=self.cache.dtype)
+        return [np.asarray(v, dtype=np.float32).tolist() for v in vectors]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def default_cache_dir(persist_directory):
+    return os.path.join(persist_directory, "embedding_cache")
@@ -0,0 +1,146 @@
+# embedding_client.py
+# Embedding client for ingestion: splits texts into batches, keeps a bounded number
+# of requests in flight against the Ollama server, retries transient failures and
+# records throughput. Drop-in replacement for OllamaEmbeddings (same Embeddings API).
+# One background event loop and one pooled httpx.AsyncClient per instance serve every
+# call, so per-query embeddings at retrieval time reuse open connections.
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_OLLAMA_URL = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+DEFAULT_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+# Status codes worth retrying: rate limiting and server-side hiccups
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class EmbeddingError(RuntimeError):
+    pass
+
+
+@dataclass
+class EmbeddingMetrics:
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    failures: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_sec(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        return (f"🧮 Embedded {self.chunks} chunks in {self.batches} batches, {self.seconds:.2f}s "
+                f"({self.chunks_per_sec:.1f} chunks/s, {self.retries} retries)")
+
+
+class BatchedOllamaEmbeddings(Embeddings):
+    """Ollama /api/embed client with batching, bounded concurrency and retries"""
+
+    def __init__(self, model="nomic-embed-text", base_url=None, batch_size=None, max_concurrency=None,
+                 max_retries=3, backoff=0.5, timeout=60.0):
+        self.model = model
+        self.base_url = (base_url or DEFAULT_OLLAMA_URL).rstrip("/")
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.max_concurrency = max_concurrency or DEFAULT_CONCURRENCY
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.metrics = EmbeddingMetrics()
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Event loop
+    # --------------------------
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="embed-client", daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    def _submit(self, texts):
+        return asyncio.run_coroutine_threadsafe(self._embed(texts), self._ensure_loop())
+
+    def close(self):
+        """Close the HTTP client and stop the background loop"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+        self._client = self._semaphore = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    # --------------------------
+    # Requests (on the background loop only)
+    # --------------------------
+    async def _embed_batch(self, batch):
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                try:
+                    response = await self._client.post(f"{self.base_url}/api/embed",
+                                                       json={"model": self.model, "input": batch})
+                    if response.status_code in RETRYABLE_STATUS:
+                        raise EmbeddingError(f"Embedding server returned HTTP {response.status_code}")
+                    response.raise_for_status()
+                    embeddings = response.json()["embeddings"]
+                    if len(embeddings) != len(batch):
+                        raise EmbeddingError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+                    self.metrics.batches += 1
+                    return embeddings
+                except (httpx.TransportError, EmbeddingError) as e:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        self.metrics.failures += 1
+                        raise EmbeddingError(f"Embedding batch failed after {attempt} attempts: {e}") from e
+                    self.metrics.retries += 1
+                    # Exponential backoff with jitter so retries do not arrive in lockstep
+                    await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    async def _embed(self, texts):
+        if self._client is None:
+            # Created on the loop that uses them; the limits bound in-flight requests across all callers
+            self._client = httpx.AsyncClient(timeout=self.timeout,
+                                             limits=httpx.Limits(max_connections=self.max_concurrency))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(b) for b in batches))
+        self.metrics.chunks += len(texts)
+        self.metrics.seconds += time.perf_counter() - started
+        return [vector for batch in results for vector in batch]
+
+    # --------------------------
+    # Embeddings API
+    # --------------------------
+    async def aembed_documents(self, texts):
+        if not texts:
+            return []
+        return await asyncio.wrap_future(self._submit(list(texts)))
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        return self._submit(list(texts)).result()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
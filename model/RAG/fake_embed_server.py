@@ -0,0 +1,133 @@
+# fake_embed_server.py
+# Local stand-in for the Ollama /api/embed endpoint, for benchmarks and offline runs.
+# Vectors are deterministic (derived from a hash of the text), and latency (distribution
+# and straggler tail), server parallelism and error rate are configurable so client
+# settings can be tuned.
+import argparse
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_llm_server import LATENCY_DISTRIBUTIONS, sample_latency
+
+
+def fake_embedding(text, dim=768):
+    """Deterministic unit vector for a text"""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(v / 2**31 - 1.0 for v in struct.unpack("<8I", digest))
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class FakeEmbedConfig:
+    def __init__(self, dim=768, base_latency=0.02, per_item_latency=0.002, parallel=4, error_rate=0.0, seed=0,
+                 latency="fixed", sigma=0.4, tail_prob=0.0, tail_latency=1.0):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {LATENCY_DISTRIBUTIONS}")
+        self.dim = dim
+        self.base_latency = base_latency          # cost per request (seconds; median if not fixed)
+        self.per_item_latency = per_item_latency  # model time per input text (seconds)
+        self.parallel = parallel                  # requests processed at once, like OLLAMA_NUM_PARALLEL
+        self.error_rate = error_rate              # fraction of requests answered with HTTP 503
+        self.latency = latency                    # base_latency distribution: fixed / uniform / lognormal
+        self.sigma = sigma                        # lognormal spread
+        self.tail_prob = tail_prob                # share of requests that also get tail_latency
+        self.tail_latency = tail_latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(parallel)
+        self.requests = 0
+
+    def request_latency(self, items):
+        with self.lock:
+            base = sample_latency(self.rng, self.latency, self.base_latency, self.sigma, self.tail_prob,
+                                  self.tail_latency)
+        return base + self.per_item_latency * items
+
+    def should_fail(self):
+        with self.lock:
+            return bool(self.error_rate) and self.rng.random() < self.error_rate
+
+
+def make_handler(config):
+    class FakeEmbedHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up
+
+        def do_POST(self):
+            if self.path not in ("/api/embed", "/api/embeddings"):
+                return self._send(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with config.lock:
+                config.requests += 1
+            if config.should_fail():
+                return self._send(503, {"error": "injected failure"})
+
+            # Legacy /api/embeddings takes one "prompt", /api/embed takes "input" (str or list)
+            inputs = request.get("input", request.get("prompt", ""))
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            with config.slots:
+                time.sleep(config.request_latency(len(inputs)))
+            vectors = [fake_embedding(text, config.dim) for text in inputs]
+            if self.path == "/api/embeddings":
+                return self._send(200, {"embedding": vectors[0]})
+            return self._send(200, {"model": request.get("model"), "embeddings": vectors})
+
+    return FakeEmbedHandler
+
+
+def start_fake_embed_server(host="127.0.0.1", port=0, **config_kwargs):
+    """Start the server in a background thread. Returns (server, base_url); call server.shutdown() to stop."""
+    config = FakeEmbedConfig(**config_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama embedding server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-item-latency", type=float, default=0.002)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--sigma", type=float, default=0.4)
+    parser.add_argument("--tail-prob", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    args = parser.parse_args()
+    server, url = start_fake_embed_server(port=args.port, dim=args.dim, base_latency=args.base_latency,
+                                          per_item_latency=args.per_item_latency, parallel=args.parallel,
+                                          error_rate=args.error_rate, latency=args.latency, sigma=args.sigma,
+                                          tail_prob=args.tail_prob, tail_latency=args.tail_latency)
+    print(f"🧪 Fake embedding server listening on {url} (set OLLAMA_HOST to use it)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,242 @@
+# fake_llm_server.py
+# Local stand-in for the Gemini generateContent / streamGenerateContent REST API,
+# for load tests and offline runs. Answers are deterministic (derived from the
+# prompt); latency follows a configurable distribution with an optional slow tail,
+# tokens stream at a configurable rate, and failures can be injected.
+# FakeLLMChatModel is the LangChain chat model that talks to it.
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+_FILLER = ("the academic calendar lists registration examination and holiday dates for each semester "
+           "students should check the official notice board and contact the office for details").split()
+
+
+def fake_answer(prompt, tokens=60):
+    """Deterministic answer of `tokens` words that echoes the question, if the prompt has one"""
+    match = re.search(r"Question:\s*(.+)", prompt) or re.search(r"User Question:\s*\n\s*(.+)", prompt)
+    question = (match.group(1).strip() if match else prompt.strip()[:80]) or "your question"
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    words = f"Answer {digest[:4].hex()} to: {question}".split()
+    i = 0
+    while len(words) < tokens:
+        words.append(_FILLER[(digest[i % len(digest)] + i) % len(_FILLER)])
+        i += 1
+    return " ".join(words[:max(tokens, 1)]) + "."
+
+
+def sample_latency(rng, latency, median, sigma=0.4, tail_prob=0.0, tail_latency=0.0):
+    """One latency draw: fixed / uniform (0..2x median) / lognormal around median, plus a straggler tail"""
+    if latency == "fixed":
+        value = median
+    elif latency == "uniform":
+        value = rng.uniform(0, 2 * median)
+    else:
+        value = median * math.exp(sigma * rng.gauss(0, 1))
+    if tail_prob and rng.random() < tail_prob:
+        value += tail_latency
+    return value
+
+
+class FakeLLMConfig:
+    def __init__(self, latency="lognormal", median_latency=0.5, sigma=0.4, tail_prob=0.0, tail_latency=5.0,
+                 tokens_per_sec=80.0, response_tokens=60, parallel=16, error_rate=0.0, seed=0):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency                    # time to first token: fixed / uniform / lognormal
+        self.median_latency = median_latency      # seconds
+        self.sigma = sigma                        # lognormal spread
+        self.tail_prob = tail_prob                # share of requests that also get tail_latency (stragglers)
+        self.tail_latency = tail_latency          # seconds added to a straggler
+        self.tokens_per_sec = tokens_per_sec      # generation speed after the first token
+        self.response_tokens = response_tokens    # words per answer
+        self.parallel = parallel                  # requests processed at once
+        self.error_rate = error_rate              # fraction of requests answered with HTTP 503
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(parallel)
+        self.requests = 0
+
+    def sample_latency(self):
+        with self.lock:
+            return sample_latency(self.rng, self.latency, self.median_latency, self.sigma, self.tail_prob,
+                                  self.tail_latency)
+
+    def should_fail(self):
+        with self.lock:
+            return bool(self.error_rate) and self.rng.random() < self.error_rate
+
+
+def prompt_text(request):
+    return "\n".join(part.get("text", "") for content in request.get("contents", [])
+                     for part in content.get("parts", []))
+
+
+def candidate(text, finish_reason=None):
+    payload = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}]}
+    if finish_reason:
+        payload["candidates"][0]["finishReason"] = finish_reason
+    return payload
+
+
+def make_handler(config):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client cancelled (deadline or hedge lost)
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            stream = path.endswith(":streamGenerateContent")
+            if not (stream or path.endswith(":generateContent")):
+                return self._send(404, {"error": {"code": 404, "message": "not found"}})
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with config.lock:
+                config.requests += 1
+            if config.should_fail():
+                return self._send(503, {"error": {"code": 503, "message": "injected failure"}})
+
+            words = fake_answer(prompt_text(request), config.response_tokens).split(" ")
+            per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec else 0.0
+            with config.slots:
+                time.sleep(config.sample_latency())
+                if not stream:
+                    time.sleep(per_token * (len(words) - 1))
+                    return self._send(200, candidate(" ".join(words), "STOP"))
+                # Server-sent events, one word per event, like streamGenerateContent?alt=sse
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for i, word in enumerate(words):
+                        if i:
+                            time.sleep(per_token)
+                        text = word if i == 0 else " " + word
+                        finish = "STOP" if i == len(words) - 1 else None
+                        self.wfile.write(f"data: {json.dumps(candidate(text, finish))}\r\n\r\n".encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client cancelled (deadline or hedge lost)
+                self.close_connection = True
+
+    return FakeLLMHandler
+
+
+def start_fake_llm_server(host="127.0.0.1", port=0, **config_kwargs):
+    """Start the server in a background thread. Returns (server, base_url); call server.shutdown() to stop."""
+    config = FakeLLMConfig(**config_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# --------------------------
+# Client
+# --------------------------
+def _message_text(messages):
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+
+def _candidate_text(payload):
+    return "".join(part.get("text", "") for c in payload.get("candidates", [])
+                   for part in c.get("content", {}).get("parts", []))
+
+
+class FakeLLMChatModel(BaseChatModel):
+    """Chat model for the fake server (Gemini REST shapes); invoke/ainvoke/stream/astream all go over HTTP"""
+
+    base_url: str
+    model: str = "fake-gemini"
+    timeout: float = 120.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-llm-server"
+
+    def _url(self, stream):
+        method = "streamGenerateContent?alt=sse" if stream else "generateContent"
+        return f"{self.base_url.rstrip('/')}/v1beta/models/{self.model}:{method}"
+
+    def _body(self, messages):
+        return {"contents": [{"role": "user", "parts": [{"text": _message_text(messages)}]}]}
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        response = httpx.post(self._url(False), json=self._body(messages), timeout=self.timeout)
+        response.raise_for_status()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=_candidate_text(response.json())))])
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None,
+                         **kwargs: Any) -> ChatResult:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(self._url(False), json=self._body(messages))
+        response.raise_for_status()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=_candidate_text(response.json())))])
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        with httpx.stream("POST", self._url(True), json=self._body(messages), timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line.startswith("data: "):
+                    yield ChatGenerationChunk(message=AIMessageChunk(content=_candidate_text(json.loads(line[6:]))))
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with client.stream("POST", self._url(True), json=self._body(messages)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        yield ChatGenerationChunk(
+                            message=AIMessageChunk(content=_candidate_text(json.loads(line[6:]))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Gemini-style LLM server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--median-latency", type=float, default=0.5)
+    parser.add_argument("--sigma", type=float, default=0.4)
+    parser.add_argument("--tail-prob", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=5.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=80.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--parallel", type=int, default=16)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_fake_llm_server(port=args.port, latency=args.latency, median_latency=args.median_latency,
+                                        sigma=args.sigma, tail_prob=args.tail_prob, tail_latency=args.tail_latency,
+                                        tokens_per_sec=args.tokens_per_sec, response_tokens=args.response_tokens,
+                                        parallel=args.parallel, error_rate=args.error_rate)
+    print(f"🧪 Fake LLM server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,72 @@
+# fake_translator.py
+# In-process stand-in for deep_translator's GoogleTranslator, for load tests and
+# offline runs. Same translate() / translate_batch() calls; the "translation" is
+# deterministic (the text, tagged with the language pair), latency follows a
+# configurable distribution with an optional slow tail, and failures can be injected.
+import random
+import threading
+import time
+
+from fake_llm_server import LATENCY_DISTRIBUTIONS, sample_latency
+
+
+class TranslationError(RuntimeError):
+    pass
+
+
+class FakeTranslateConfig:
+    def __init__(self, latency="lognormal", median_latency=0.15, sigma=0.4, tail_prob=0.0, tail_latency=2.0,
+                 per_char_latency=0.0, error_rate=0.0, seed=0):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency                    # fixed / uniform / lognormal
+        self.median_latency = median_latency      # seconds per call
+        self.sigma = sigma                        # lognormal spread
+        self.tail_prob = tail_prob                # share of calls that also get tail_latency
+        self.tail_latency = tail_latency
+        self.per_char_latency = per_char_latency  # extra seconds per input character
+        self.error_rate = error_rate              # fraction of calls that raise TranslationError
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def call_latency(self, chars):
+        with self.lock:
+            self.requests += 1
+            return sample_latency(self.rng, self.latency, self.median_latency, self.sigma, self.tail_prob,
+                                  self.tail_latency) + self.per_char_latency * chars
+
+    def should_fail(self):
+        with self.lock:
+            return bool(self.error_rate) and self.rng.random() < self.error_rate
+
+
+def fake_translation(text, source, target):
+    """Deterministic: the same text and language pair always give the same output"""
+    if source == target:
+        return text
+    return f"[{source}->{target}] {text}"
+
+
+class FakeTranslator:
+    """FakeTranslator(source="hi", target="en", config=FakeTranslateConfig()).translate(text)"""
+
+    batch_endpoint = True  # translate_batch is one call, see TranslationService
+
+    def __init__(self, source="auto", target="en", config=None):
+        self.source = source
+        self.target = target
+        self.config = config or FakeTranslateConfig()
+
+    def translate(self, text):
+        time.sleep(self.config.call_latency(len(text)))
+        if self.config.should_fail():
+            raise TranslationError("injected failure")
+        return fake_translation(text, self.source, self.target)
+
+    def translate_batch(self, texts):
+        """One call (one latency draw) for the whole batch, like a batched API"""
+        time.sleep(self.config.call_latency(sum(len(text) for text in texts)))
+        if self.config.should_fail():
+            raise TranslationError("injected failure")
+        return [fake_translation(text, self.source, self.target) for text in texts]
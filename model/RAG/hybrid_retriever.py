@@ -0,0 +1,115 @@
+# hybrid_retriever.py
+# Dense (Chroma, or a NumpyVectorIndex) + lexical (BM25) retrieval fused with
+# reciprocal-rank fusion.
+# Queries that are mostly identifiers (course codes, dates, form numbers) take a
+# lexical-only fast path and skip the embedding call; they fall back to the
+# hybrid path when BM25 finds nothing.
+import re
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from lexical_index import STOPWORDS
+
+RRF_K = 60                      # standard RRF damping constant
+IDENTIFIER_QUERY_RATIO = 0.5    # share of identifier-like words that triggers the fast path
+
+_IDENTIFIER_RE = re.compile(r"^(?=.*\d)[\w./-]+$|^[A-Z]{2,}[\w./-]*$|^\w+[-/.]\w+")
+
+
+def is_identifier_query(query):
+    """True when most content words look like codes, dates or form numbers ("CS-301", "12/08", "NOC")"""
+    words = [w.strip("?,;:!()\"'") for w in query.split()]
+    words = [w for w in words if w and w.lower() not in STOPWORDS]
+    if not words:
+        return False
+    identifiers = sum(1 for w in words if _IDENTIFIER_RE.match(w))
+    return identifiers / len(words) >= IDENTIFIER_QUERY_RATIO
+
+
+def rrf_fuse(rankings, k=RRF_K):
+    """rankings: lists of IDs, best first. Returns [(id, summed 1 / (k + rank))], best first"""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def distance_to_similarity(distance, metric):
+    """Chroma distance -> cosine-like similarity (l2 assumes unit-length embeddings, as Ollama returns)"""
+    if metric == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Drop-in replacement for vector_store.as_retriever(): same get_relevant_documents() API.
+    Dense hits come from dense_index (a NumpyVectorIndex, queried with `embeddings`) when
+    set, otherwise from the Chroma vector_store. Without a lexical_index it is dense-only.
+    """
+
+    vector_store: Any = None
+    dense_index: Any = None
+    embeddings: Any = None
+    lexical_index: Any = None
+    k: int = 5
+    fetch_k: int = 20          # candidates taken from each ranker before fusion
+    lexical_fast_path: bool = True
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _documents_by_id(self, ids):
+        if not ids:
+            return {}
+        if self.dense_index is not None:
+            return self.dense_index.documents_by_id(ids)
+        found = self.vector_store._collection.get(ids=ids, include=["documents", "metadatas"])
+        return {doc_id: Document(page_content=text, metadata=meta or {})
+                for doc_id, text, meta in zip(found["ids"], found["documents"], found["metadatas"])}
+
+    def _lexical_ids(self, query):
+        if self.lexical_index is None:
+            return []
+        self.lexical_index.refresh()
+        return [doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]
+
+    def _dense_ids(self, query):
+        """(ids best first, {id: Document}, {id: similarity})"""
+        vector = (self.embeddings or self.vector_store.embeddings).embed_query(query)
+        if self.dense_index is not None:
+            hits = self.dense_index.search(vector, self.fetch_k)[0]
+            ids = [doc_id for doc_id, _ in hits]
+            similarity = {doc_id: distance_to_similarity(d, self.dense_index.metric) for doc_id, d in hits}
+            return ids, self.dense_index.documents_by_id(ids), similarity
+        # Query the collection directly: it returns IDs, which the LangChain wrapper drops
+        collection = self.vector_store._collection
+        found = collection.query(query_embeddings=[vector], n_results=self.fetch_k,
+                                 include=["documents", "metadatas", "distances"])
+        ids = found["ids"][0]
+        docs = {doc_id: Document(page_content=text, metadata=meta or {})
+                for doc_id, text, meta in zip(ids, found["documents"][0], found["metadatas"][0])}
+        metric = (collection.metadata or {}).get("hnsw:space", "l2")
+        similarity = {doc_id: distance_to_similarity(d, metric) for doc_id, d in zip(ids, found["distances"][0])}
+        return ids, docs, similarity
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        """
+        Each returned document's metadata carries "retrieval_score" (fused RRF score) and
+        "similarity" (dense similarity, None on the lexical fast path) for context packing.
+        """
+        lexical = self._lexical_ids(query)
+        if self.lexical_fast_path and lexical and is_identifier_query(query):
+            fused, docs, similarity = rrf_fuse([lexical])[:self.k], {}, {}
+        else:
+            dense, docs, similarity = self._dense_ids(query)
+            fused = rrf_fuse([dense, lexical])[:self.k]
+        docs.update(self._documents_by_id([doc_id for doc_id, _ in fused if doc_id not in docs]))
+        return [Document(page_content=docs[doc_id].page_content,
+                         metadata={**docs[doc_id].metadata, "retrieval_score": round(score, 6),
+                                   "similarity": similarity.get(doc_id)})
+                for doc_id, score in fused if doc_id in docs]
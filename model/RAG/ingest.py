@@ -0,0 +1,133 @@
+# ingest.py
+# Shared pieces of incremental PDF ingestion (the pipeline itself is in ingest_pipeline.py).
+# Near-duplicate pages and chunks are collapsed onto one canonical copy whose
+# metadata lists every source; reconcile() applies that plan to the vector store.
+import os
+from langchain_core.documents import Document
+
+from dedup import minhash_clusters, simhash_clusters
+from ingest_manifest import make_chunk_id, page_key
+from parallel_parse import parse_pdfs
+
+MANIFEST_NAME = "ingest_manifest.json"
+# Chunks handed to the vector store per call; the embedding client splits these
+# further into concurrent requests, so keep this a few times EMBED_BATCH_SIZE
+ADD_BATCH_SIZE = 256
+
+
+def list_pdfs(pdf_folder):
+    return sorted(f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf"))
+
+
+def plan_dedup(manifest, indexed_before):
+    """
+    Mark near-duplicate pages and chunks in the manifest and fill in provenance.
+    Canonical copies prefer whatever is already in the vector store, then the
+    lowest (file, page) key, so adding a file never reshuffles existing entries.
+    Returns {chunk id: duplicate_sources} for the chunks that should be indexed.
+    """
+    pages = {page_key(source, page): entry for source, page, entry in manifest.iter_pages()}
+
+    def page_is_indexed(key):
+        return any(chunk["id"] in indexed_before for chunk in pages[key].get("chunks", []))
+
+    for entry in pages.values():
+        entry["duplicate_of"] = None
+    page_members = {key: [key] for key in pages}
+    for cluster in minhash_clusters({key: entry.get("minhash") for key, entry in pages.items()}):
+        canonical = min(cluster, key=lambda k: (not page_is_indexed(k), k))
+        page_members[canonical] = cluster
+        for key in cluster:
+            if key != canonical:
+                pages[key]["duplicate_of"] = canonical
+
+    # Chunk-level pass over the canonical pages only
+    chunk_page, chunk_entries, hashes = {}, {}, {}
+    for key, entry in pages.items():
+        if entry["duplicate_of"]:
+            continue
+        for chunk in entry.get("chunks", []):
+            chunk["duplicate_of"] = None
+            chunk_page[chunk["id"]] = key
+            chunk_entries[chunk["id"]] = chunk
+            if chunk.get("simhash"):
+                hashes[chunk["id"]] = int(chunk["simhash"], 16)
+    chunk_members = {cid: [cid] for cid in chunk_entries}
+    for cluster in simhash_clusters(hashes):
+        canonical = min(cluster, key=lambda c: (c not in indexed_before, c))
+        chunk_members[canonical] = cluster
+        for cid in cluster:
+            if cid != canonical:
+                chunk_entries[cid]["duplicate_of"] = canonical
+
+    indexed = {}
+    for cid, chunk in chunk_entries.items():
+        if chunk["duplicate_of"]:
+            continue
+        own = chunk_page[cid]
+        sources = {member for other in chunk_members[cid] for member in page_members[chunk_page[other]]}
+        chunk["duplicate_sources"] = "; ".join(sorted(sources - {own}))
+        indexed[cid] = chunk["duplicate_sources"]
+    return indexed
+
+
+def chunk_metadata(chunk_id, source, page, duplicate_sources):
+    return {"source": source, "page": page, "chunk_id": chunk_id, "duplicate_sources": duplicate_sources}
+
+
+def reconcile(manifest, vector_store, pdf_folder, in_store, parse_kwargs, texts=None, lexical_index=None):
+    """
+    Bring the vector store in line with the corpus-wide dedup plan.
+    in_store: {chunk id: duplicate_sources} for what the store currently holds.
+    Chunks promoted to canonical are added, changed provenance is rewritten in place and
+    chunks that became duplicates are deleted; lexical_index (a BM25Index) is kept in step.
+    Returns (added, updated, deleted) counts.
+    """
+    texts = texts if texts is not None else {}
+    indexed_after = plan_dedup(manifest, in_store)
+    to_add = [cid for cid in indexed_after if cid not in in_store]
+    to_update = [cid for cid in indexed_after if cid in in_store and in_store[cid] != indexed_after[cid]]
+    to_delete = sorted(set(in_store) - set(indexed_after))
+
+    # Chunks promoted from duplicate to canonical were not embedded when their page was parsed
+    missing = {cid for cid in to_add if cid not in texts}
+    if missing:
+        recover_chunk_texts(manifest, pdf_folder, missing, texts, parse_kwargs)
+
+    # Add before deleting: IDs are deterministic, so a crash in between is repaired by the next run
+    docs = [Document(page_content=texts[cid][0],
+                     metadata=chunk_metadata(cid, texts[cid][1], texts[cid][2], indexed_after[cid]))
+            for cid in to_add]
+    for i in range(0, len(docs), ADD_BATCH_SIZE):
+        vector_store.add_documents(docs[i:i + ADD_BATCH_SIZE], ids=to_add[i:i + ADD_BATCH_SIZE])
+    if lexical_index is not None:
+        lexical_index.add(to_add, [texts[cid][0] for cid in to_add])
+    if to_update:
+        # Provenance changed but the text did not: rewrite metadata without re-embedding
+        current = vector_store._collection.get(ids=to_update, include=["metadatas"])
+        metadatas = [{**(meta or {}), "duplicate_sources": indexed_after[cid]}
+                     for cid, meta in zip(current["ids"], current["metadatas"])]
+        vector_store._collection.update(ids=current["ids"], metadatas=metadatas)
+    if to_delete:
+        vector_store.delete(ids=to_delete)
+        if lexical_index is not None:
+            lexical_index.remove(to_delete)
+    return len(to_add), len(to_update), len(to_delete)
+
+
+def recover_chunk_texts(manifest, pdf_folder, chunk_ids, texts, parse_kwargs):
+    """Re-parse only the pages holding chunk_ids (unchanged files, so their IDs still match)"""
+    reparse = {}
+    for source, page, entry in manifest.iter_pages():
+        if any(chunk["id"] in chunk_ids for chunk in entry.get("chunks", [])):
+            reparse.setdefault(source, set()).add(page)
+    files = [(source, os.path.join(pdf_folder, source)) for source in sorted(reparse)]
+    # Mark every other page as known so workers skip chunking it
+    known = {source: {page: manifest.page_hash(source, page) for page in manifest.pages(source)
+                      if page not in reparse[source]} for source in reparse}
+    for parsed in parse_pdfs(files, known_hashes=known, **parse_kwargs)[0]:
+        for index, text in enumerate(parsed.chunks or []):
+            texts[make_chunk_id(parsed.source, parsed.page, index, text)] = (text, parsed.source, parsed.page)
+    unresolved = set(chunk_ids) - set(texts)
+    if unresolved:
+        raise RuntimeError(f"Could not recover text for {len(unresolved)} chunks; delete the manifest to rebuild")
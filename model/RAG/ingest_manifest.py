@@ -0,0 +1,177 @@
+# ingest_manifest.py
+# Tracks what has already been embedded into the vector store, per file and per page,
+# so re-ingestion only touches PDFs and pages whose content actually changed.
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_VERSION = 2
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file on disk, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(source: str, page: int, index: int, text: str) -> str:
+    """Deterministic vector-store ID: the same chunk text at the same position keeps its ID"""
+    return f"{source}:p{page}:{index}:{text_sha256(text)[:12]}"
+
+
+def page_key(source: str, page: int) -> str:
+    """Human readable provenance key, e.g. Academic-Calendar-2025-26.pdf#p0"""
+    return f"{source}#p{page}"
+
+
+class IngestManifest:
+    """
+    JSON manifest stored next to the vector store:
+
+    {
+      "version": 2,
+      "chunking": {"chunk_size": 800, "chunk_overlap": 100},
+      "files": {
+        "<file name>": {
+          "sha256": "...",
+          "pages": {
+            "0": {
+              "sha256": "...",
+              "minhash": [...],            # page signature for near-duplicate detection
+              "duplicate_of": null,        # page key of the canonical copy, if collapsed
+              "chunks": [{"id": "...", "simhash": "hex", "duplicate_of": null, "duplicate_sources": ""}]
+            }
+          }
+        }
+      }
+    }
+
+    A chunk is in the vector store when neither it nor its page is a duplicate.
+    """
+
+    def __init__(self, path, chunking=None):
+        self.path = Path(path)
+        self.chunking = chunking or {}
+        self.files = {}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        files = data.get("files", {})
+        if data.get("version") == 1:
+            # v1 only recorded chunk IDs: keep them so they get cleaned up, re-parse everything
+            print("⚠️ Upgrading ingestion manifest, every page will be re-chunked")
+            for entry in files.values():
+                for page in entry.get("pages", {}).values():
+                    page["chunks"] = [{"id": cid} for cid in page.pop("chunk_ids", [])]
+            data["chunking"] = None
+        elif data.get("version") != MANIFEST_VERSION:
+            print(f"⚠️ Ignoring manifest with unknown version: {self.path}")
+            return
+        # Chunks cut with different parameters are stale even if the text is not
+        if data.get("chunking") != self.chunking:
+            if data.get("version") != 1:
+                print("⚠️ Chunking parameters changed, every page will be re-chunked")
+            for entry in files.values():
+                entry["sha256"] = None
+                for page in entry.get("pages", {}).values():
+                    page["sha256"] = None
+        self.files = files
+
+    def save(self):
+        """Write atomically so a crash never leaves a half-written manifest"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "chunking": self.chunking,
+                "files": self.files
+            }, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def file_unchanged(self, source: str, sha256: str) -> bool:
+        entry = self.files.get(source)
+        return entry is not None and entry.get("sha256") == sha256
+
+    def page_entry(self, source: str, page: int):
+        return self.files.get(source, {}).get("pages", {}).get(str(page))
+
+    def page_unchanged(self, source: str, page: int, sha256: str) -> bool:
+        entry = self.page_entry(source, page)
+        return entry is not None and entry.get("sha256") == sha256
+
+    def page_hash(self, source: str, page: int):
+        entry = self.page_entry(source, page)
+        return entry.get("sha256") if entry else None
+
+    def page_chunk_ids(self, source: str, page: int) -> list:
+        entry = self.page_entry(source, page)
+        return [chunk["id"] for chunk in entry.get("chunks", [])] if entry else []
+
+    def chunk_ids(self, source: str) -> list:
+        """All chunk IDs recorded for a file"""
+        return [cid for page in self.pages(source) for cid in self.page_chunk_ids(source, page)]
+
+    def pages(self, source: str) -> list:
+        return sorted(int(p) for p in self.files.get(source, {}).get("pages", {}))
+
+    def sources(self) -> list:
+        return sorted(self.files)
+
+    def iter_pages(self):
+        """Yield (source, page, entry) for every recorded page, in file/page order"""
+        for source in self.sources():
+            for page in self.pages(source):
+                yield source, page, self.page_entry(source, page)
+
+    def indexed_page_chunks(self, source: str, page: int) -> dict:
+        """{chunk id: duplicate_sources} for the chunks of one page that are in the vector store"""
+        entry = self.page_entry(source, page)
+        if not entry or entry.get("duplicate_of"):
+            return {}
+        return {chunk["id"]: chunk.get("duplicate_sources")
+                for chunk in entry.get("chunks", []) if not chunk.get("duplicate_of")}
+
+    def indexed_chunks(self) -> dict:
+        """{chunk id: duplicate_sources} for every chunk that should be in the vector store"""
+        indexed = {}
+        for source, page, _ in self.iter_pages():
+            indexed.update(self.indexed_page_chunks(source, page))
+        return indexed
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    def set_page(self, source: str, page: int, sha256: str, chunks: list, minhash=None, duplicate_of=None):
+        """chunks: list of {"id": ..., "simhash": ..., optional "duplicate_of": ...} in page order"""
+        entry = self.files.setdefault(source, {"sha256": None, "pages": {}})
+        entry["pages"][str(page)] = {
+            "sha256": sha256,
+            "minhash": minhash,
+            "duplicate_of": duplicate_of,
+            "chunks": [{"duplicate_of": None, **chunk, "duplicate_sources": ""} for chunk in chunks]
+        }
+
+    def drop_page(self, source: str, page: int):
+        self.files.get(source, {}).get("pages", {}).pop(str(page), None)
+
+    def set_file_hash(self, source: str, sha256: str):
+        self.files.setdefault(source, {"sha256": None, "pages": {}})["sha256"] = sha256
+
+    def drop_file(self, source: str):
+        self.files.pop(source, None)
@@ -0,0 +1,451 @@
+# ingest_pipeline.py
+# Streaming PDF ingestion: load page -> split -> dedup -> embed -> upsert.
+# Each stage runs in its own thread and hands work to the next through a bounded
+# queue, so memory stays flat no matter how large the corpus is and embedding
+# overlaps with parsing and upserting. The manifest is checkpointed as batches
+# land in the vector store; an interrupted run resumes where it stopped because
+# committed pages hash as unchanged.
+#
+#   python ingest_pipeline.py --pdf-folder pdfs --persist-directory chroma_db
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from dedup import MinHashIndex, SimHashIndex, minhash_signature, simhash
+from ingest import ADD_BATCH_SIZE, MANIFEST_NAME, chunk_metadata, list_pdfs, reconcile
+from ingest_manifest import IngestManifest, file_sha256, make_chunk_id, page_key
+from parallel_parse import PAGES_PER_TASK, ParseStats, iter_parsed_pages
+from retrieval_cache import IndexVersion
+
+PAGE_QUEUE_SIZE = 32        # parsed pages waiting for dedup
+BATCH_QUEUE_SIZE = 2        # chunk batches waiting for embedding / upsert
+CHECKPOINT_EVERY = 10.0     # seconds between manifest saves
+PROGRESS_EVERY = 2.0        # seconds between progress lines
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage failed"""
+
+
+@dataclass
+class PageWork:
+    """One changed page after dedup; its text has already been dropped"""
+    source: str
+    page: int
+    sha256: str
+    minhash: list
+    chunks: list                  # [{"id", "simhash", "duplicate_of"}] in page order
+    duplicate_of: str = None
+
+
+@dataclass
+class Batch:
+    pages: list = field(default_factory=list)        # PageWork
+    ids: list = field(default_factory=list)          # chunks to embed, aligned with texts/metadatas
+    texts: list = field(default_factory=list)
+    metadatas: list = field(default_factory=list)
+    vectors: list = None
+    files_done: list = field(default_factory=list)   # [(source, page count)] completed by this batch
+    pages_seen: int = 0
+
+
+@dataclass
+class Progress:
+    pages_total: int = 0
+    pages_seen: int = 0
+    pages_changed: int = 0
+    chunks_embedded: int = 0
+    chunks_skipped: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        pct = self.pages_seen / self.pages_total * 100 if self.pages_total else 100.0
+        return (f"⏳ {self.pages_seen}/{self.pages_total} pages ({pct:.0f}%), "
+                f"{self.chunks_embedded} chunks embedded, {self.chunks_skipped} duplicates skipped, "
+                f"{self.pages_seen / elapsed if elapsed else 0:.1f} pages/s, "
+                f"{self.chunks_embedded / elapsed if elapsed else 0:.1f} chunks/s, {format_rss()}")
+
+
+def peak_rss_mb():
+    """(this process, reaped child processes) peak resident set size in MB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def format_rss():
+    rss = peak_rss_mb()
+    if rss is None:
+        return "peak RSS n/a"
+    return f"peak RSS {rss[0]:.0f} MB (parse workers {rss[1]:.0f} MB)"
+
+
+# --------------------------
+# Queue helpers
+# --------------------------
+def _put(q, item, stop):
+    while True:
+        if stop.is_set():
+            raise PipelineStopped
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _drain(q, stop):
+    """Yield items until the upstream stage sends _DONE"""
+    while True:
+        if stop.is_set():
+            raise PipelineStopped
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def _run_stage(name, target, outbox, stop, errors):
+    def runner():
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            errors.append((name, e))
+            stop.set()
+        finally:
+            try:
+                _put(outbox, _DONE, stop)
+            except PipelineStopped:
+                pass
+
+    thread = threading.Thread(target=runner, name=f"ingest-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+# --------------------------
+# Stages
+# --------------------------
+def load_stage(files, known_hashes, parse_kwargs, parse_stats, outbox, stop):
+    """Parse and split changed files in the process pool; emit pages and end-of-file markers"""
+    remaining = [source for source, _ in files]
+
+    def finish_files_before(source):
+        # Files with no pages never yield one, so close every file that precedes `source`
+        while remaining and remaining[0] != source:
+            done = remaining.pop(0)
+            _put(outbox, ("file", done, parse_stats.per_file_pages.get(done, 0)), stop)
+
+    pages = iter_parsed_pages(files, known_hashes=known_hashes, stats=parse_stats, **parse_kwargs)
+    try:
+        for parsed in pages:
+            finish_files_before(parsed.source)
+            _put(outbox, ("page", parsed), stop)
+    finally:
+        pages.close()  # shuts the process pool down if we stopped early
+    finish_files_before(None)
+
+
+def dedup_stage(manifest_snapshot, inbox, outbox, progress, stop, batch_size):
+    """
+    Skip pages and chunks that are near-duplicates of something already indexed (or
+    indexed earlier in this run) and group the rest into embedding batches.
+    The corpus-wide plan is settled by reconcile() once the stream ends.
+    """
+    page_index, chunk_index = MinHashIndex(), SimHashIndex()
+    page_chunks = {}  # page key -> chunk ids in chunk_index
+    for key, (signature, chunks) in manifest_snapshot.items():
+        page_index.add(key, signature)
+        page_chunks[key] = list(chunks)
+        for cid, h in chunks.items():
+            chunk_index.add(cid, h)
+
+    batch = Batch()
+    for item in _drain(inbox, stop):
+        if item[0] == "file":
+            batch.files_done.append(item[1:])
+            continue
+        parsed = item[1]
+        batch.pages_seen += 1
+        if parsed.chunks is None:
+            continue  # page text unchanged since the last run
+
+        key = page_key(parsed.source, parsed.page)
+        # The page's previous version must not count as a duplicate of the new one
+        page_index.remove(key)
+        for cid in page_chunks.pop(key, []):
+            chunk_index.remove(cid)
+
+        signature = minhash_signature(parsed.text)
+        work = PageWork(parsed.source, parsed.page, parsed.sha256, signature, [],
+                        duplicate_of=page_index.query(signature))
+        if work.duplicate_of is None:
+            page_index.add(key, signature)
+        kept = []
+        for index, text in enumerate(parsed.chunks):
+            chunk_id = make_chunk_id(parsed.source, parsed.page, index, text)
+            h = simhash(text)
+            chunk = {"id": chunk_id, "simhash": format(h, "016x"), "duplicate_of": None}
+            work.chunks.append(chunk)
+            if work.duplicate_of:
+                continue
+            chunk["duplicate_of"] = chunk_index.query(h)
+            if chunk["duplicate_of"] is None:
+                chunk_index.add(chunk_id, h)
+                kept.append(chunk_id)
+                batch.ids.append(chunk_id)
+                batch.texts.append(text)
+                batch.metadatas.append(chunk_metadata(chunk_id, parsed.source, parsed.page, ""))
+        page_chunks[key] = kept
+        progress.chunks_skipped += len(work.chunks) - len(kept)
+        batch.pages.append(work)
+
+        if len(batch.ids) >= batch_size or batch.pages_seen >= batch_size:
+            _put(outbox, batch, stop)
+            batch = Batch()
+    if batch.pages or batch.files_done or batch.pages_seen:
+        _put(outbox, batch, stop)
+
+
+def embed_stage(embeddings, inbox, outbox, stop):
+    for batch in _drain(inbox, stop):
+        if batch.texts:
+            batch.vectors = embeddings.embed_documents(batch.texts)
+        _put(outbox, batch, stop)
+
+
+# --------------------------
+# Driver
+# --------------------------
+def incremental_ingest(pdf_folder, vector_store, manifest_path, chunk_size=800, chunk_overlap=100,
+                       workers=None, pages_per_task=PAGES_PER_TASK, batch_size=ADD_BATCH_SIZE,
+                       checkpoint_every=CHECKPOINT_EVERY, lexical_index=None):
+    """
+    Bring the vector store in line with the PDFs in pdf_folder.
+    The manifest should live next to the store it describes (see MANIFEST_NAME).
+    Changed files are parsed and chunked in a process pool of `workers` processes and
+    streamed through dedup and embedding; the calling thread upserts and checkpoints.
+    lexical_index (a BM25Index over the same chunk IDs) is updated and saved alongside.
+    Returns a dict of counts describing what was done.
+    """
+    started = time.perf_counter()
+    manifest = IngestManifest(manifest_path, chunking={"chunk_size": chunk_size, "chunk_overlap": chunk_overlap})
+    in_store = manifest.indexed_chunks()  # {chunk id: duplicate_sources} currently in the vector store
+    parse_kwargs = {"workers": workers, "pages_per_task": pages_per_task,
+                    "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+    stats = {"files": 0, "files_skipped": 0, "files_deleted": 0, "pages_changed": 0,
+             "chunks_added": 0, "chunks_deleted": 0, "chunks_updated": 0}
+
+    def delete_chunks(ids):
+        ids = [cid for cid in ids if cid in in_store]
+        if ids:
+            vector_store.delete(ids=ids)
+            if lexical_index is not None:
+                lexical_index.remove(ids)
+            for cid in ids:
+                del in_store[cid]
+            stats["chunks_deleted"] += len(ids)
+
+    # Bumped whenever the collection changed, which invalidates cached retrieval results
+    index_version = IndexVersion(os.path.dirname(os.path.abspath(manifest_path)))
+    changes_published = [0]
+
+    def save():
+        # The lexical index goes first: the manifest must never claim more than it holds
+        if lexical_index is not None:
+            lexical_index.save()
+        manifest.save()
+        changes = stats["chunks_added"] + stats["chunks_deleted"] + stats["chunks_updated"]
+        if changes != changes_published[0]:
+            index_version.bump()
+            changes_published[0] = changes
+
+    on_disk = list_pdfs(pdf_folder)
+    for source in manifest.sources():
+        if source not in on_disk:
+            print(f"🗑️ Removing: {source}")
+            stats["files_deleted"] += 1
+            delete_chunks([cid for page in manifest.pages(source)
+                           for cid in manifest.indexed_page_chunks(source, page)])
+            manifest.drop_file(source)
+    if stats["files_deleted"]:
+        save()
+
+    changed_files, file_hashes = [], {}
+    for source in on_disk:
+        stats["files"] += 1
+        pdf_path = os.path.join(pdf_folder, source)
+        file_hashes[source] = file_sha256(pdf_path)
+        if manifest.file_unchanged(source, file_hashes[source]):
+            stats["files_skipped"] += 1
+            continue
+        print(f"📄 Loading: {source}")
+        changed_files.append((source, pdf_path))
+
+    known_hashes = {
+        source: {page: manifest.page_hash(source, page) for page in manifest.pages(source)}
+        for source, _ in changed_files
+    }
+    # The dedup stage gets its own copy of what is indexed; the manifest is only touched here
+    snapshot = {}
+    for source, page, entry in manifest.iter_pages():
+        indexed = manifest.indexed_page_chunks(source, page)
+        hashes = {c["id"]: int(c["simhash"], 16) for c in entry.get("chunks", [])
+                  if c["id"] in indexed and c.get("simhash")}
+        snapshot[page_key(source, page)] = (None if entry.get("duplicate_of") else entry.get("minhash"), hashes)
+
+    parse_stats = ParseStats()
+    progress = Progress()
+    stop, errors = threading.Event(), []
+    pages_q = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+    dedup_q = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+    embed_q = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+    threads = [
+        _run_stage("load", lambda: load_stage(changed_files, known_hashes, parse_kwargs, parse_stats,
+                                              pages_q, stop), pages_q, stop, errors),
+        _run_stage("dedup", lambda: dedup_stage(snapshot, pages_q, dedup_q, progress, stop, batch_size),
+                   dedup_q, stop, errors),
+        _run_stage("embed", lambda: embed_stage(vector_store.embeddings, dedup_q, embed_q, stop),
+                   embed_q, stop, errors),
+    ]
+
+    last_checkpoint = last_progress = time.perf_counter()
+    try:
+        for batch in _drain(embed_q, stop):
+            # Upsert first, then record: a checkpoint never mentions chunks the store does not have
+            if batch.ids:
+                vector_store._collection.upsert(ids=batch.ids, embeddings=batch.vectors,
+                                                metadatas=batch.metadatas, documents=batch.texts)
+                if lexical_index is not None:
+                    lexical_index.add(batch.ids, batch.texts)
+                in_store.update((cid, "") for cid in batch.ids)
+                stats["chunks_added"] += len(batch.ids)
+            stale = []
+            for work in batch.pages:
+                previous = manifest.indexed_page_chunks(work.source, work.page)
+                manifest.set_page(work.source, work.page, work.sha256, work.chunks,
+                                  minhash=work.minhash, duplicate_of=work.duplicate_of)
+                current = manifest.indexed_page_chunks(work.source, work.page)
+                stale.extend(cid for cid in previous if cid not in current)
+            for source, page_count in batch.files_done:
+                # Pages that no longer exist (document got shorter)
+                for page in manifest.pages(source):
+                    if page >= page_count:
+                        stale.extend(manifest.indexed_page_chunks(source, page))
+                        manifest.drop_page(source, page)
+                manifest.set_file_hash(source, file_hashes[source])
+            delete_chunks(stale)
+
+            progress.pages_total = parse_stats.pages_total
+            progress.pages_seen += batch.pages_seen
+            progress.pages_changed += len(batch.pages)
+            progress.chunks_embedded += len(batch.ids)
+            now = time.perf_counter()
+            if now - last_checkpoint >= checkpoint_every:
+                save()
+                last_checkpoint = now
+            if now - last_progress >= PROGRESS_EVERY:
+                print(progress.report())
+                last_progress = now
+    except PipelineStopped:
+        pass  # a stage failed, reported below
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+        # Whatever was committed before a failure is kept, so the next run resumes from here
+        save()
+    if errors:
+        name, error = errors[0]
+        raise RuntimeError(f"Ingestion stage '{name}' failed: {error}") from error
+    if changed_files:
+        print(parse_stats.report())
+
+    added, updated, deleted = reconcile(manifest, vector_store, pdf_folder, in_store, parse_kwargs,
+                                        lexical_index=lexical_index)
+    stats["pages_changed"] = progress.pages_changed
+    stats["chunks_added"] += added
+    stats["chunks_updated"] = updated
+    stats["chunks_deleted"] += deleted
+    save()
+
+    stats["duplicate_pages"] = sum(1 for _, _, entry in manifest.iter_pages() if entry.get("duplicate_of"))
+    stats["duplicate_chunks"] = sum(1 for _, _, entry in manifest.iter_pages() if not entry.get("duplicate_of")
+                                    for chunk in entry.get("chunks", []) if chunk.get("duplicate_of"))
+    stats["pages_parsed"] = parse_stats.pages
+    stats["pages_per_sec"] = round(parse_stats.pages_per_sec, 1)
+    stats["chunks_per_sec"] = round(progress.chunks_embedded / max(time.perf_counter() - started, 1e-9), 1)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    rss = peak_rss_mb()
+    stats["peak_rss_mb"] = round(rss[0], 1) if rss else None
+    print(f"✅ Ingestion done: {stats}")
+    return stats
+
+
+# ==========================
+# CLI
+# ==========================
+def main():
+    from langchain_chroma import Chroma
+    from embedding_cache import CachedEmbeddings, EmbeddingCache, default_cache_dir
+    from embedding_client import BatchedOllamaEmbeddings
+    from lexical_index import load_lexical_index
+
+    parser = argparse.ArgumentParser(description="Stream PDFs into the Chroma vector store")
+    parser.add_argument("--pdf-folder", required=True)
+    parser.add_argument("--persist-directory", required=True)
+    parser.add_argument("--collection", default="college_pdfsn")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--embed-url", default=None, help="Ollama URL (default: OLLAMA_HOST)")
+    parser.add_argument("--fake-embed", action="store_true",
+                        help="Embed with the local fake server (testing; FAKE_EMBED_OPTIONS configures it)")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="Parse processes (default: INGEST_WORKERS)")
+    parser.add_argument("--batch-size", type=int, default=ADD_BATCH_SIZE)
+    parser.add_argument("--checkpoint-every", type=float, default=CHECKPOINT_EVERY)
+    args = parser.parse_args()
+
+    if args.fake_embed:
+        # Same path as EMBED_PROVIDER=fake: the fake server, and its own cache name, so
+        # stand-in vectors are never reused by a later real ingest into this directory
+        from providers import make_embeddings
+        inner, model_name = make_embeddings(args.model, provider="fake")
+    else:
+        inner, model_name = BatchedOllamaEmbeddings(model=args.model, base_url=args.embed_url), args.model
+    embeddings = CachedEmbeddings(inner, EmbeddingCache(default_cache_dir(args.persist_directory)),
+                                  model_name=model_name)
+    vector_store = Chroma(collection_name=args.collection, embedding_function=embeddings,
+                          persist_directory=args.persist_directory)
+    incremental_ingest(args.pdf_folder, vector_store,
+                       manifest_path=os.path.join(args.persist_directory, MANIFEST_NAME),
+                       chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+                       workers=args.workers, batch_size=args.batch_size,
+                       checkpoint_every=args.checkpoint_every,
+                       lexical_index=load_lexical_index(args.persist_directory, vector_store))
+    print(embeddings.metrics.report())
+    print(embeddings.report())
+    print(f"📈 {format_rss()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# lexical_index.py
+# In-process BM25 inverted index over the same chunks as the vector store.
+# Kept up to date by ingestion (same chunk IDs) and persisted next to the store,
+# so exact-term queries (course codes, dates, form names) can be answered without
+# an embedding call. Only term frequencies are stored; chunk text and metadata
+# are read back from Chroma by ID.
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+LEXICAL_INDEX_NAME = "bm25_index.json"
+LEXICAL_INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+REBUILD_PAGE_SIZE = 1000
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "where", "which", "who", "will", "with",
+}
+
+# Words plus compounds joined by - / . so "CS-301", "2025-26" and "12.08.2025" stay whole
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+_ALNUM_SPLIT_RE = re.compile(r"[a-z]+|[0-9]+")
+
+
+def tokenize(text):
+    """
+    Lowercased terms. Compounds are indexed whole and by their parts, and mixed
+    letter/digit runs are split too, so "CS301", "cs 301" and "CS-301" all meet on "cs" + "301".
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = re.split(r"[-/.]", token)
+        pieces = [p for part in parts for p in _ALNUM_SPLIT_RE.findall(part)]
+        for term in dict.fromkeys([token, *parts, *pieces]):
+            if term and term not in STOPWORDS:
+                terms.append(term)
+    return terms
+
+
+class BM25Index:
+    """
+    Forward index {chunk id: {term: tf}} on disk; postings are rebuilt in memory on load.
+    Safe to read from request threads while ingestion adds or removes chunks.
+    """
+
+    def __init__(self, path=None, k1=BM25_K1, b=BM25_B):
+        self.path = Path(path) if path else None
+        self.k1, self.b = k1, b
+        self._lock = threading.RLock()
+        self._mtime = None
+        self._clear()
+        if self.path and self.path.exists():
+            self.load()
+
+    def _clear(self):
+        self.docs = {}        # chunk id -> {term: tf}
+        self.lengths = {}     # chunk id -> number of terms
+        self.postings = {}    # term -> {chunk id: tf}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.docs
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._clear()
+            if data.get("version") != LEXICAL_INDEX_VERSION:
+                print(f"⚠️ Ignoring lexical index with unknown version: {self.path}")
+                return
+            for chunk_id, terms in data["docs"].items():
+                self._add_terms(chunk_id, terms)
+            self._mtime = os.path.getmtime(self.path)
+
+    def save(self):
+        """Atomic write, same as the ingestion manifest"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": LEXICAL_INDEX_VERSION, "docs": self.docs}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._mtime = os.path.getmtime(self.path)
+
+    def refresh(self):
+        """Reload if another process (ingestion) rewrote the file since we read it"""
+        if self.path and self.path.exists() and os.path.getmtime(self.path) != self._mtime:
+            self.load()
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    def _add_terms(self, chunk_id, terms):
+        self.docs[chunk_id] = terms
+        length = sum(terms.values())
+        self.lengths[chunk_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[chunk_id] = tf
+
+    def add(self, ids, texts):
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                self._remove(chunk_id)
+                self._add_terms(chunk_id, dict(Counter(tokenize(text))))
+
+    def _remove(self, chunk_id):
+        terms = self.docs.pop(chunk_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.lengths.pop(chunk_id)
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(chunk_id, None)
+            if not posting:
+                del self.postings[term]
+
+    def remove(self, ids):
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+
+    # --------------------------
+    # Search
+    # --------------------------
+    def search(self, query, k=10):
+        """[(chunk id, BM25 score)] best first; only chunks sharing a term with the query"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n = len(self.docs)
+            if not n or not terms:
+                return []
+            avg_length = self.total_length / n
+            scores = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def default_index_path(persist_directory):
+    return os.path.join(persist_directory, LEXICAL_INDEX_NAME)
+
+
+def load_lexical_index(persist_directory, vector_store=None):
+    """
+    Open the index next to the store. If it is missing or out of step with the
+    collection (e.g. a store ingested before the index existed), rebuild it from Chroma.
+    """
+    index = BM25Index(default_index_path(persist_directory))
+    if vector_store is not None:
+        collection = vector_store._collection
+        if collection.count() != len(index):
+            print("🔤 Rebuilding lexical index from the vector store")
+            index._clear()
+            offset = 0
+            while True:
+                page = collection.get(include=["documents"], limit=REBUILD_PAGE_SIZE, offset=offset)
+                if not page["ids"]:
+                    break
+                index.add(page["ids"], page["documents"])
+                offset += len(page["ids"])
+            index.save()
+    return index
@@ -0,0 +1,285 @@
+# llm_gateway.py
+# Every LLM call goes through one LLMGateway per process:
+#  - a global semaphore caps in-flight calls (LLM_MAX_CONCURRENCY)
+#  - each call has a deadline (LLM_DEADLINE_S); when it expires the caller gets a
+#    degraded, templated answer instead of waiting on a slow Gemini call
+#  - optional hedging (LLM_HEDGE=p95 or seconds): if the first attempt is slower
+#    than that, a second identical request is sent and the first answer wins
+# The gateway runs its own event loop thread, so sync callers (rg_generate), asyncio
+# callers (arg_generate) and streams all share the same semaphore and metrics.
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from streaming import chunk_text
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE_S", "20"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "off")      # "off", "p95", or a delay in seconds
+HEDGE_MIN_SAMPLES = 20                          # latencies needed before a p95 hedge delay is trusted
+LATENCY_WINDOW = 200
+DEGRADED_ANSWER = "Sorry, the assistant cannot answer right now. Please try again in a moment."
+
+_END = object()
+
+
+def parse_hedge(value):
+    """None (no hedging), "p95", or a fixed delay in seconds"""
+    if value is None or str(value).lower() in ("", "off", "none", "0"):
+        return None
+    if str(value).lower() == "p95":
+        return "p95"
+    return float(value)
+
+
+class LatencyWindow:
+    """Latencies of the last LATENCY_WINDOW successful calls"""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self._values = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._values.append(seconds)
+
+    def __len__(self):
+        return len(self._values)
+
+    def percentile(self, q):
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return None
+        return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+@dataclass
+class GatewayMetrics:
+    calls: int = 0
+    completed: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    degraded: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    hedge_skipped: int = 0     # hedge due, but every slot was busy
+
+    def report(self, latencies=None):
+        line = (f"🛰️ LLM gateway: {self.calls} calls, {self.completed} completed, {self.timeouts} timeouts, "
+                f"{self.errors} errors, {self.degraded} degraded, {self.hedged} hedged "
+                f"({self.hedge_wins} won, {self.hedge_skipped} skipped)")
+        if latencies is not None and len(latencies):
+            line += f", p50 {latencies.percentile(50):.2f}s, p95 {latencies.percentile(95):.2f}s"
+        return line
+
+
+@dataclass
+class LLMResult:
+    text: str
+    degraded: bool = False
+    reason: str = None          # "timeout" or "error" when degraded
+    hedged: bool = False
+    winner: str = "primary"     # which attempt answered: "primary" or "hedge"
+    seconds: float = 0.0
+    error: str = None
+
+    def metadata(self):
+        return {"degraded": self.degraded, "reason": self.reason, "hedged": self.hedged,
+                "winner": self.winner, "llm_seconds": round(self.seconds, 3)}
+
+
+class LLMGateway:
+    """
+    Wraps a LangChain chat model. invoke()/ainvoke() return an LLMResult; stream()/astream()
+    yield ("token", text) pairs, or a single ("degraded", text) if no token arrived in time.
+    fallback: answer text, or callable(reason) -> text, used when a call degrades.
+    """
+
+    def __init__(self, llm, max_concurrency=None, deadline=None, hedge=LLM_HEDGE):
+        self.llm = llm
+        self.max_concurrency = max_concurrency or LLM_MAX_CONCURRENCY
+        self.deadline = deadline or LLM_DEADLINE
+        self.hedge = parse_hedge(hedge)
+        self.latencies = LatencyWindow()
+        self.metrics = GatewayMetrics()
+        self._loop = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def report(self):
+        return self.metrics.report(self.latencies)
+
+    # --------------------------
+    # Event loop
+    # --------------------------
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True).start()
+                # Only ever used from the gateway loop
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+        return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def hedge_delay(self):
+        if self.hedge == "p95":
+            return self.latencies.percentile(95) if len(self.latencies) >= HEDGE_MIN_SAMPLES else None
+        return self.hedge
+
+    def _fallback_text(self, fallback, reason):
+        if fallback is None:
+            return DEGRADED_ANSWER
+        return fallback(reason) if callable(fallback) else fallback
+
+    # --------------------------
+    # Single answer
+    # --------------------------
+    async def _attempt(self, messages):
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self.llm.ainvoke(messages)
+            self.latencies.add(time.perf_counter() - started)
+            return chunk_text(response)
+
+    async def _invoke(self, messages, deadline, fallback):
+        started = time.perf_counter()
+        deadline = deadline or self.deadline
+        hedge_at = self.hedge_delay()
+        self.metrics.calls += 1
+        tasks = {asyncio.create_task(self._attempt(messages)): "primary"}
+        hedge_due, hedged, error = hedge_at is not None, False, None
+        try:
+            while tasks:
+                elapsed = time.perf_counter() - started
+                if elapsed >= deadline:
+                    break
+                timeout = deadline - elapsed
+                if hedge_due:
+                    timeout = min(timeout, max(hedge_at - elapsed, 0))
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner = tasks.pop(task)
+                    if task.exception() is None:
+                        self.metrics.completed += 1
+                        self.metrics.hedge_wins += winner == "hedge"
+                        return LLMResult(task.result(), hedged=hedged, winner=winner,
+                                         seconds=time.perf_counter() - started)
+                    error = task.exception()
+                    self.metrics.errors += 1
+                if done or not hedge_due or time.perf_counter() - started < hedge_at:
+                    continue
+                # Primary is past the hedge delay: send a second request, unless that would
+                # have to queue (hedging under saturation only adds load)
+                hedge_due = False
+                if self._semaphore.locked():
+                    self.metrics.hedge_skipped += 1
+                else:
+                    hedged = True
+                    self.metrics.hedged += 1
+                    tasks[asyncio.create_task(self._attempt(messages))] = "hedge"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        reason = "timeout" if tasks or error is None else "error"
+        self.metrics.timeouts += reason == "timeout"
+        self.metrics.degraded += 1
+        return LLMResult(self._fallback_text(fallback, reason), degraded=True, reason=reason, hedged=hedged,
+                         winner=None, seconds=time.perf_counter() - started,
+                         error=str(error) if error is not None else None)
+
+    def invoke(self, messages, deadline=None, fallback=None):
+        """Blocking call; never waits much longer than the deadline"""
+        return self._submit(self._invoke(messages, deadline, fallback)).result()
+
+    async def ainvoke(self, messages, deadline=None, fallback=None):
+        return await asyncio.wrap_future(self._submit(self._invoke(messages, deadline, fallback)))
+
+    # --------------------------
+    # Streaming
+    # --------------------------
+    async def _produce(self, messages, deadline, fallback, put):
+        """
+        Run one stream under the semaphore. The deadline applies to the first token: once
+        the answer has started, it is not cut off. Streams are not hedged.
+        """
+        started = time.perf_counter()
+        deadline = deadline or self.deadline
+        self.metrics.calls += 1
+        produced, acquired, stream = False, False, None
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline)
+            acquired = True
+            stream = self.llm.astream(messages).__aiter__()
+            remaining = max(deadline - (time.perf_counter() - started), 0.001)
+            first = await asyncio.wait_for(stream.__anext__(), remaining)
+            self.latencies.add(time.perf_counter() - started)
+            produced = True
+            put(("token", chunk_text(first)))
+            async for chunk in stream:
+                put(("token", chunk_text(chunk)))
+            self.metrics.completed += 1
+        except StopAsyncIteration:
+            self.metrics.completed += 1
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            self.metrics.degraded += 1
+            put(("degraded", self._fallback_text(fallback, "timeout")))
+        except Exception as e:
+            self.metrics.errors += 1
+            if produced:
+                put(("error", e))
+            else:
+                self.metrics.degraded += 1
+                put(("degraded", self._fallback_text(fallback, "error")))
+        finally:
+            if stream is not None and hasattr(stream, "aclose"):
+                try:
+                    await stream.aclose()
+                except Exception:
+                    pass
+            if acquired:
+                self._semaphore.release()
+            put(_END)
+
+    def stream(self, messages, deadline=None, fallback=None):
+        """Blocking generator of ("token" | "degraded", text); re-raises errors after the first token"""
+        items = queue.Queue()
+        future = self._submit(self._produce(messages, deadline, fallback, items.put))
+        try:
+            while True:
+                item = items.get()
+                if item is _END:
+                    return
+                if item[0] == "error":
+                    raise item[1]
+                yield item
+        finally:
+            # Consumer stopped early (client gone): stop generating
+            future.cancel()
+
+    async def astream(self, messages, deadline=None, fallback=None):
+        """Async-generator form of stream(), for callers on any event loop"""
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        future = self._submit(self._produce(messages, deadline, fallback,
+                                            lambda item: loop.call_soon_threadsafe(items.put_nowait, item)))
+        try:
+            while True:
+                item = await items.get()
+                if item is _END:
+                    return
+                if item[0] == "error":
+                    raise item[1]
+                yield item
+        finally:
+            future.cancel()
@@ -0,0 +1,60 @@
+# local_embeddings.py
+# Deterministic, dependency-free stand-in for the Ollama embedding model, for
+# benchmarks and offline runs. Unlike fake_embedding() (a hash of the whole text),
+# these vectors are feature-hashed bags of terms, word bigrams and character
+# trigrams, so texts that share words land close together and retrieval quality
+# can actually be measured without a model server.
+import hashlib
+import math
+
+from langchain_core.embeddings import Embeddings
+
+from lexical_index import tokenize
+
+HASHING_DIM = 384
+CHAR_NGRAM = 3
+CHAR_NGRAM_WEIGHT = 0.5        # relative to whole terms; helps with OCR noise and inflections
+
+
+def _bucket(feature, dim):
+    """(index, sign) of a feature; the sign keeps hash collisions from only ever adding up"""
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+def hashing_features(text):
+    """{feature: weight}: terms, adjacent-term bigrams and character trigrams of each term"""
+    terms = tokenize(text)
+    features = {}
+    for term in terms:
+        features["w:" + term] = features.get("w:" + term, 0.0) + 1.0
+        padded = f" {term} "
+        for i in range(max(len(padded) - CHAR_NGRAM + 1, 1)):
+            gram = "c:" + padded[i:i + CHAR_NGRAM]
+            features[gram] = features.get(gram, 0.0) + CHAR_NGRAM_WEIGHT
+    for left, right in zip(terms, terms[1:]):
+        features[f"b:{left} {right}"] = features.get(f"b:{left} {right}", 0.0) + 1.0
+    return features
+
+
+def hashing_embedding(text, dim=HASHING_DIM):
+    """Unit vector (sublinear tf); an empty text maps to the zero vector"""
+    vector = [0.0] * dim
+    for feature, weight in hashing_features(text).items():
+        index, sign = _bucket(feature, dim)
+        vector[index] += sign * (1.0 + math.log(weight) if weight > 1 else weight)
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+class HashingEmbeddings(Embeddings):
+    """Embeddings interface over hashing_embedding(); same text, same vector, on any machine"""
+
+    def __init__(self, dim=HASHING_DIM):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        return [hashing_embedding(text, self.dim) for text in texts]
+
+    def embed_query(self, text):
+        return hashing_embedding(text, self.dim)
@@ -0,0 +1,301 @@
+# numpy_index.py
+# Exact vector search over memory-mapped NumPy files: a lighter alternative to
+# Chroma's HNSW for a corpus this size. Embeddings are exported once from the
+# Chroma collection; queries are scored with one matmul per block of rows.
+# With int8 quantization the scan reads 4x fewer bytes and the best candidates
+# are rescored against the float32 rows before the final top-k is taken.
+# Every export goes to a new versioned directory and a pointer file is swapped to
+# it, so a serving process never sees files rewritten under its memory maps.
+#
+#   python numpy_index.py --persist-directory chroma_db --collection college_pdfsn
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+NUMPY_INDEX_DIR = "numpy_index"
+NUMPY_INDEX_VERSION = 1
+CURRENT_POINTER = "CURRENT"  # names the live export directory under the index root
+SEARCH_BLOCK_ROWS = 4096   # rows scored per matmul, bounds the (queries x rows) score matrix
+RESCORE_FACTOR = 4          # int8 candidates kept per result before exact rescoring
+EXPORT_PAGE_SIZE = 1000
+
+
+def default_index_dir(persist_directory):
+    return os.path.join(persist_directory, NUMPY_INDEX_DIR)
+
+
+def current_export_dir(root):
+    """Directory of the live export under `root`, or None if nothing was exported yet"""
+    root = Path(root)
+    pointer = root / CURRENT_POINTER
+    if pointer.exists():
+        return root / pointer.read_text(encoding="utf-8").strip()
+    if (root / "meta.json").exists():
+        return root  # single-directory export from before versioned exports
+    return None
+
+
+def _publish_export(root, name):
+    """Point `root` at export `name` atomically, then drop exports older than the previous one"""
+    previous = current_export_dir(root)
+    tmp_path = root / (CURRENT_POINTER + ".tmp")
+    tmp_path.write_text(name, encoding="utf-8")
+    os.replace(tmp_path, root / CURRENT_POINTER)
+    # The previous export may still be mapped by a process that has not reloaded yet.
+    # Mapped files cannot be deleted on Windows: those are retried after the next export.
+    keep = {name, previous.name if previous is not None else None}
+    for path in root.glob("v-*"):
+        if path.is_dir() and path.name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def quantize_int8(vectors):
+    """Symmetric per-row int8 quantization: vectors ~= codes * scales[:, None]"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _top_k(scores, k):
+    """Column indices of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class NumpyVectorIndex:
+    """
+    Opened from an index root: <root>/CURRENT names the live export <root>/v-<id>/ (<dir>):
+    <dir>/meta.json          metric, dim, count, source collection
+    <dir>/records.json       ids, documents, metadatas (row order)
+    <dir>/vectors.f32.npy    float32 embeddings (unit length for the cosine metric)
+    <dir>/sq_norms.npy       squared row norms, for the l2 metric
+    <dir>/vectors.i8.npy     optional int8 codes, with <dir>/scales.npy
+    Distances follow Chroma's conventions (l2: squared distance, cosine/ip: 1 - similarity).
+    """
+
+    def __init__(self, directory, use_quantized=True):
+        self.directory = current_export_dir(directory)
+        if self.directory is None:
+            raise FileNotFoundError(f"No numpy index exported under {directory}")
+        with open(self.directory / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != NUMPY_INDEX_VERSION:
+            raise ValueError(f"Unsupported numpy index version in {self.directory}")
+        with open(self.directory / "records.json", "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self.ids = records["ids"]
+        self.documents = records["documents"]
+        self.metadatas = records["metadatas"]
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.metric = self.meta["metric"]
+        self.vectors = np.load(self.directory / "vectors.f32.npy", mmap_mode="r")
+        self.sq_norms = np.load(self.directory / "sq_norms.npy")
+        self.codes = self.scales = None
+        if use_quantized and (self.directory / "vectors.i8.npy").exists():
+            self.codes = np.load(self.directory / "vectors.i8.npy", mmap_mode="r")
+            self.scales = np.load(self.directory / "scales.npy")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def quantized(self):
+        return self.codes is not None
+
+    # --------------------------
+    # Building
+    # --------------------------
+    @classmethod
+    def build(cls, directory, ids, vectors, documents, metadatas, metric="l2", quantize=True, source=None):
+        """Write a new export under the index root `directory` and make it the current one"""
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        directory = root / f"v-{time.time_ns():x}"
+        directory.mkdir()
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        np.save(directory / "vectors.f32.npy", vectors)
+        np.save(directory / "sq_norms.npy", np.einsum("ij,ij->i", vectors, vectors).astype(np.float32))
+        if quantize:
+            codes, scales = quantize_int8(vectors)
+            np.save(directory / "vectors.i8.npy", codes)
+            np.save(directory / "scales.npy", scales)
+        with open(directory / "records.json", "w", encoding="utf-8") as f:
+            json.dump({"ids": list(ids), "documents": list(documents),
+                       "metadatas": [meta or {} for meta in metadatas]}, f)
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"version": NUMPY_INDEX_VERSION, "metric": metric, "dim": int(vectors.shape[1]),
+                       "count": len(ids), "source": source, "built_at": time.time()}, f, indent=1)
+        # Readers only ever open complete exports: the pointer moves once everything is written
+        _publish_export(root, directory.name)
+        return cls(root)
+
+    @classmethod
+    def from_chroma(cls, collection, directory, quantize=True):
+        """Export a Chroma collection's embeddings, texts and metadata, page by page"""
+        ids, vectors, documents, metadatas = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings", "documents", "metadatas"],
+                                  limit=EXPORT_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            vectors.extend(page["embeddings"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+            offset += len(page["ids"])
+        if not ids:
+            raise ValueError(f"Collection {collection.name} is empty, nothing to export")
+        metric = (collection.metadata or {}).get("hnsw:space", "l2")
+        return cls.build(directory, ids, np.asarray(vectors, dtype=np.float32), documents, metadatas,
+                         metric=metric, quantize=quantize, source=collection.name)
+
+    # --------------------------
+    # Search
+    # --------------------------
+    def _prepare(self, queries):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.metric == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms == 0, 1, norms)
+        return queries
+
+    def _scores(self, dots, rows):
+        """Higher is better. l2 drops |q|^2, which is constant per query"""
+        if self.metric == "l2":
+            return 2 * dots - self.sq_norms[rows]
+        return dots
+
+    def _distances(self, queries, scores):
+        if self.metric == "l2":
+            return np.einsum("ij,ij->i", queries, queries)[:, None] - scores
+        return 1 - scores
+
+    def search(self, queries, k=5, rescore=True):
+        """
+        Exact top-k for a batch of query vectors.
+        Returns one [(id, distance)] list per query, nearest first.
+        """
+        queries = self._prepare(queries)
+        n = len(self.ids)
+        if n == 0:
+            return [[] for _ in range(len(queries))]
+        use_codes = self.quantized
+        keep = min(k * RESCORE_FACTOR if use_codes and rescore else k, n)
+
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, n)
+            rows = np.arange(start, stop)
+            if use_codes:
+                dots = (queries @ np.asarray(self.codes[start:stop], dtype=np.float32).T) * self.scales[start:stop]
+            else:
+                dots = queries @ np.asarray(self.vectors[start:stop]).T
+            scores = np.concatenate([best_scores, self._scores(dots, rows)], axis=1)
+            all_rows = np.concatenate([best_rows, np.broadcast_to(rows, (len(queries), len(rows)))], axis=1)
+            top = _top_k(scores, keep)
+            best_rows = np.take_along_axis(all_rows, top, axis=1)
+            best_scores = np.take_along_axis(scores, top, axis=1)
+
+        if use_codes and rescore:
+            # Exact float32 scores for the candidates only; the memmap pages in just these rows
+            candidates = np.asarray(self.vectors[best_rows.ravel()]).reshape(*best_rows.shape, -1)
+            dots = np.einsum("qd,qcd->qc", queries, candidates)
+            best_scores = self._scores(dots, best_rows)
+            top = _top_k(best_scores, min(k, n))
+            best_rows = np.take_along_axis(best_rows, top, axis=1)
+            best_scores = np.take_along_axis(best_scores, top, axis=1)
+        else:
+            best_rows, best_scores = best_rows[:, :k], best_scores[:, :k]
+
+        distances = self._distances(queries, best_scores)
+        return [[(self.ids[row], float(dist)) for row, dist in zip(rows, dists)]
+                for rows, dists in zip(best_rows, distances)]
+
+    def documents_by_id(self, ids):
+        return {doc_id: Document(page_content=self.documents[self.row_of[doc_id]],
+                                 metadata=self.metadatas[self.row_of[doc_id]])
+                for doc_id in ids if doc_id in self.row_of}
+
+    def memory_bytes(self):
+        """Bytes a full scan touches (int8 codes when quantized, else float32 rows)"""
+        return int((self.codes if self.quantized else self.vectors).nbytes)
+
+
+class ReloadingVectorIndex:
+    """
+    The current NumpyVectorIndex under `root`, reopened whenever `index_version`
+    (retrieval_cache.IndexVersion) changes, so a long-running server picks up new exports.
+    """
+
+    def __init__(self, root, index_version, use_quantized=True):
+        self.root = root
+        self.index_version = index_version
+        self.use_quantized = use_quantized
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        version = self.index_version.current()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._index = NumpyVectorIndex(self.root, self.use_quantized)
+                    self._version = version
+        return self._index
+
+    def __len__(self):
+        return len(self.current())
+
+    @property
+    def metric(self):
+        return self.current().metric
+
+    def search(self, queries, k=5, rescore=True):
+        return self.current().search(queries, k, rescore)
+
+    def documents_by_id(self, ids):
+        return self.current().documents_by_id(ids)
+
+    def memory_bytes(self):
+        return self.current().memory_bytes()
+
+
+def main():
+    import chromadb
+    from retrieval_cache import IndexVersion
+
+    parser = argparse.ArgumentParser(description="Export a Chroma collection to a NumPy vector index")
+    parser.add_argument("--persist-directory", required=True)
+    parser.add_argument("--collection", default="college_pdfsn")
+    parser.add_argument("--output", default=None, help="Index directory (default: <persist-directory>/numpy_index)")
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    collection = chromadb.PersistentClient(path=args.persist_directory).get_collection(args.collection)
+    started = time.perf_counter()
+    index = NumpyVectorIndex.from_chroma(collection, args.output or default_index_dir(args.persist_directory),
+                                         quantize=not args.no_quantize)
+    # Serving processes reopen the dense index (and drop cached results) on a new version
+    IndexVersion(args.persist_directory).bump()
+    print(f"✅ Exported {len(index)} vectors ({index.metric}, int8={index.quantized}) "
+          f"in {time.perf_counter() - started:.2f}s to {index.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# offline_translator.py
+# Local, offline translation backend (TRANSLATE_PROVIDER=offline) on Argos Translate.
+# Needs `pip install argostranslate` and the language packages, e.g.:
+#   argospm update && argospm install translate-hi_en
+# Same translate() / translate_batch() calls as deep_translator's GoogleTranslator.
+import threading
+
+_translations = {}
+_lock = threading.Lock()
+
+
+def _translation(source, target):
+    with _lock:
+        if (source, target) not in _translations:
+            try:
+                import argostranslate.translate
+            except ImportError as e:
+                raise RuntimeError("TRANSLATE_PROVIDER=offline needs the argostranslate package") from e
+            translation = argostranslate.translate.get_translation_from_codes(source, target)
+            if translation is None:
+                raise RuntimeError(f"No offline translation package installed for {source} -> {target}")
+            _translations[(source, target)] = translation
+        return _translations[(source, target)]
+
+
+class OfflineTranslator:
+    batch_endpoint = True  # one local model runs texts back to back anyway, so batch them
+
+    def __init__(self, source, target="en"):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        return _translation(self.source, self.target).translate(text)
+
+    def translate_batch(self, texts):
+        translation = _translation(self.source, self.target)
+        return [translation.translate(text) for text in texts]
@@ -0,0 +1,137 @@
+# parallel_parse.py
+# Parses and chunks PDFs in a process pool. Large files are cut into page ranges
+# so a single handbook does not pin the whole run to one core. Results come back
+# in (file, page) order no matter which worker finishes first.
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from pypdf import PdfReader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from ingest_manifest import text_sha256
+
+PAGES_PER_TASK = 8
+
+
+@dataclass
+class ParsedPage:
+    """Text, hash and chunks of one PDF page (chunks is None when the page was unchanged)"""
+    source: str
+    page: int
+    text: str
+    sha256: str
+    chunks: list = None
+
+
+@dataclass
+class ParseStats:
+    files: int = 0
+    pages: int = 0
+    pages_total: int = 0
+    tasks: int = 0
+    workers: int = 1
+    seconds: float = 0.0
+    per_file_pages: dict = field(default_factory=dict)
+
+    @property
+    def pages_per_sec(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        return (f"📑 Parsed {self.pages} pages from {self.files} files in {self.seconds:.2f}s "
+                f"({self.pages_per_sec:.1f} pages/s, {self.workers} workers, {self.tasks} tasks)")
+
+
+def default_workers():
+    return int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+
+
+def plan_tasks(files, pages_per_task=PAGES_PER_TASK, known_hashes=None):
+    """
+    files: list of (source, path). Returns one task per page range, in file/page order.
+    known_hashes: {source: {page: sha256}} of pages already indexed, so workers can skip chunking them.
+    """
+    known_hashes = known_hashes or {}
+    tasks = []
+    for source, path in files:
+        page_count = len(PdfReader(path).pages)
+        file_hashes = known_hashes.get(source, {})
+        for start in range(0, max(page_count, 1), pages_per_task):
+            stop = min(start + pages_per_task, page_count)
+            tasks.append((source, path, start, stop, {p: h for p, h in file_hashes.items() if start <= p < stop}))
+    return tasks
+
+
+def parse_page_range(task, chunk_size=800, chunk_overlap=100):
+    """Worker: extract and chunk pages [start, stop) of one PDF"""
+    source, path, start, stop, known = task
+    reader = PdfReader(path)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    parsed = []
+    for page in range(start, stop):
+        text = reader.pages[page].extract_text()
+        sha256 = text_sha256(text)
+        chunks = None if known.get(page) == sha256 else text_splitter.split_text(text)
+        parsed.append(ParsedPage(source, page, text, sha256, chunks))
+    return parsed
+
+
+def _parse_task(args):
+    return parse_page_range(*args)
+
+
+def iter_parsed_pages(files, workers=None, pages_per_task=PAGES_PER_TASK, chunk_size=800, chunk_overlap=100,
+                      known_hashes=None, stats=None, max_pending=None):
+    """
+    Generator form of parse_pdfs: yields ParsedPage objects in (file order, page number)
+    order as soon as they are ready. At most max_pending tasks (default 2 per worker) are
+    in flight, so results never pile up ahead of a slow consumer.
+    stats, if given, is filled in as pages are produced.
+    """
+    started = time.perf_counter()
+    stats = stats if stats is not None else ParseStats()
+    workers = workers or default_workers()
+    tasks = plan_tasks(files, pages_per_task, known_hashes)
+    args = [(task, chunk_size, chunk_overlap) for task in tasks]
+    stats.files, stats.tasks = len(files), len(tasks)
+    stats.pages_total = sum(task[3] - task[2] for task in tasks)
+
+    def emit(result):
+        for page in result:
+            stats.pages += 1
+            stats.per_file_pages[page.source] = stats.per_file_pages.get(page.source, 0) + 1
+            stats.seconds = time.perf_counter() - started
+            yield page
+
+    if workers > 1 and len(tasks) > 1:
+        stats.workers = min(workers, len(tasks))
+        max_pending = max_pending or 2 * stats.workers
+        with ProcessPoolExecutor(max_workers=stats.workers) as pool:
+            # A FIFO of futures keeps the output in submission order, which keeps the merge deterministic
+            pending = deque()
+            for arg in args:
+                if len(pending) >= max_pending:
+                    yield from emit(pending.popleft().result())
+                pending.append(pool.submit(_parse_task, arg))
+            while pending:
+                yield from emit(pending.popleft().result())
+    else:
+        stats.workers = 1
+        for arg in args:
+            yield from emit(_parse_task(arg))
+    stats.seconds = time.perf_counter() - started
+
+
+def parse_pdfs(files, workers=None, pages_per_task=PAGES_PER_TASK, chunk_size=800, chunk_overlap=100,
+               known_hashes=None):
+    """
+    Parse and chunk PDFs, in parallel when workers > 1.
+    Returns (pages, stats) with pages ordered by (file order, page number).
+    """
+    stats = ParseStats()
+    pages = list(iter_parsed_pages(files, workers, pages_per_task, chunk_size, chunk_overlap,
+                                   known_hashes, stats=stats))
+    return pages, stats
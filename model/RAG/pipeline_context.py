@@ -0,0 +1,252 @@
+# pipeline_context.py
+# Lazily constructed components shared by RAG.py (ingestion) and RAG1.py (serving).
+# Importing this module, or creating a PipelineContext, does no I/O: the LLM client,
+# embeddings, vector store, indexes and conversation DB are each built on first use,
+# so a process only pays for what it touches. warmup() builds them up front and
+# runs a probe query, moving first-request latency to startup.
+import os
+import threading
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+RAG_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIR", os.path.join(RAG_DIR, "chroma_db"))
+DEFAULT_PDF_FOLDER = os.getenv("PDF_FOLDER", os.path.join(RAG_DIR, "pdfs"))
+# Next to this file, so every entry point (and every restart) finds the same history
+DEFAULT_CONVERSATION_DB = os.getenv("CONVERSATION_DB", os.path.join(RAG_DIR, "conversation_memory.db"))
+COLLECTION_NAME = "college_pdfsn"
+EMBED_MODEL = "nomic-embed-text"
+LLM_MODEL = "gemini-2.5-flash"
+# Over-fetch so near-identical hits can be dropped and k distinct chunks remain
+RETRIEVE_K = 4
+WARMUP_QUERY = "academic calendar"
+
+
+def load_api_keys(env_file="api.env"):
+    """Load api.env and enable LangSmith tracing; only needed once an LLM is built"""
+    load_dotenv(env_file)
+
+    langsmith_key = os.getenv("LANGSMITH_API_KEY")
+    if not langsmith_key:
+        raise ValueError("LANGSMITH_API_KEY not found in environment or api.env!")
+    os.environ["LANGSMITH_TRACING"] = "true"
+    os.environ["LANGSMITH_API_KEY"] = langsmith_key
+
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if not google_api_key:
+        raise ValueError("GOOGLE_API_KEY not found in environment or api.env!")
+    os.environ["GOOGLE_API_KEY"] = google_api_key
+
+
+class lazy_component:
+    """Like functools.cached_property, but builds under the context's lock and records build time"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __get__(self, context, owner=None):
+        if context is None:
+            return self
+        # Once built, the value sits in the instance __dict__ and this is never called again
+        with context._lock:
+            if self.name not in context.__dict__:
+                started = time.perf_counter()
+                context.__dict__[self.name] = self.factory(context)
+                context.build_seconds[self.name] = round(time.perf_counter() - started, 3)
+        return context.__dict__[self.name]
+
+
+class PipelineContext:
+    """
+    One per process. Components:
+      llm, llm_gateway, embeddings, vector_store, lexical_index, dense_index (numpy backend only),
+      retriever, retrieval_cache, response_cache, conversation_store, conversation_memory
+    retriever_backend: "chroma" or "numpy" (default: RETRIEVER_BACKEND env var).
+    """
+
+    def __init__(self, persist_directory=DEFAULT_PERSIST_DIRECTORY, pdf_folder=DEFAULT_PDF_FOLDER,
+                 conversation_db=DEFAULT_CONVERSATION_DB, collection_name=COLLECTION_NAME,
+                 retriever_backend=None, retrieve_k=RETRIEVE_K, env_file="api.env"):
+        self.persist_directory = persist_directory
+        self.pdf_folder = pdf_folder
+        self.conversation_db_path = Path(conversation_db)
+        self.collection_name = collection_name
+        self.retriever_backend = retriever_backend or os.getenv("RETRIEVER_BACKEND", "chroma")
+        self.retrieve_k = retrieve_k
+        self.env_file = env_file
+        self.build_seconds = {}
+        self._lock = threading.RLock()
+
+    def is_built(self, name):
+        return name in self.__dict__
+
+    # --------------------------
+    # Components
+    # --------------------------
+    @lazy_component
+    def llm(self):
+        """Gemini, or the fake LLM server with LLM_PROVIDER=fake (see providers.py)"""
+        from providers import LLM_PROVIDER, make_llm
+
+        if LLM_PROVIDER == "gemini":
+            load_api_keys(self.env_file)
+        return make_llm(LLM_MODEL)
+
+    @lazy_component
+    def llm_gateway(self):
+        """All LLM calls: global concurrency cap, deadlines, optional hedging (see llm_gateway.py)"""
+        from llm_gateway import LLMGateway
+
+        return LLMGateway(self.llm)
+
+    @lazy_component
+    def embeddings(self):
+        """
+        Batched, concurrent Ollama client (EMBED_BATCH_SIZE / EMBED_CONCURRENCY; tune with
+        bench_embeddings.py) behind the persistent cache, so unchanged chunk texts are never
+        embedded twice, and an in-memory LRU so repeated questions skip even the cache lookup.
+        EMBED_PROVIDER=fake|hashing swaps Ollama for a stand-in (see providers.py); the
+        vector store must then have been built with the same provider.
+        """
+        from embedding_cache import CachedEmbeddings, EmbeddingCache, default_cache_dir
+        from providers import make_embeddings
+        from retrieval_cache import QueryEmbeddingLRU
+
+        embeddings, model_name = make_embeddings(EMBED_MODEL)
+        return QueryEmbeddingLRU(CachedEmbeddings(
+            embeddings,
+            EmbeddingCache(default_cache_dir(self.persist_directory)),
+            model_name=model_name
+        ))
+
+    @lazy_component
+    def vector_store(self):
+        from langchain_chroma import Chroma
+
+        return Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_directory
+        )
+
+    @lazy_component
+    def lexical_index(self):
+        """BM25 index over the same chunks, maintained by ingestion (rebuilt from Chroma if missing)"""
+        from lexical_index import load_lexical_index
+
+        if self.retriever_backend == "numpy":
+            return load_lexical_index(self.persist_directory)
+        return load_lexical_index(self.persist_directory, self.vector_store)
+
+    @lazy_component
+    def dense_index(self):
+        """Current NumPy export, reopened when ingestion bumps the index version"""
+        from numpy_index import ReloadingVectorIndex, default_index_dir
+
+        return ReloadingVectorIndex(default_index_dir(self.persist_directory),
+                                    self.retrieval_cache.index_version)
+
+    @lazy_component
+    def retriever(self):
+        """
+        Dense + BM25 fused with RRF; identifier-style queries (course codes, dates) skip the
+        embedding call. The numpy backend serves the dense side without opening Chroma.
+        """
+        from hybrid_retriever import HybridRetriever
+
+        if self.retriever_backend == "numpy":
+            return HybridRetriever(dense_index=self.dense_index, embeddings=self.embeddings,
+                                   lexical_index=self.lexical_index, k=self.retrieve_k * 2)
+        return HybridRetriever(vector_store=self.vector_store, lexical_index=self.lexical_index,
+                               k=self.retrieve_k * 2)
+
+    @lazy_component
+    def retrieval_cache(self):
+        """Retrieval results, invalidated whenever ingestion changes the collection"""
+        from retrieval_cache import IndexVersion, RetrievalCache
+
+        return RetrievalCache(IndexVersion(self.persist_directory))
+
+    @lazy_component
+    def response_cache(self):
+        """
+        LLM answers keyed by question, chunk IDs, language, template and model (see response_cache.py).
+        The semantic tier (RESPONSE_CACHE_SIMILARITY > 0) embeds questions with the query LRU.
+        """
+        from response_cache import RESPONSE_CACHE_SIMILARITY, ResponseCache
+
+        embed = (lambda text: self.embeddings.embed_query(text)) if RESPONSE_CACHE_SIMILARITY else None
+        return ResponseCache(embed=embed)
+
+    @lazy_component
+    def conversation_store(self):
+        """Conversation turns; a bounded pool of WAL connections (see conversation_store.py)"""
+        from conversation_store import ConversationStore
+
+        return ConversationStore(self.conversation_db_path)
+
+    @lazy_component
+    def conversation_memory(self):
+        """
+        Rolling per-thread summaries in the conversation DB. SUMMARY_MODE=llm (default) writes
+        them with the LLM through the gateway, SUMMARY_MODE=extractive without any LLM call.
+        """
+        from conversation_summary import ConversationMemory, make_llm_summarizer
+
+        summarize = None
+        if os.getenv("SUMMARY_MODE", "llm") == "llm":
+            summarize = make_llm_summarizer(lambda: self.llm_gateway)
+        return ConversationMemory(self.conversation_store, summarize)
+
+    # --------------------------
+    # Retrieval
+    # --------------------------
+    def rag_query(self, query, retriever=None, k=None):
+        """
+        Takes a user query and returns:
+        - retrieved document chunks
+        - metadata
+        Results are cached per (normalized query, k, filters, index version); ingestion
+        bumps the index version, so a cached answer never outlives the data it came from.
+        """
+        from dedup import dedup_documents
+
+        retriever = retriever or self.retriever
+        k = k or self.retrieve_k
+        filters = getattr(retriever, "search_kwargs", {}).get("filter")
+        retrieved = self.retrieval_cache.get_or_retrieve(
+            query, k,
+            # over-fetch, then drop near-identical hits
+            lambda: dedup_documents(retriever.get_relevant_documents(query))[:k],
+            filters=filters,
+            scope=id(retriever)
+        )
+        return {
+            "query": query,
+            "context": [text for text, _ in retrieved],
+            "metadata": [meta for _, meta in retrieved]
+        }
+
+    # --------------------------
+    # Warm-up
+    # --------------------------
+    def warmup(self, components=("retriever", "retrieval_cache", "conversation_store", "llm_gateway"),
+               probe_query=WARMUP_QUERY):
+        """
+        Build the given components now, then run one probe retrieval (bypassing the result
+        cache) so the embedding model, HNSW segment and BM25 postings are loaded before the
+        first real request. Returns {component: seconds}, including "probe".
+        """
+        started = time.perf_counter()
+        for name in components:
+            getattr(self, name)
+        if probe_query and "retriever" in components:
+            probe_started = time.perf_counter()
+            self.retriever.get_relevant_documents(probe_query)
+            self.build_seconds["probe"] = round(time.perf_counter() - probe_started, 3)
+        print(f"🔥 Warm-up done in {time.perf_counter() - started:.2f}s: {self.build_seconds}")
+        return dict(self.build_seconds)
@@ -0,0 +1,117 @@
+# providers.py
+# Picks the real or stand-in implementation of each external service, so the whole
+# pipeline can run (and be load-tested) without Gemini, Ollama or Google Translate:
+#   LLM_PROVIDER=gemini|fake           fake: FakeLLMChatModel against fake_llm_server.py
+#   EMBED_PROVIDER=ollama|fake|hashing fake: the real Ollama client against fake_embed_server.py
+#                                      hashing: in-process HashingEmbeddings (local_embeddings.py)
+#   TRANSLATE_PROVIDER=google|offline|fake
+#                                      offline: Argos Translate, local (offline_translator.py)
+#                                      fake: FakeTranslator (fake_translator.py)
+# A fake server is started in-process on first use, configured by FAKE_LLM_OPTIONS /
+# FAKE_EMBED_OPTIONS (e.g. "median_latency=0.8,tail_prob=0.02,error_rate=0.01", same
+# names as the server's config), unless FAKE_LLM_URL / FAKE_EMBED_URL point at one
+# already running. FAKE_TRANSLATE_OPTIONS configures the fake translator.
+import os
+import threading
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "ollama")
+TRANSLATE_PROVIDER = os.getenv("TRANSLATE_PROVIDER", "google")
+
+_servers = {}
+_lock = threading.Lock()
+
+
+def parse_options(text):
+    """"a=1,b=lognormal" -> {"a": 1, "b": "lognormal"}; numbers become int or float"""
+    options = {}
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        value = value.strip()
+        for cast in (int, float):
+            try:
+                value = cast(value)
+                break
+            except ValueError:
+                pass
+        options[name.strip()] = value
+    return options
+
+
+def fake_server_url(kind):
+    """Base URL of the fake "llm" or "embed" server: FAKE_<KIND>_URL, else one started in this process"""
+    url = os.getenv(f"FAKE_{kind.upper()}_URL")
+    if url:
+        return url
+    with _lock:
+        if kind not in _servers:
+            if kind == "llm":
+                from fake_llm_server import start_fake_llm_server as start
+            else:
+                from fake_embed_server import start_fake_embed_server as start
+            server, url = start(**parse_options(os.getenv(f"FAKE_{kind.upper()}_OPTIONS")))
+            print(f"🧪 Fake {kind} server started at {url}")
+            _servers[kind] = (server, url)
+        return _servers[kind][1]
+
+
+def make_llm(model, provider=None, **kwargs):
+    """Chat model for `model`; kwargs (e.g. temperature) go to the real Gemini client only"""
+    provider = provider or LLM_PROVIDER
+    if provider == "fake":
+        from fake_llm_server import FakeLLMChatModel
+
+        return FakeLLMChatModel(base_url=fake_server_url("llm"), model=f"fake-{model}")
+    if provider != "gemini":
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider}")
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model, **kwargs)
+
+
+def make_embeddings(model, provider=None):
+    """
+    (embeddings, cache name). The cache name keys the on-disk embedding cache, so
+    stand-in vectors never mix with the real model's.
+    """
+    provider = provider or EMBED_PROVIDER
+    if provider == "hashing":
+        from local_embeddings import HashingEmbeddings
+
+        embeddings = HashingEmbeddings()
+        return embeddings, f"hashing-{embeddings.dim}"
+    from embedding_client import BatchedOllamaEmbeddings
+
+    if provider == "fake":
+        return BatchedOllamaEmbeddings(model=model, base_url=fake_server_url("embed")), f"fake-{model}"
+    if provider != "ollama":
+        raise ValueError(f"Unknown EMBED_PROVIDER: {provider}")
+    return BatchedOllamaEmbeddings(model=model), model
+
+
+_translate_config = None
+
+
+def make_translator(source, target="en", provider=None):
+    """Object with translate(text), like deep_translator.GoogleTranslator"""
+    global _translate_config
+    provider = provider or TRANSLATE_PROVIDER
+    if provider == "fake":
+        from fake_translator import FakeTranslateConfig, FakeTranslator
+
+        with _lock:
+            # One config per process, so latency/error draws and request counts are shared
+            if _translate_config is None:
+                _translate_config = FakeTranslateConfig(**parse_options(os.getenv("FAKE_TRANSLATE_OPTIONS")))
+        return FakeTranslator(source, target, _translate_config)
+    if provider == "offline":
+        from offline_translator import OfflineTranslator
+
+        return OfflineTranslator(source, target)
+    if provider != "google":
+        raise ValueError(f"Unknown TRANSLATE_PROVIDER: {provider}")
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=source, target=target)
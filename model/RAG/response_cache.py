@@ -0,0 +1,155 @@
+# response_cache.py
+# LLM answers cached by what actually determines them: the normalized question,
+# the ordered IDs of the chunks that made it into the prompt, the answer language,
+# the prompt template version and the model. Two tiers:
+#  - exact: sha256 of that key
+#  - semantic (optional, RESPONSE_CACHE_SIMILARITY > 0): a differently worded question
+#    whose embedding is at least that similar, with the same chunks/language/template/model
+# Entries expire after RESPONSE_CACHE_TTL_S and the LRU holds at most RESPONSE_CACHE_SIZE.
+# Unsafe turns and personalized turns (about the user, or a follow-up that leans on
+# the conversation) are never cached or served from cache. Degraded answers are not stored.
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from retrieval_cache import LRUCache, normalize_query
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))   # 0 = exact tier only
+SEMANTIC_CANDIDATES = 32        # cached questions compared per context fingerprint
+
+# The answer depends on who is asking
+_SELF_TERMS = {"i", "me", "my", "mine", "myself", "im", "i'm", "i've", "i'd", "we", "our", "us"}
+# The question only makes sense together with earlier turns
+_FOLLOW_UP_TERMS = {"it", "its", "that", "this", "those", "these", "they", "them", "their", "he", "she",
+                    "above", "previous", "earlier", "same", "again", "else"}
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def cache_skip_reason(preprocessed_json, question, has_history):
+    """None if the turn may use the cache, else why not ("unsafe" / "personalized")"""
+    if not preprocessed_json.get("safety", {}).get("safe", True):
+        return "unsafe"
+    words = set(_WORD_RE.findall(question.casefold()))
+    if words & _SELF_TERMS or (has_history and words & _FOLLOW_UP_TERMS):
+        return "personalized"
+    return None
+
+
+def chunk_ids(chunks, metadatas, used):
+    """IDs of the chunks used in the prompt, in prompt order (content hash when a chunk has no chunk_id)"""
+    ids = []
+    for i in used:
+        meta = metadatas[i] if i < len(metadatas) else {}
+        ids.append(meta.get("chunk_id") or hashlib.sha256(chunks[i].encode("utf-8")).hexdigest()[:16])
+    return ids
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    created_at: float = field(default_factory=time.time)
+    vector: object = None      # question embedding, semantic tier only
+
+
+class ResponseCache:
+    """
+    get(question, ids, language, template, model) -> (CachedResponse, "exact" | "semantic") or (None, None)
+    put(..., text) after a successful LLM call.
+    embed: callable(text) -> vector, needed only for the semantic tier.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, similarity=RESPONSE_CACHE_SIMILARITY,
+                 embed=None):
+        self.ttl = ttl
+        self.similarity = similarity if embed is not None else 0
+        self.embed = embed
+        self.cache = LRUCache(maxsize)
+        self._semantic = OrderedDict()      # context key -> OrderedDict(exact key -> None), newest last
+        self._lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _digest(*parts):
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def keys(self, question, ids, language, template, model):
+        """(exact key, context key); the context key leaves out the question"""
+        context_key = self._digest(list(ids), language, template, model)
+        return self._digest(normalize_query(question), context_key), context_key
+
+    def _live(self, key):
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry.created_at > self.ttl:
+            return None
+        return entry
+
+    def _vector(self, question):
+        vector = np.asarray(self.embed(normalize_query(question)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, question, ids, language, template, model):
+        key, context_key = self.keys(question, ids, language, template, model)
+        entry = self._live(key)
+        if entry is not None:
+            self.hits["exact"] += 1
+            return entry, "exact"
+        if self.similarity:
+            with self._lock:
+                candidates = list(self._semantic.get(context_key, ()))
+            if candidates:
+                vector = self._vector(question)
+                best, best_score = None, self.similarity
+                for candidate in candidates:
+                    cached = self._live(candidate)
+                    if cached is None or cached.vector is None:
+                        continue
+                    score = float(vector @ cached.vector)
+                    if score >= best_score:
+                        best, best_score = cached, score
+                if best is not None:
+                    self.hits["semantic"] += 1
+                    return best, "semantic"
+        self.misses += 1
+        return None, None
+
+    def put(self, question, ids, language, template, model, text):
+        key, context_key = self.keys(question, ids, language, template, model)
+        vector = self._vector(question) if self.similarity else None
+        self.cache.put(key, CachedResponse(text, vector=vector))
+        if self.similarity:
+            with self._lock:
+                keys = self._semantic.setdefault(context_key, OrderedDict())
+                self._semantic.move_to_end(context_key)
+                keys[key] = None
+                keys.move_to_end(key)
+                while len(keys) > SEMANTIC_CANDIDATES:
+                    keys.popitem(last=False)
+                # Entries behind old context keys have left the LRU by now
+                while len(self._semantic) > self.cache.maxsize:
+                    self._semantic.popitem(last=False)
+
+    def skip(self):
+        self.skipped += 1
+
+    def clear(self):
+        self.cache.clear()
+        with self._lock:
+            self._semantic.clear()
+
+    def report(self):
+        lookups = self.hits["exact"] + self.hits["semantic"] + self.misses
+        rate = (lookups - self.misses) / lookups * 100 if lookups else 0.0
+        return (f"💾 Response cache: {self.hits['exact']} exact + {self.hits['semantic']} semantic hits, "
+                f"{self.misses} misses ({rate:.0f}% hit rate), {self.skipped} skipped, {len(self.cache)} entries")
@@ -0,0 +1,145 @@
+# retrieval_cache.py
+# In-memory caches in front of retrieval:
+#  - QueryEmbeddingLRU: query text -> embedding, so repeated questions skip Ollama
+#    (and the on-disk EmbeddingCache lookup).
+#  - RetrievalCache: (normalized query, k, filters, index version) -> retrieved chunks.
+# The index version is a small file next to the vector store that ingestion rewrites
+# whenever it changes the collection, so cached results never outlive the data.
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+INDEX_VERSION_NAME = "index_version"
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+
+def normalize_query(query):
+    """Case, whitespace and trailing punctuation do not change what we retrieve"""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!. ").casefold()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with hit/miss counters"""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def report(self, name):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"🧠 {name}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), {len(self)} entries"
+
+
+class IndexVersion:
+    """Opaque version string stored at <persist_directory>/index_version; re-read only when its mtime changes"""
+
+    def __init__(self, persist_directory):
+        self.path = Path(persist_directory) / INDEX_VERSION_NAME
+        self._mtime = None
+        self._value = "0"
+
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return "0"
+        if mtime != self._mtime:
+            self._value = self.path.read_text(encoding="utf-8").strip()
+            self._mtime = mtime
+        return self._value
+
+    def bump(self):
+        """Call after the collection changed; every process sharing the store sees a new version"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        value = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(value, encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        return value
+
+
+class QueryEmbeddingLRU(Embeddings):
+    """Wraps an Embeddings: embed_query goes through an LRU, embed_documents passes straight through"""
+
+    def __init__(self, inner, maxsize=QUERY_CACHE_SIZE):
+        self.inner = inner
+        self.cache = LRUCache(maxsize)
+
+    @property
+    def metrics(self):
+        return getattr(self.inner, "metrics", None)
+
+    def report(self):
+        inner_report = self.inner.report() + "\n" if hasattr(self.inner, "report") else ""
+        return inner_report + self.cache.report("Query embedding LRU")
+
+    def embed_documents(self, texts):
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = text.strip()
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.inner.embed_query(key)
+            self.cache.put(key, vector)
+        return list(vector)
+
+
+class RetrievalCache:
+    """Retrieved (text, metadata) pairs keyed by (normalized query, k, filters, index version)"""
+
+    def __init__(self, index_version, maxsize=QUERY_CACHE_SIZE):
+        self.index_version = index_version
+        self.cache = LRUCache(maxsize)
+
+    def key(self, query, k, filters=None, scope=None):
+        filters = tuple(sorted(filters.items())) if isinstance(filters, dict) else filters
+        return scope, normalize_query(query), k, repr(filters), self.index_version.current()
+
+    def get_or_retrieve(self, query, k, retrieve, filters=None, scope=None):
+        """
+        retrieve() -> list of Documents; returns [(page_content, metadata)] with fresh metadata dicts.
+        scope separates results of different retrievers sharing one cache.
+        """
+        key = self.key(query, k, filters, scope)
+        hit = self.cache.get(key)
+        if hit is None:
+            hit = tuple((doc.page_content, dict(doc.metadata)) for doc in retrieve())
+            self.cache.put(key, hit)
+        return [(text, dict(meta)) for text, meta in hit]
+
+    def report(self):
+        return self.cache.report("Retrieval cache")
@@ -4,13 +4,17 @@ import sounddevice as sd
 import queue
 import json
 import os
+import threading
 
-q = queue.Queue()
+# One loaded model per folder, shared by every recognizer in the process
+_models = {}
+_models_lock = threading.Lock()
 
-def vosk_callback(indata, frames, time, status):
-    if status:
-        print(status)
-    q.put(bytes(indata))
+def load_model(model_path):
+    with _models_lock:
+        if model_path not in _models:
+            _models[model_path] = vosk.Model(model_path)
+        return _models[model_path]
 
 class VoskRecognizer:
     def __init__(self, model_path=None):
@@ -21,11 +25,19 @@ class VoskRecognizer:
 
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Vosk model folder not found at {model_path}")
-        self.model = vosk.Model(model_path)
+        self.model = load_model(model_path)
         self.rec = vosk.KaldiRecognizer(self.model, 16000)
 
     def record_and_transcribe(self, duration=5):
         text = ""
+        # Per-recording buffer, so two recordings never read each other's audio
+        q = queue.Queue()
+
+        def vosk_callback(indata, frames, time, status):
+            if status:
+                print(status)
+            q.put(bytes(indata))
+
         with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16',
                                channels=1, callback=vosk_callback):
             print("Speak now...")
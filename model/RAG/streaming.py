@@ -0,0 +1,53 @@
+# streaming.py
+# Event helpers for streamed generation (rg_generate_stream / arg_generate_stream).
+# A stream yields plain dicts so any transport (console, Streamlit, SSE, WebSocket)
+# can forward them as they are:
+#   {"event": "token", "text": "..."}
+#   {"event": "first_token", "ms": 412.0}      ms since the LLM call started
+#   {"event": "last_token", "ms": 1890.5, "chunks": 37}
+#   {"event": "done", "response": "...", "sources": [...], "metadata": {...}}
+import time
+
+
+def chunk_text(chunk):
+    """Text of a streamed message chunk; Gemini may send content as a list of parts"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in content or [])
+
+
+def token_event(text):
+    return {"event": "token", "text": text}
+
+
+class StreamTimer:
+    """Start it right before the LLM call; tick() per non-empty chunk, finish() after the last one"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_ms = None
+        self.last_token_ms = None
+        self.chunks = 0
+
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def tick(self):
+        """Returns the first_token event on the first chunk, else None"""
+        self.chunks += 1
+        self.last_token_ms = self._elapsed_ms()
+        if self.first_token_ms is None:
+            self.first_token_ms = self.last_token_ms
+            return {"event": "first_token", "ms": self.first_token_ms}
+        return None
+
+    def finish(self):
+        total_ms = self._elapsed_ms()
+        if self.last_token_ms is None:
+            self.last_token_ms = total_ms
+        return {"event": "last_token", "ms": self.last_token_ms, "chunks": self.chunks}
+
+    def metadata(self):
+        return {"first_token_ms": self.first_token_ms, "last_token_ms": self.last_token_ms,
+                "stream_chunks": self.chunks}
@@ -0,0 +1,116 @@
+# toxicity_batcher.py
+# Micro-batching in front of a Detoxify model for SafetyFilterAgent. Concurrent checks
+# are collected for SAFETY_BATCH_WINDOW_S (or until SAFETY_MAX_BATCH texts are queued),
+# scored with one batched predict() call, and each caller gets its own scores back.
+# A single thread owns the model, so while one batch runs the next one fills up.
+#
+#   batcher = ToxicityBatcher(Detoxify("original"))
+#   batcher.score("some text")["toxicity"]
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+SAFETY_BATCH_WINDOW = float(os.getenv("SAFETY_BATCH_WINDOW_S", "0.005"))
+SAFETY_MAX_BATCH = int(os.getenv("SAFETY_MAX_BATCH", "32"))
+SAFETY_TIMEOUT = float(os.getenv("SAFETY_TIMEOUT_S", "10"))
+
+
+class BatchMetrics:
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.unique = 0
+        self.errors = 0
+        self.predict_seconds = 0.0
+
+    def report(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "deduplicated": self.items - self.unique,
+            "errors": self.errors,
+            "predict_seconds": round(self.predict_seconds, 3),
+        }
+
+
+class ToxicityBatcher:
+    """score(text) -> {label: probability}, from one batched model.predict(list) per window"""
+
+    def __init__(self, model, batch_window=SAFETY_BATCH_WINDOW, max_batch=SAFETY_MAX_BATCH):
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.metrics = BatchMetrics()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def report(self):
+        return self.metrics.report()
+
+    # --------------------------
+    # Callers
+    # --------------------------
+    def submit(self, text):
+        """Future resolving to the scores for `text`"""
+        future = Future()
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="toxicity-batcher", daemon=True)
+                self._worker.start()
+        self._queue.put((text, future))
+        return future
+
+    def score(self, text, timeout=SAFETY_TIMEOUT):
+        return self.submit(text).result(timeout)
+
+    def score_many(self, texts, timeout=SAFETY_TIMEOUT):
+        """Scores for each text; all are queued first, so they share batches"""
+        deadline = time.monotonic() + timeout
+        futures = [self.submit(text) for text in texts]
+        return [future.result(max(deadline - time.monotonic(), 0)) for future in futures]
+
+    # --------------------------
+    # Batching
+    # --------------------------
+    def _collect(self):
+        batch = [self._queue.get()]
+        closes = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = closes - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._predict(self._collect())
+
+    def _predict(self, batch):
+        # Identical texts (retries, repeated questions) are scored once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.metrics.batches += 1
+        self.metrics.items += len(batch)
+        self.metrics.unique += len(texts)
+        started = time.perf_counter()
+        try:
+            # Detoxify returns {label: [score per text]} for a list input
+            scores = self.model.predict(texts)
+            rows = {text: {label: float(values[i]) for label, values in scores.items()}
+                    for i, text in enumerate(texts)}
+        except Exception as e:
+            self.metrics.errors += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self.metrics.predict_seconds += time.perf_counter() - started
+        for text, future in batch:
+            future.set_result(rows[text])
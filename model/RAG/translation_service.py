@@ -0,0 +1,255 @@
+# translation_service.py
+# Query translation for InputPreprocessorAgent:
+#  - TranslationMemory: persistent (SQLite, WAL) cache of (source lang, target lang,
+#    normalized text) -> translation, with an in-memory LRU in front. Hindi/Hinglish
+#    queries repeat heavily, so most of them never reach the translator.
+#  - TranslationService: concurrent misses are collected for TRANSLATE_BATCH_WINDOW_S,
+#    deduplicated (identical in-flight texts share one call) and sent per language pair
+#    as one batch when the backend has a real batch call (batch_endpoint), else as
+#    concurrent single calls. Callers wait at most TRANSLATE_TIMEOUT_S, then get their text back
+#    untranslated; a late result is still stored for the next time.
+# The backend comes from providers.make_translator (TRANSLATE_PROVIDER=google|offline|fake).
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+
+from providers import make_translator
+from retrieval_cache import LRUCache
+
+RAG_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_DB", os.path.join(RAG_DIR, "translation_memory.db"))
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT_S", "2.0"))
+TRANSLATE_BATCH_WINDOW = float(os.getenv("TRANSLATE_BATCH_WINDOW_S", "0.01"))
+TRANSLATE_MAX_BATCH = int(os.getenv("TRANSLATE_MAX_BATCH", "32"))
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
+MEMORY_LRU_SIZE = 4096
+
+
+def normalize_text(text):
+    """Case and spacing do not change a query's translation"""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class TranslationMemory:
+    """Persistent translation cache; get/put by (source, target, normalized text)"""
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH, lru_size=MEMORY_LRU_SIZE):
+        self.path = path
+        self.lru = LRUCache(lru_size)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                text TEXT NOT NULL,        -- normalized source text
+                translation TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (source, target, text)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def get(self, source, target, text):
+        key = (source, target, text)
+        translation = self.lru.get(key)
+        if translation is None:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT translation FROM translations WHERE source = ? AND target = ? AND text = ?",
+                    key).fetchone()
+            if row:
+                translation = row[0]
+                self.lru.put(key, translation)
+        return translation
+
+    def put(self, source, target, text, translation):
+        self.lru.put((source, target, text), translation)
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO translations (source, target, text, translation) "
+                              "VALUES (?, ?, ?, ?)", (source, target, text, translation))
+            self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+@dataclass
+class TranslationMetrics:
+    memory_hits: int = 0
+    coalesced: int = 0         # waited on an identical in-flight request
+    calls: int = 0             # texts sent to the backend
+    batches: int = 0           # batched backend calls (batch_endpoint backends only)
+    timeouts: int = 0
+    errors: int = 0
+
+    def report(self):
+        return (f"🌐 Translation: {self.memory_hits} memory hits, {self.coalesced} coalesced, "
+                f"{self.calls} texts sent ({self.batches} batched calls), {self.timeouts} timeouts, "
+                f"{self.errors} errors")
+
+
+class TranslationService:
+    """translate(text, source) -> English (or `target`) text; the input itself on timeout or failure"""
+
+    def __init__(self, memory=None, make_backend=make_translator, timeout=TRANSLATE_TIMEOUT,
+                 batch_window=TRANSLATE_BATCH_WINDOW, max_batch=TRANSLATE_MAX_BATCH,
+                 concurrency=TRANSLATE_CONCURRENCY):
+        self.memory = memory
+        self.make_backend = make_backend
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.metrics = TranslationMetrics()
+        self._queue = queue.Queue()
+        self._inflight = {}        # (source, target, normalized text) -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="translate")
+        self._collector = None
+
+    def report(self):
+        return self.metrics.report()
+
+    # --------------------------
+    # Callers
+    # --------------------------
+    def submit(self, text, source, target="en"):
+        """Translation text on a memory hit, else a Future resolving to it"""
+        key = (source, target, normalize_text(text))
+        if self.memory is not None:
+            cached = self.memory.get(*key)
+            if cached is not None:
+                self.metrics.memory_hits += 1
+                return cached
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.metrics.coalesced += 1
+                return future
+            future = self._inflight[key] = Future()
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name="translate-batcher", daemon=True)
+                self._collector.start()
+        self._queue.put((key, text, future))
+        return future
+
+    def _wait(self, text, pending, deadline):
+        if isinstance(pending, str):
+            return pending
+        try:
+            return pending.result(max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            self.metrics.timeouts += 1
+            print(f"⚠️ Translation timed out after {self.timeout}s, using the original text")
+        except Exception as e:
+            print("Translation failed:", e)
+        return text
+
+    def translate(self, text, source, target="en", timeout=None):
+        if source == target or not text.strip():
+            return text
+        deadline = time.monotonic() + (timeout or self.timeout)
+        return self._wait(text, self.submit(text, source, target), deadline)
+
+    def translate_many(self, texts, sources, target="en", timeout=None):
+        """Translate texts[i] from sources[i]; all are submitted first, so misses share batches"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        pending = [text if source == target or not text.strip() else self.submit(text, source, target)
+                   for text, source in zip(texts, sources)]
+        return [self._wait(text, item, deadline) for text, item in zip(texts, pending)]
+
+    # --------------------------
+    # Batching
+    # --------------------------
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            closes = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = closes - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            pairs = {}
+            for item in batch:
+                pairs.setdefault(item[0][:2], []).append(item)
+            for (source, target), items in pairs.items():
+                self._executor.submit(self._translate_batch, source, target, items)
+
+    def _finish(self, key, future, translation=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(translation)
+
+    def _translate_batch(self, source, target, items):
+        try:
+            backend = self.make_backend(source, target)
+        except Exception as e:
+            self.metrics.errors += 1
+            for key, _, future in items:
+                self._finish(key, future, error=e)
+            return
+        # Only backends with a real batch call get one. deep_translator's translate_batch
+        # just loops over translate(), which would hold every caller until the last text.
+        if len(items) > 1 and getattr(backend, "batch_endpoint", False):
+            self.metrics.batches += 1
+            self.metrics.calls += len(items)
+            try:
+                results = backend.translate_batch([text for _, text, _ in items])
+            except Exception as e:
+                self.metrics.errors += 1
+                for key, _, future in items:
+                    self._finish(key, future, error=e)
+                return
+            for (key, text, future), result in zip(items, results):
+                self._store(key, text, future, result)
+            return
+        # One call per text, each resolved as soon as its own call returns
+        for key, text, future in items[1:]:
+            self._executor.submit(self._translate_one, backend, key, text, future)
+        self._translate_one(backend, *items[0])
+
+    def _translate_one(self, backend, key, text, future):
+        self.metrics.calls += 1
+        try:
+            result = backend.translate(text)
+        except Exception as e:
+            self.metrics.errors += 1
+            self._finish(key, future, error=e)
+            return
+        self._store(key, text, future, result)
+
+    def _store(self, key, text, future, result):
+        if result:
+            if self.memory is not None:
+                self.memory.put(*key, result)
+            self._finish(key, future, result)
+        else:
+            self._finish(key, future, text)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def translation_service():
+    """Process-wide service backed by the translation memory at TRANSLATION_MEMORY_DB"""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = TranslationService(TranslationMemory())
+        return _default_service
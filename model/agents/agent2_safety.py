@@ -1,10 +1,17 @@
+import os
 import re
+import sys
 from detoxify import Detoxify
 
+# The micro-batching scheduler lives with the RAG pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "RAG"))
+from toxicity_batcher import ToxicityBatcher  # concurrent checks share one predict() call
+
 class SafetyFilterAgent:
     def __init__(self, toxicity_threshold=0.5):
         self.toxicity_threshold = toxicity_threshold
         self.detoxify = Detoxify('original')  # pre-trained toxicity model
+        self.batcher = ToxicityBatcher(self.detoxify)
 
     def contains_pii(self, text: str) -> bool:
         # Regex patterns
@@ -35,7 +42,7 @@ class SafetyFilterAgent:
         query = preprocessed_json["query_en"]
 
         # 1. Toxicity check
-        tox_scores = self.detoxify.predict(query)
+        tox_scores = self.batcher.score(query)  # batched with any concurrent checks
         toxic_prob = tox_scores.get("toxicity", 0)
 
         # 2. PII check
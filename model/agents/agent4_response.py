@@ -1,29 +1,48 @@
 import os
+import sys
 import json
+import threading
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+
+# The LLM gateway (concurrency cap, deadlines, hedging) and providers live with the RAG pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "RAG"))
+from llm_gateway import DEGRADED_ANSWER, LLMGateway
+from providers import LLM_PROVIDER, make_llm
+from streaming import StreamTimer, token_event  # same events as rg_generate_stream
+
+# One LLM client and gateway per model in this process: every agent shares the
+# LLM_MAX_CONCURRENCY cap and the gateway's event loop
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+def default_gateway(model):
+    with _gateways_lock:
+        if model not in _gateways:
+            _gateways[model] = LLMGateway(make_llm(
+                model,
+                temperature=0.3  # low = factual, high = creative
+            ))
+        return _gateways[model]
 
 class ResponseGeneratorAgent:
-    def __init__(self, model="gemini-1.5-flash"):
+    def __init__(self, model="gemini-1.5-flash", gateway=None):
         # Load .env file if present
         load_dotenv()
 
-        # Ensure API key is set
-        if not os.getenv("GOOGLE_API_KEY"):
+        # Ensure API key is set (LLM_PROVIDER=fake runs against the local fake LLM server instead)
+        if LLM_PROVIDER == "gemini" and not os.getenv("GOOGLE_API_KEY"):
             raise ValueError("❌ GOOGLE_API_KEY not found. Please set it in .env or environment variables.")
 
-        # Initialize Gemini LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model=model,
-            temperature=0.3  # low = factual, high = creative
-        )
+        # Gemini behind the process-wide gateway for this model, unless one is passed in
+        self.gateway = gateway or default_gateway(model)
+        self.llm = self.gateway.llm
 
-    def run(self, input_json: dict) -> dict:
+    def _build_prompt(self, input_json: dict) -> str:
         query_en = input_json.get("query_en", input_json["query"])
         context = input_json.get("context", "")
 
         # Build structured prompt
-        prompt = f"""
+        return f"""
         You are CampusConnect AI, a helpful assistant for university queries.
 
         Context:
@@ -35,21 +54,98 @@ class ResponseGeneratorAgent:
         Answer in a clear, concise, and factual way.
         """
 
-        # Call Gemini LLM
-        try:
-            response = self.llm.invoke(prompt)
-            answer = response.content
-        except Exception as e:
-            answer = f"⚠️ LLM call failed: {str(e)}"
-
-        # Return structured response
+    def _result(self, input_json: dict, answer: str) -> dict:
         return {
             "thread_id": input_json["thread_id"],
             "user_id": input_json["user_id"],
             "query": input_json["query"],
-            "query_en": query_en,
+            "query_en": input_json.get("query_en", input_json["query"]),
             "lang": input_json.get("lang", "en"),
             "response": answer,
             "sources": input_json.get("sources", []),
             "safety": input_json.get("safety", {})
-        }
\ No newline at end of file
+        }
+
+    def _fallback(self, input_json: dict):
+        """Answer used when the LLM misses its deadline (LLM_DEADLINE_S) or fails"""
+        context = input_json.get("context", "")
+
+        def fallback(reason):
+            if reason == "timeout" and context:
+                return f"⚠️ The assistant is slow right now. From the official notice: {context[:300]}"
+            return DEGRADED_ANSWER
+        return fallback
+
+    def _answer(self, result) -> str:
+        if result.degraded and result.reason == "error":
+            return f"⚠️ LLM call failed: {result.error}"
+        return result.text
+
+    def run(self, input_json: dict) -> dict:
+        prompt = self._build_prompt(input_json)
+
+        # Call Gemini LLM through the gateway: bounded concurrency, never past the deadline
+        result = self.gateway.invoke(prompt, fallback=self._fallback(input_json))
+
+        # Return structured response
+        return {**self._result(input_json, self._answer(result)), "llm": result.metadata()}
+
+    async def arun(self, input_json: dict) -> dict:
+        """run() for asyncio callers"""
+        prompt = self._build_prompt(input_json)
+        result = await self.gateway.ainvoke(prompt, fallback=self._fallback(input_json))
+        return {**self._result(input_json, self._answer(result)), "llm": result.metadata()}
+
+    # ------------------------------
+    # Streaming
+    # ------------------------------
+    # Event dicts, in order:
+    #   {"event": "first_token", "ms": ...}   ms since the LLM call started
+    #   {"event": "token", "text": ...}       one per streamed chunk
+    #   {"event": "error", "error": ...}      only if the call failed mid-answer (partial text is kept)
+    #   {"event": "last_token", "ms": ..., "chunks": ...}
+    #   {"event": "done", "result": {...}}    same dict run() returns, plus "timings"
+    # If no token arrives before the deadline, the fallback answer is streamed as one token.
+    def _on_chunk(self, state: dict, kind: str, text: str) -> list:
+        # "degraded": no first token before the deadline; the fallback arrives as one token
+        state["degraded"] = state["degraded"] or kind == "degraded"
+        state["parts"].append(text)
+        first = state["timer"].tick()
+        return ([first] if first else []) + [token_event(text)]
+
+    def _finish(self, input_json: dict, state: dict, error=None) -> list:
+        timer = state["timer"]
+        last = timer.finish()
+        result = {**self._result(input_json, "".join(state["parts"])),
+                  "timings": {**timer.metadata(), "degraded": state["degraded"]}}
+        events = [{"event": "error", "error": str(error)}] if error is not None else []
+        return events + [last, {"event": "done", "result": result}]
+
+    def _new_state(self) -> dict:
+        return {"timer": StreamTimer(), "parts": [], "degraded": False}
+
+    def stream(self, input_json: dict):
+        """Generator form of run(): yields token events as Gemini produces them"""
+        prompt = self._build_prompt(input_json)
+        state, error = self._new_state(), None
+        try:
+            for kind, text in self.gateway.stream(prompt, fallback=self._fallback(input_json)):
+                if text:
+                    yield from self._on_chunk(state, kind, text)
+        except Exception as e:
+            error = e
+        yield from self._finish(input_json, state, error)
+
+    async def astream(self, input_json: dict):
+        """Async-generator form of stream()"""
+        prompt = self._build_prompt(input_json)
+        state, error = self._new_state(), None
+        try:
+            async for kind, text in self.gateway.astream(prompt, fallback=self._fallback(input_json)):
+                if text:
+                    for event in self._on_chunk(state, kind, text):
+                        yield event
+        except Exception as e:
+            error = e
+        for event in self._finish(input_json, state, error):
+            yield event